@@ -1,15 +1,147 @@
-prev_prices = {}
-
-def detect_anomaly(ticker: str, price: float):
-    global prev_prices
-    if ticker not in prev_prices:
-        prev_prices[ticker] = price
-        return None
-    
-    prev_price = prev_prices[ticker]
-    change = (price - prev_price) / prev_price
-    prev_prices[ticker] = price
-
-    if abs(change) > 0.05:  # >5% move
-        return {"ticker": ticker, "price": price, "change": round(change*100, 2)}
-    return None
+# backend/anomaly.py
+# Streaming anomaly detection for many tickers at once. Per-ticker state lives
+# in NumPy arrays indexed through a ticker -> slot map, so a batch of ticks is
+# a handful of vector ops: EWMA mean/variance of returns (z-scores), EWMA
+# volume (spike ratio) and the original >5% tick-to-tick move rule.
+import numpy as np
+
+
+class AnomalyDetector:
+    """
+    Feed ticks in batches with update(); get back every anomaly in the batch.
+    Each tick costs O(1): the EWMA stats are updated in place, no price history is kept.
+    A ticker needs `warmup` ticks before z-scores and volume spikes are reported.
+    """
+
+    def __init__(self, alpha: float = 0.05, z_threshold: float = 4.0, move_threshold: float = 0.05,
+                 volume_alpha: float = 0.05, volume_ratio: float = 5.0, warmup: int = 20, capacity: int = 1024):
+        self.alpha = alpha
+        self.z_threshold = z_threshold
+        self.move_threshold = move_threshold
+        self.volume_alpha = volume_alpha
+        self.volume_ratio = volume_ratio
+        self.warmup = warmup
+        self.tickers = []
+        self._slots = {}
+        self.last_price = np.zeros(capacity)
+        self.mean = np.zeros(capacity)      # EWMA of returns
+        self.var = np.zeros(capacity)       # EWMA variance of returns
+        self.volume = np.zeros(capacity)    # EWMA of volume
+        self.count = np.zeros(capacity, dtype=np.int64)
+        self.ticks = 0
+
+    def __len__(self):
+        return len(self.tickers)
+
+    def _grow(self, needed: int):
+        capacity = len(self.count)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        for name in ("last_price", "mean", "var", "volume", "count"):
+            old = getattr(self, name)
+            grown = np.zeros(capacity, dtype=old.dtype)
+            grown[:len(old)] = old
+            setattr(self, name, grown)
+
+    def slots_for(self, tickers) -> np.ndarray:
+        """Resolve tickers to state slots (new tickers get one); cache this for a fixed watchlist."""
+        slots = self._slots
+        out = np.empty(len(tickers), dtype=np.int64)
+        for i, ticker in enumerate(tickers):
+            slot = slots.get(ticker)
+            if slot is None:
+                slot = slots[ticker] = len(self.tickers)
+                self.tickers.append(ticker)
+            out[i] = slot
+        self._grow(len(self.tickers))
+        return out
+
+    def update(self, tickers, prices, volumes=None):
+        """Apply a batch of ticks (same ticker may repeat, in time order) and return the anomalies."""
+        return self.update_slots(self.slots_for(tickers), prices, volumes)
+
+    def update_slots(self, slots, prices, volumes=None):
+        slots = np.asarray(slots, dtype=np.int64)
+        prices = np.asarray(prices, dtype=np.float64)
+        volumes = None if volumes is None else np.asarray(volumes, dtype=np.float64)
+        if len(slots) == 0:
+            return []
+        # A ticker may appear several times in one batch: apply its ticks in rounds, one per occurrence
+        order = np.argsort(slots, kind="stable")
+        sorted_slots = slots[order]
+        starts = np.r_[0, np.flatnonzero(np.diff(sorted_slots)) + 1]
+        ranks = np.empty(len(slots), dtype=np.int64)
+        ranks[order] = np.arange(len(slots)) - np.repeat(starts, np.diff(np.r_[starts, len(slots)]))
+
+        anomalies = []
+        for rank in range(int(ranks.max()) + 1):
+            pick = np.flatnonzero(ranks == rank)
+            anomalies.extend(self._step(slots[pick], prices[pick], None if volumes is None else volumes[pick], pick))
+        anomalies.sort(key=lambda a: a.pop("_index"))
+        self.ticks += len(slots)
+        return anomalies
+
+    def _step(self, s, price, volume, index):
+        """One vectorized update over distinct slots."""
+        seen = self.count[s] > 0
+        warm = self.count[s] >= self.warmup
+        last = self.last_price[s]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ret = np.where(seen & (last > 0), price / last - 1.0, 0.0)
+            # EWMA stats start at 0: debias by the weight accumulated over the returns seen so far
+            weight = 1.0 - (1.0 - self.alpha) ** np.maximum(self.count[s] - 1, 0)
+            std = np.sqrt(self.var[s] / weight)
+            z = np.where(warm & (std > 0), (ret - self.mean[s] / weight) / std, 0.0)
+            ratio = np.zeros(len(s)) if volume is None else np.where(warm & (self.volume[s] > 0), volume / self.volume[s], 0.0)
+
+        # EWMA updates (returns only once there is a previous price)
+        delta = ret - self.mean[s]
+        a = np.where(seen, self.alpha, 0.0)
+        self.mean[s] += a * delta
+        self.var[s] = (1 - a) * (self.var[s] + a * delta * delta)
+        if volume is not None:
+            self.volume[s] = np.where(self.count[s] == 0, volume, self.volume[s] + self.volume_alpha * (volume - self.volume[s]))
+        self.last_price[s] = price
+        self.count[s] += 1
+
+        move = seen & (np.abs(ret) > self.move_threshold)
+        zflag = np.abs(z) > self.z_threshold
+        spike = ratio > self.volume_ratio
+        hits = np.flatnonzero(move | zflag | spike)
+        return [
+            {
+                "ticker": self.tickers[s[i]],
+                "price": float(price[i]),
+                "change": round(float(ret[i]) * 100, 2),
+                "zscore": round(float(z[i]), 2),
+                "volume_ratio": round(float(ratio[i]), 2),
+                "reasons": [name for name, flag in (("move", move[i]), ("zscore", zflag[i]), ("volume", spike[i])) if flag],
+                "_index": int(index[i]),
+            }
+            for i in hits
+        ]
+
+    def snapshot(self, ticker: str):
+        """Current state for one ticker, or None if never seen."""
+        slot = self._slots.get(ticker)
+        if slot is None:
+            return None
+        return {
+            "price": float(self.last_price[slot]),
+            "mean_return": float(self.mean[slot]),
+            "std_return": float(np.sqrt(self.var[slot])),
+            "avg_volume": float(self.volume[slot]),
+            "ticks": int(self.count[slot]),
+        }
+
+
+# Shared detector for single-tick callers
+detector = AnomalyDetector()
+
+
+def detect_anomaly(ticker: str, price: float, volume: float = None):
+    """Single-tick wrapper around the shared detector: an anomaly dict or None."""
+    anomalies = detector.update([ticker], [price], None if volume is None else [volume])
+    return anomalies[0] if anomalies else None
@@ -0,0 +1,73 @@
+# backend/bar_cache.py
+# Local columnar cache of 1-minute bars: one append-only file per ticker holding
+# fixed-size records, read back through np.memmap (no parsing, no full load).
+# The last cached timestamp per ticker is the watermark for incremental fetches.
+import os
+import threading
+
+import numpy as np
+
+BAR_DTYPE = np.dtype([
+    ("ts", "<i8"),  # bar open time, epoch seconds (UTC)
+    ("open", "<f8"),
+    ("high", "<f8"),
+    ("low", "<f8"),
+    ("close", "<f8"),
+    ("volume", "<f8"),
+])
+
+
+def to_bars(rows) -> np.ndarray:
+    """Iterable of (ts, open, high, low, close, volume) -> BAR_DTYPE array sorted by ts."""
+    bars = np.array([tuple(r) for r in rows], dtype=BAR_DTYPE)
+    return bars[np.argsort(bars["ts"], kind="stable")]
+
+
+class BarCache:
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._maps = {}
+        self._watermarks = {}
+        self._lock = threading.Lock()
+
+    def _path(self, ticker: str):
+        return os.path.join(self.directory, f"{ticker.replace('/', '_')}.bars")
+
+    def bars(self, ticker: str, since: int = None) -> np.ndarray:
+        """Cached bars for a ticker (read-only memmap view), optionally only ts > since."""
+        bars = self._maps.get(ticker)
+        if bars is None:
+            path = self._path(ticker)
+            size = os.path.getsize(path) if os.path.exists(path) else 0
+            rows = size // BAR_DTYPE.itemsize
+            bars = np.memmap(path, dtype=BAR_DTYPE, mode="r", shape=(rows,)) if rows else np.zeros(0, BAR_DTYPE)
+            self._maps[ticker] = bars
+        if since is not None:
+            bars = bars[np.searchsorted(bars["ts"], since, side="right"):]
+        return bars
+
+    def watermark(self, ticker: str):
+        """Timestamp of the newest cached bar, or None."""
+        if ticker not in self._watermarks:
+            bars = self.bars(ticker)
+            self._watermarks[ticker] = int(bars["ts"][-1]) if len(bars) else None
+        return self._watermarks[ticker]
+
+    def append(self, ticker: str, bars: np.ndarray) -> int:
+        """Append bars newer than the watermark; returns how many were written."""
+        with self._lock:
+            mark = self.watermark(ticker)
+            if mark is not None:
+                bars = bars[bars["ts"] > mark]
+            if len(bars) == 0:
+                return 0
+            with open(self._path(ticker), "ab") as f:
+                f.write(np.ascontiguousarray(bars, dtype=BAR_DTYPE).tobytes())
+            self._maps.pop(ticker, None)  # re-map with the new length on next read
+            self._watermarks[ticker] = int(bars["ts"][-1])
+            return len(bars)
+
+    def last_close(self, ticker: str):
+        bars = self.bars(ticker)
+        return float(bars["close"][-1]) if len(bars) else None
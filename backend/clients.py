@@ -0,0 +1,123 @@
+# backend/clients.py
+# One shared, lazily created instance of every network client per process:
+# keep-alive HTTP pools (requests + httpx), one MongoClient, one Anthropic client each for sync/async.
+import threading
+
+import httpx
+import requests
+from anthropic import Anthropic, AsyncAnthropic
+from pymongo import MongoClient
+from requests.adapters import HTTPAdapter
+
+from .config import (
+    ANTHROPIC_API_KEY, MONGO_URI, MONGO_DB, MONGO_COLLECTION, MONGO_MAX_POOL_SIZE,
+    HTTP_POOL_CONNECTIONS, HTTP_POOL_MAXSIZE, HTTP_KEEPALIVE_EXPIRY,
+)
+
+_clients = {}
+_lock = threading.Lock()
+_async_requests = 0
+
+
+def _get(name, factory):
+    client = _clients.get(name)
+    if client is None:
+        with _lock:
+            client = _clients.get(name)
+            if client is None:
+                client = _clients[name] = factory()
+    return client
+
+
+def _make_session():
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=HTTP_POOL_CONNECTIONS, pool_maxsize=HTTP_POOL_MAXSIZE)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+async def _count_request(request):
+    global _async_requests
+    _async_requests += 1
+
+
+def _make_async_http():
+    return httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=HTTP_POOL_MAXSIZE,
+            max_keepalive_connections=HTTP_POOL_MAXSIZE,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+        ),
+        event_hooks={"request": [_count_request]},
+    )
+
+
+def get_http_session() -> requests.Session:
+    """Keep-alive requests.Session shared by all sync HTTP callers."""
+    return _get("http", _make_session)
+
+
+def get_async_http() -> httpx.AsyncClient:
+    """Keep-alive httpx.AsyncClient shared by all async HTTP callers."""
+    return _get("async_http", _make_async_http)
+
+
+def get_mongo_client() -> MongoClient:
+    return _get("mongo", lambda: MongoClient(MONGO_URI, maxPoolSize=MONGO_MAX_POOL_SIZE))
+
+
+def get_news_collection():
+    return get_mongo_client()[MONGO_DB][MONGO_COLLECTION]
+
+
+def get_anthropic() -> Anthropic:
+    return _get("anthropic", lambda: Anthropic(api_key=ANTHROPIC_API_KEY))
+
+
+def get_async_anthropic() -> AsyncAnthropic:
+    return _get("async_anthropic", lambda: AsyncAnthropic(api_key=ANTHROPIC_API_KEY))
+
+
+def connection_stats():
+    """How many requests went out vs. how many connections had to be opened."""
+    stats = {"clients": sorted(_clients)}
+
+    session = _clients.get("http")
+    if session is not None:
+        requests_sent = connections = 0
+        for adapter in set(session.adapters.values()):
+            for pool in adapter.poolmanager.pools._container.values():
+                requests_sent += pool.num_requests
+                connections += pool.num_connections
+        stats["http"] = {
+            "requests": requests_sent,
+            "connections_opened": connections,
+            "reused": max(0, requests_sent - connections),
+        }
+
+    async_http = _clients.get("async_http")
+    if async_http is not None:
+        pool = getattr(async_http._transport, "_pool", None)
+        stats["async_http"] = {
+            "requests": _async_requests,
+            "open_connections": len(getattr(pool, "connections", ())),
+        }
+
+    mongo = _clients.get("mongo")
+    if mongo is not None:
+        stats["mongo"] = {"max_pool_size": mongo.options.pool_options.max_pool_size}
+    return stats
+
+
+async def aclose():
+    """Close pooled connections (app shutdown)."""
+    async_http = _clients.pop("async_http", None)
+    if async_http is not None:
+        await async_http.aclose()
+    session = _clients.pop("http", None)
+    if session is not None:
+        session.close()
+    mongo = _clients.pop("mongo", None)
+    if mongo is not None:
+        mongo.close()
@@ -4,3 +4,77 @@ from dotenv import load_dotenv
 load_dotenv()
 
 ANTHROPIC_API_KEY = os.getenv("ANTHROPIC_API_KEY", "")
+
+# Embeddings
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "BAAI/bge-small-en-v1.5")
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")  # torch | onnx | onnx-int8 (onnxruntime, CPU)
+# Identity of the vectors we produce: embedding-cache keys, Mongo `embedding_model` tags and
+# .npy sidecar names. ONNX (and especially int8) vectors drift slightly from torch's, so they
+# get their own tag; torch keeps the bare model name so existing stored vectors stay valid.
+EMBEDDING_MODEL_TAG = EMBEDDING_MODEL if EMBEDDING_BACKEND == "torch" else f"{EMBEDDING_MODEL}@{EMBEDDING_BACKEND}"
+EMBEDDING_ONNX_DIR = os.getenv("EMBEDDING_ONNX_DIR", "cache/onnx")  # exported model + tokenizer
+EMBEDDING_THREADS = int(os.getenv("EMBEDDING_THREADS", "0"))  # intra-op threads, 0 = runtime default
+EMBEDDING_WARMUP = os.getenv("EMBEDDING_WARMUP", "1") == "1"  # load + encode once at startup
+EMBED_SERVICE_SOCKET = os.getenv("EMBED_SERVICE_SOCKET", "")  # Unix socket of backend.embed_service; "" = model in-process
+EMBED_SERVICE_WORKERS = int(os.getenv("EMBED_SERVICE_WORKERS", str(max(1, (os.cpu_count() or 2) // 2))))
+EMBEDDING_DIM = int(os.getenv("EMBEDDING_DIM", "384"))
+LEGACY_EMBEDDING_MODEL = "BAAI/bge-small-en-v1.5"  # model of stored vectors that predate the embedding_model field
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "50000"))
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "cache/embeddings.sqlite3")  # "" = memory only
+EMBED_MICROBATCH_WAIT_MS = float(os.getenv("EMBED_MICROBATCH_WAIT_MS", "5"))  # 0 = encode each call directly
+EMBED_MICROBATCH_MAX = int(os.getenv("EMBED_MICROBATCH_MAX", "32"))
+
+# Batch analysis / provider limits (requests per second, 0 = unlimited)
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "8"))
+PERPLEXITY_RPS = float(os.getenv("PERPLEXITY_RPS", "2"))
+ANTHROPIC_RPS = float(os.getenv("ANTHROPIC_RPS", "4"))
+
+# Provider response caches (seconds; 0 disables a stage)
+PERPLEXITY_CACHE_TTL = float(os.getenv("PERPLEXITY_CACHE_TTL", "300"))
+CLAUDE_CACHE_TTL = float(os.getenv("CLAUDE_CACHE_TTL", "300"))
+THREAT_CACHE_TTL = float(os.getenv("THREAT_CACHE_TTL", "300"))
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "1024"))
+
+# MongoDB
+MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017/")
+MONGO_DB = os.getenv("MONGO_DB", "insideX")
+MONGO_COLLECTION = os.getenv("MONGO_COLLECTION", "news")
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "50"))
+
+# Shared HTTP pools
+HTTP_POOL_CONNECTIONS = int(os.getenv("HTTP_POOL_CONNECTIONS", "10"))  # hosts kept in the pool
+HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "32"))          # keep-alive connections per host
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "60"))
+
+# Mongo write-behind queue
+MONGO_WRITE_BATCH = int(os.getenv("MONGO_WRITE_BATCH", "100"))
+MONGO_WRITE_INTERVAL_MS = float(os.getenv("MONGO_WRITE_INTERVAL_MS", "200"))
+MONGO_WRITE_MAX_PENDING = int(os.getenv("MONGO_WRITE_MAX_PENDING", "10000"))
+MONGO_WRITE_RETRIES = int(os.getenv("MONGO_WRITE_RETRIES", "5"))  # per failed batch, exponential backoff from 0.5s
+# Incremental preloads re-read this far behind their watermark: docs are timestamped when queued
+# but reach Mongo up to one write-behind flush later, possibly after another worker read past them
+PRELOAD_WATERMARK_LAG_MS = float(os.getenv("PRELOAD_WATERMARK_LAG_MS", str(max(5000.0, 10 * MONGO_WRITE_INTERVAL_MS))))
+NEWS_TTL_DAYS = int(os.getenv("NEWS_TTL_DAYS", "180"))  # 0 = keep analyses forever
+
+# Local vector index: "brute" (exact), "ivf" or "hnsw" (approximate, hnsw needs hnswlib),
+# "int8" / "float16" (quantized memory-mapped shards under VECTOR_INDEX_PATH, float32 re-rank)
+VECTOR_INDEX_BACKEND = os.getenv("VECTOR_INDEX_BACKEND", "brute")
+IVF_NLIST = int(os.getenv("IVF_NLIST", "256"))          # number of k-means lists
+IVF_NPROBE = int(os.getenv("IVF_NPROBE", "16"))         # lists scanned per query (recall vs latency)
+HNSW_M = int(os.getenv("HNSW_M", "16"))
+HNSW_EF_CONSTRUCTION = int(os.getenv("HNSW_EF_CONSTRUCTION", "200"))
+HNSW_EF_SEARCH = int(os.getenv("HNSW_EF_SEARCH", "64"))  # candidates per query (recall vs latency)
+VECTOR_RERANK_FACTOR = int(os.getenv("VECTOR_RERANK_FACTOR", "4"))  # quantized: re-rank k * this candidates
+VECTOR_INDEX_PATH = os.getenv("VECTOR_INDEX_PATH", "cache/vector_index")  # "" = don't persist
+
+# Price bars
+BAR_CACHE_DIR = os.getenv("BAR_CACHE_DIR", "cache/bars")  # memory-mapped 1-minute bars, one file per ticker
+PRICE_FETCHER = os.getenv("PRICE_FETCHER", "yfinance")    # "yfinance" or "file:<dir of TICKER.csv>"
+
+# Background watcher: poll bars for these tickers and analyze only the ones the detector flags
+WATCHLIST = [t.strip().upper() for t in os.getenv("WATCHLIST", "").split(",") if t.strip()]  # empty = off
+WATCH_INTERVAL = float(os.getenv("WATCH_INTERVAL", "60"))       # seconds between bar polls
+WATCH_COOLDOWN = float(os.getenv("WATCH_COOLDOWN", "900"))      # min seconds between analyses of one ticker
+WATCH_RETRY_BACKOFF = float(os.getenv("WATCH_RETRY_BACKOFF", "60"))  # wait before re-analyzing after a failed run
+WATCH_CONCURRENCY = int(os.getenv("WATCH_CONCURRENCY", "2"))    # analyses running at once
+WATCH_RESULT_TTL = float(os.getenv("WATCH_RESULT_TTL", "3600"))  # how long /analyze serves a stored report
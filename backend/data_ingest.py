@@ -1,16 +1,119 @@
-import yfinance as yf
-import requests
+# backend/data_ingest.py
+import csv
+import os
+import time
+from datetime import datetime, timezone
 
-def get_stock_price(ticker: str = "AAPL") -> float:
+import numpy as np
+
+from .bar_cache import BAR_DTYPE, BarCache, to_bars
+from .clients import get_http_session
+from .config import BAR_CACHE_DIR, PRICE_FETCHER
+
+
+MAX_1M_LOOKBACK_S = 7 * 86400  # Yahoo refuses 1-minute bars older than this
+
+
+class YFinanceFetcher:
+    """One multi-ticker yf.download() for the whole batch, starting at the oldest watermark."""
+
+    def fetch(self, tickers: list[str], since: dict) -> dict:
+        import pandas as pd
+        import yfinance as yf
+
+        known = [ts for ts in since.values() if ts is not None]
+        # One stale watermark must not push the whole batch past Yahoo's 1m window
+        start = max(min(known) + 60, time.time() - MAX_1M_LOOKBACK_S + 60) if known else None
+        kwargs = {"period": "1d"} if len(known) < len(tickers) else {
+            "start": datetime.fromtimestamp(start, tz=timezone.utc)
+        }
+        data = yf.download(
+            tickers, interval="1m", group_by="ticker", threads=True, progress=False, auto_adjust=False, **kwargs
+        )
+        out = {}
+        for ticker in tickers:
+            try:
+                # group_by="ticker" gives (ticker, field) columns, even for one ticker on recent yfinance
+                frame = data[ticker] if isinstance(data.columns, pd.MultiIndex) else data
+                frame = frame.dropna(subset=["Close"])
+            except KeyError:
+                continue
+            ts = frame.index.asi8 // 1_000_000_000  # DatetimeIndex stores UTC nanoseconds
+            out[ticker] = to_bars(zip(ts, frame["Open"], frame["High"], frame["Low"], frame["Close"], frame["Volume"]))
+        return out
+
+
+class FileFetcher:
+    """
+    Offline stand-in: reads `{ticker}.csv` (ts,open,high,low,close,volume) from a directory.
+    Used by tests and for replaying recorded sessions.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.calls = 0
+
+    def fetch(self, tickers: list[str], since: dict) -> dict:
+        self.calls += 1
+        out = {}
+        for ticker in tickers:
+            path = os.path.join(self.directory, f"{ticker}.csv")
+            if not os.path.exists(path):
+                continue
+            with open(path, newline="") as f:
+                bars = to_bars((int(r["ts"]), r["open"], r["high"], r["low"], r["close"], r["volume"]) for r in csv.DictReader(f))
+            if since.get(ticker) is not None:
+                bars = bars[bars["ts"] > since[ticker]]
+            out[ticker] = bars
+        return out
+
+
+def _make_fetcher(spec: str):
+    if spec.startswith("file:"):
+        return FileFetcher(spec[len("file:"):])
+    return YFinanceFetcher()
+
+
+fetcher = _make_fetcher(PRICE_FETCHER)
+_bar_cache = None
+
+
+def set_fetcher(new_fetcher):
+    """Swap the price source (anything with fetch(tickers, since) -> {ticker: bars})."""
+    global fetcher
+    fetcher = new_fetcher
+
+
+def get_bar_cache() -> BarCache:
+    global _bar_cache
+    if _bar_cache is None:
+        _bar_cache = BarCache(BAR_CACHE_DIR)
+    return _bar_cache
+
+
+def refresh_bars(tickers: list[str]) -> dict:
+    """Fetch only bars newer than each ticker's cached watermark, in one batch call; returns new bar counts."""
+    cache = get_bar_cache()
+    tickers = list(dict.fromkeys(tickers))
+    since = {ticker: cache.watermark(ticker) for ticker in tickers}
     try:
-        stock = yf.Ticker(ticker)
-        data = stock.history(period="1d", interval="1m")
-        if data.empty:
-            return None
-        return float(data.tail(1)['Close'].iloc[0])
+        fetched = fetcher.fetch(tickers, since)
     except Exception as e:
-        print(f"[ERROR] get_stock_price failed: {e}")
-        return None
+        print(f"[ERROR] refresh_bars failed: {e}")
+        return {ticker: 0 for ticker in tickers}
+    return {ticker: cache.append(ticker, fetched.get(ticker, np.zeros(0, BAR_DTYPE))) for ticker in tickers}
+
+
+def get_stock_prices(tickers: list[str], refresh: bool = True) -> dict:
+    """Latest close for many tickers (None when unknown), from one incremental batch fetch."""
+    if refresh:
+        refresh_bars(tickers)
+    cache = get_bar_cache()
+    return {ticker: cache.last_close(ticker) for ticker in tickers}
+
+
+def get_stock_price(ticker: str = "AAPL") -> float:
+    return get_stock_prices([ticker])[ticker]
 
 
 
@@ -21,7 +124,7 @@ def fetch_news(query: str = "AAPL") -> list:
     """
     url = f"https://query1.finance.yahoo.com/v1/finance/search?q={query}"
     try:
-        response = requests.get(url, timeout=60)
+        response = get_http_session().get(url, timeout=60)
         response.raise_for_status()
         data = response.json()
         news_items = data.get("news", [])
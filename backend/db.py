@@ -1,33 +1,116 @@
-import os
-from dotenv import load_dotenv
-from pymongo import MongoClient
 from datetime import datetime
+from typing import TypedDict
 
-load_dotenv()
+import numpy as np
+from bson.binary import Binary
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import OperationFailure
 
-MONGO_URI = os.getenv("MONGO_URI")  # e.g. mongodb://localhost:27017
-DB_NAME = os.getenv("MONGO_DB", "insideX")
-COLLECTION_NAME = os.getenv("MONGO_COLLECTION", "news")
+from .clients import get_news_collection
+from .config import NEWS_TTL_DAYS
+from .write_behind import news_writer
 
-client = MongoClient(MONGO_URI)
-db = client[DB_NAME]
-collection = db[COLLECTION_NAME]
+
+class NewsText(TypedDict, total=False):
+    _id: object
+    stock: str
+    analysis: str
+    source: str
+    timestamp: datetime
+
+
+class NewsVector(NewsText, total=False):
+    embedding: bytes  # packed float32 (see pack_vector); older docs hold a list of floats
+    embedding_model: str
+
+
+# Projections: never ship the 384-float embedding unless the caller needs it
+TEXT_FIELDS = {"_id": 1, "stock": 1, "analysis": 1, "source": 1, "timestamp": 1}
+VECTOR_FIELDS = {**TEXT_FIELDS, "embedding": 1, "embedding_model": 1}
+
+
+def pack_vector(vector) -> Binary:
+    """Embedding -> little-endian float32 bytes (~1.5 KB of BSON instead of ~4.6 KB as a double array)."""
+    return Binary(np.asarray(vector, dtype="<f4").tobytes())
+
+
+def unpack_vector(value):
+    """Stored embedding (packed bytes or legacy list) -> list of floats, or None."""
+    if isinstance(value, (bytes, Binary)):
+        return np.frombuffer(value, dtype="<f4").tolist()
+    if isinstance(value, list):
+        return value
+    return None
+
+
+def ensure_indexes():
+    """Create the (stock, timestamp desc) index and the TTL index for old analyses."""
+    collection = get_news_collection()
+    try:
+        collection.create_index([("stock", ASCENDING), ("timestamp", DESCENDING)], name="stock_timestamp")
+        if NEWS_TTL_DAYS > 0:
+            ttl = NEWS_TTL_DAYS * 86400
+            try:
+                collection.create_index("timestamp", name="timestamp_ttl", expireAfterSeconds=ttl)
+            except OperationFailure:
+                # TTL changed since the index was built: update it in place
+                collection.database.command(
+                    "collMod", collection.name, index={"name": "timestamp_ttl", "expireAfterSeconds": ttl}
+                )
+        print("✅ Mongo indexes ready")
+    except Exception as e:
+        print(f"⚠️ Could not ensure Mongo indexes: {e}")
 
 
 def save_news(stock: str, analysis: str, source: str = "perplexity"):
-    """Store raw news in MongoDB with timestamp."""
+    """Store raw news in MongoDB with timestamp (queued, written in batches)."""
     doc = {
         "stock": stock,
         "analysis": analysis,
         "source": source,
         "timestamp": datetime.utcnow()
     }
-    collection.insert_one(doc)
+    news_writer.put(doc)
     return doc
 
 
-def get_news(stock: str, limit: int = 5):
-    """Retrieve latest news from MongoDB for a stock."""
+def _since(stock: str, since=None) -> dict:
+    query = {"stock": stock}
+    if since is not None:
+        query["timestamp"] = {"$gte": since}  # >= so docs sharing the watermark timestamp aren't lost
+    return query
+
+
+def _latest(query: dict, limit: int, fields: dict):
     return list(
-        collection.find({"stock": stock}).sort("timestamp", -1).limit(limit)
+        get_news_collection().find(query, fields).sort("timestamp", DESCENDING).limit(limit)
     )
+
+
+def get_news(stock: str, limit: int = 5) -> list[NewsText]:
+    """Retrieve latest news text (no embeddings) from MongoDB for a stock."""
+    return _latest(_since(stock), limit, TEXT_FIELDS)
+
+
+def get_news_vectors(stock: str, limit: int = 20, since: datetime = None) -> list[NewsVector]:
+    """
+    News for a stock with stored embeddings, for index preloads. Without `since`:
+    the latest `limit` docs. With a `since` watermark: every doc at/after it, oldest
+    first, fetched in batches of `limit` (a newest-first limit would skip whatever
+    lies between the watermark and the limit-th newest doc).
+    """
+    if since is None:
+        return _latest(_since(stock), limit, VECTOR_FIELDS)
+    cursor = get_news_collection().find(_since(stock, since), VECTOR_FIELDS).sort("timestamp", ASCENDING)
+    return list(cursor.batch_size(max(1, limit)))
+
+
+def get_news_vectors_many(stocks: list[str], limit: int = 20, since: dict = None) -> list[NewsVector]:
+    """
+    get_news_vectors for each of several stocks.
+    `since` maps stock -> timestamp watermark.
+    One index-bounded find().limit() per stock: a $group over all matches would
+    buffer each stock's whole history (embeddings included) before trimming it.
+    """
+    since = since or {}
+    return [doc for stock in stocks for doc in get_news_vectors(stock, limit=limit, since=since.get(stock))]
@@ -0,0 +1,221 @@
+# backend/embed_service.py
+# Embedding sidecar: one set of model processes per host instead of one model
+# per Uvicorn worker. The server pre-forks `workers` processes that each load
+# the model once and accept on a shared Unix socket (the kernel spreads
+# connections across them). Clients send texts as a small JSON frame; vectors
+# come back through a shared-memory buffer owned by the client connection, so
+# no float ever goes through the socket.
+#   python -m backend.embed_service --socket /tmp/insidex-embed.sock --workers 4
+import argparse
+import json
+import multiprocessing
+import os
+import socket
+import struct
+import threading
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+from .config import EMBED_SERVICE_SOCKET, EMBED_SERVICE_WORKERS, EMBEDDING_DIM
+
+_HEADER = struct.Struct("!I")
+
+
+def _send(conn, payload: dict):
+    data = json.dumps(payload).encode("utf-8")
+    conn.sendall(_HEADER.pack(len(data)) + data)
+
+
+def _recv(conn):
+    header = _recv_exact(conn, _HEADER.size)
+    if header is None:
+        return None
+    (length,) = _HEADER.unpack(header)
+    return json.loads(_recv_exact(conn, length))
+
+
+def _recv_exact(conn, size: int):
+    chunks = []
+    while size:
+        chunk = conn.recv(size)
+        if not chunk:
+            return None
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+def _attach(name: str):
+    shm = shared_memory.SharedMemory(name=name)
+    # The client owns the segment; don't let this process's tracker unlink it on exit
+    resource_tracker.unregister(shm._name, "shared_memory")
+    return shm
+
+
+# ------------------ Server ------------------
+def _default_encoder():
+    from .embeddings import load_local_model
+
+    model = load_local_model()  # never get_model(): with EMBED_SERVICE_SOCKET set that would be a client to ourselves
+    return lambda texts: model.encode(texts, convert_to_numpy=True)
+
+
+def _handle(conn, encode):
+    buffers = {}
+    try:
+        while True:
+            request = _recv(conn)
+            if request is None:
+                return
+            if request.get("ping"):
+                _send(conn, {"ok": True, "pid": os.getpid()})
+                continue
+            try:
+                vectors = np.asarray(encode(request["texts"]), dtype=np.float32)
+                name = request["shm"]
+                if name not in buffers:
+                    for old in buffers.values():
+                        old.close()
+                    buffers = {name: _attach(name)}
+                out = np.ndarray(vectors.shape, dtype=np.float32, buffer=buffers[name].buf)
+                out[:] = vectors
+                _send(conn, {"ok": True, "shape": list(vectors.shape)})
+            except Exception as e:
+                _send(conn, {"ok": False, "error": str(e)})
+    finally:
+        for shm in buffers.values():
+            shm.close()
+        conn.close()
+
+
+def _worker(server, encoder_factory):
+    encode = encoder_factory()
+    while True:
+        conn, _ = server.accept()
+        # One thread per connection; the model call itself releases the GIL
+        threading.Thread(target=_handle, args=(conn, encode), daemon=True).start()
+
+
+def serve(path: str = EMBED_SERVICE_SOCKET, workers: int = EMBED_SERVICE_WORKERS, encoder_factory=_default_encoder):
+    """Bind the socket and pre-fork `workers` model processes; returns them (call .join() to block)."""
+    if os.path.exists(path):
+        os.unlink(path)
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(path)
+    server.listen(128)
+    context = multiprocessing.get_context("fork")  # children inherit the listening socket
+    processes = [
+        context.Process(target=_worker, args=(server, encoder_factory), name=f"embed-worker-{i}", daemon=True)
+        for i in range(max(1, workers))
+    ]
+    for process in processes:
+        process.start()
+    server.close()
+    print(f"✅ Embedding service on {path} with {len(processes)} workers")
+    return processes
+
+
+# ------------------ Client ------------------
+class EmbedClient:
+    """
+    Thread-safe client: each thread keeps its own connection and its own
+    shared-memory output buffer (grown on demand, reused across calls).
+    """
+
+    def __init__(self, path: str = EMBED_SERVICE_SOCKET, dim: int = EMBEDDING_DIM, timeout: float = 60.0):
+        self.path = path
+        self.dim = dim
+        self.timeout = timeout
+        self._local = threading.local()
+        self._buffers = []
+        self._conns = []
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.texts = 0
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            conn.settimeout(self.timeout)
+            conn.connect(self.path)
+            self._local.conn = conn
+            with self._lock:
+                self._conns.append(conn)
+        return conn
+
+    def _buffer(self, rows: int):
+        shm = getattr(self._local, "shm", None)
+        needed = max(rows, 1) * self.dim * 4
+        if shm is None or shm.size < needed:
+            if shm is not None:
+                self._release(shm)
+            shm = shared_memory.SharedMemory(create=True, size=max(needed, 64 * self.dim * 4))
+            self._local.shm = shm
+            with self._lock:
+                self._buffers.append(shm)
+        return shm
+
+    def _release(self, shm):
+        with self._lock:
+            if shm in self._buffers:
+                self._buffers.remove(shm)
+        shm.close()
+        shm.unlink()
+
+    def _call(self, payload):
+        try:
+            conn = self._connection()
+            _send(conn, payload)
+            reply = _recv(conn)
+        except OSError:
+            self._local.conn = None
+            raise
+        if reply is None:
+            self._local.conn = None
+            raise ConnectionError("Embedding service closed the connection")
+        if not reply.get("ok"):
+            raise RuntimeError(f"Embedding service error: {reply.get('error')}")
+        return reply
+
+    def ping(self):
+        return self._call({"ping": True})
+
+    def encode(self, texts, convert_to_numpy: bool = True):
+        """Same contract as SentenceTransformer.encode(): float32 rows, one per text."""
+        texts = list(texts)
+        if not texts:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        shm = self._buffer(len(texts))
+        reply = self._call({"texts": texts, "shm": shm.name})
+        self.calls += 1
+        self.texts += len(texts)
+        return np.ndarray(tuple(reply["shape"]), dtype=np.float32, buffer=shm.buf).copy()
+
+    def close(self):
+        with self._lock:
+            conns, self._conns = self._conns, []
+            buffers, self._buffers = self._buffers, []
+        for conn in conns:
+            conn.close()
+        self._local = threading.local()
+        for shm in buffers:
+            shm.close()
+            shm.unlink()
+
+    def stats(self):
+        return {"socket": self.path, "calls": self.calls, "texts": self.texts}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the shared embedding service")
+    parser.add_argument("--socket", default=EMBED_SERVICE_SOCKET or "/tmp/insidex-embed.sock")
+    parser.add_argument("--workers", type=int, default=EMBED_SERVICE_WORKERS)
+    args = parser.parse_args()
+    for process in serve(args.socket, args.workers):
+        process.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+# backend/embedding_cache.py
+import hashlib
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+class EmbeddingCache:
+    """
+    In-memory LRU of embeddings keyed by model name + text hash,
+    optionally backed by SQLite so vectors survive restarts.
+    """
+
+    def __init__(self, model_name: str, max_items: int = 50_000, path: str = None):
+        self.model_name = model_name
+        self.max_items = max_items
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self.path = path
+        self._db = None  # opened on first use so importing the module touches no files
+
+    def _connect(self):
+        """SQLite handle, or None when the cache is memory-only or the file can't be opened."""
+        if self._db is None and self.path:
+            try:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                db = sqlite3.connect(self.path, check_same_thread=False)
+                db.execute(
+                    "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)"
+                )
+                db.commit()
+                self._db = db
+            except (OSError, sqlite3.Error) as e:
+                print(f"⚠️ Embedding cache at {self.path} unavailable, keeping it in memory: {e}")
+                self.path = None
+        return self._db
+
+    def key(self, text: str) -> str:
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        return f"{self.model_name}:{digest}"
+
+    def _remember(self, key, vector):
+        self._items[key] = vector
+        self._items.move_to_end(key)
+        while len(self._items) > self.max_items:
+            self._items.popitem(last=False)
+
+    def _load(self, key):
+        db = self._connect()
+        if db is None:
+            return None
+        row = db.execute("SELECT vector FROM embeddings WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        return np.frombuffer(row[0], dtype=np.float32)
+
+    def get(self, text: str):
+        """Return the cached vector (float32 array) or None."""
+        key = self.key(text)
+        with self._lock:
+            vector = self._items.get(key)
+            if vector is not None:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return vector
+            vector = self._load(key)
+            if vector is not None:
+                self._remember(key, vector)
+                self.hits += 1
+                self.disk_hits += 1
+                return vector
+            self.misses += 1
+            return None
+
+    def put(self, text: str, vector):
+        self.put_many([text], [vector])
+
+    def put_many(self, texts, vectors):
+        rows = []
+        with self._lock:
+            for text, vector in zip(texts, vectors):
+                key = self.key(text)
+                vector = np.asarray(vector, dtype=np.float32)
+                self._remember(key, vector)
+                rows.append((key, vector.tobytes()))
+            db = self._connect() if rows else None
+            if db is not None:
+                db.executemany(
+                    "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)", rows
+                )
+                db.commit()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "model": self.model_name,
+            "hits": self.hits,
+            "misses": self.misses,
+            "disk_hits": self.disk_hits,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "size": len(self._items),
+            "persistent": bool(self.path),
+        }
@@ -1,8 +1,108 @@
-from sentence_transformers import SentenceTransformer
+# backend/embeddings.py
+import threading
+import time
 
-# Load once globally
-embedding_model = SentenceTransformer("BAAI/bge-small-en-v1.5")
+from .config import (
+    EMBEDDING_MODEL, EMBEDDING_MODEL_TAG, EMBEDDING_BACKEND, EMBEDDING_THREADS, EMBED_SERVICE_SOCKET, EMBEDDING_CACHE_SIZE, EMBEDDING_CACHE_PATH,
+    EMBED_MICROBATCH_WAIT_MS, EMBED_MICROBATCH_MAX,
+)
+from .embedding_cache import EmbeddingCache
+from .microbatch import MicroBatcher
+
+# Loaded once, on first use (or by the app's startup hook), not at import
+embedding_model = None
+_model_lock = threading.Lock()
+timings = {"model_load_s": None, "warmup_s": None}
+
+embedding_cache = EmbeddingCache(EMBEDDING_MODEL_TAG, max_items=EMBEDDING_CACHE_SIZE, path=EMBEDDING_CACHE_PATH)
+
+def _load_model():
+    if EMBED_SERVICE_SOCKET:
+        # The model lives in the shared embedding service; this process only holds a client
+        from .embed_service import EmbedClient
+
+        client = EmbedClient(EMBED_SERVICE_SOCKET)
+        client.ping()
+        return client
+    return load_local_model()
+
+def load_local_model():
+    """The configured in-process model (also what the embedding service's workers run)"""
+    if EMBEDDING_BACKEND in ("onnx", "onnx-int8"):
+        from .onnx_embedder import OnnxEmbedder
+
+        return OnnxEmbedder(quantized=EMBEDDING_BACKEND == "onnx-int8", threads=EMBEDDING_THREADS)
+
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    if EMBEDDING_THREADS > 0:
+        torch.set_num_threads(EMBEDDING_THREADS)
+    return SentenceTransformer(EMBEDDING_MODEL)
+
+def get_model():
+    """Load the embedding model (SentenceTransformer or ONNX) once per process (thread-safe)"""
+    global embedding_model
+    if embedding_model is None:
+        with _model_lock:
+            if embedding_model is None:
+                start = time.perf_counter()
+                embedding_model = _load_model()
+                timings["model_load_s"] = round(time.perf_counter() - start, 3)
+                where = f"service {EMBED_SERVICE_SOCKET}" if EMBED_SERVICE_SOCKET else EMBEDDING_BACKEND
+                print(f"✅ Loaded {EMBEDDING_MODEL} ({where}) in {timings['model_load_s']}s")
+    return embedding_model
+
+def is_loaded() -> bool:
+    return embedding_model is not None
+
+def warmup():
+    """Load the model and run one encode so the first request doesn't pay for lazy init"""
+    get_model()
+    start = time.perf_counter()
+    _encode(["warmup: AAPL unusual volume spike"])
+    timings["warmup_s"] = round(time.perf_counter() - start, 3)
+    return timings
+
+def _encode(texts: list[str]):
+    """Run the model on a batch of texts; returns float32 rows"""
+    return get_model().encode(list(texts), convert_to_numpy=True)
+
+# Concurrent single-text calls are coalesced into one encode batch
+_batcher = MicroBatcher(_encode, max_batch=EMBED_MICROBATCH_MAX, max_wait_ms=EMBED_MICROBATCH_WAIT_MS)
 
 def embed_text(text: str):
-    """Return dense vector for given text"""
-    return embedding_model.encode(text, convert_to_numpy=True).tolist()
+    """Return dense vector for given text (served from cache when seen before)"""
+    cached = embedding_cache.get(text)
+    if cached is not None:
+        return cached.tolist()
+    if EMBED_MICROBATCH_WAIT_MS > 0:
+        vector = _batcher.submit(text)
+    else:
+        vector = _encode([text])[0]
+    embedding_cache.put(text, vector)
+    return vector.tolist()
+
+def embed_batch(texts: list[str]):
+    """Return dense vectors for many texts; only cache misses go through one encode batch"""
+    if not texts:
+        return []
+    vectors = [embedding_cache.get(t) for t in texts]
+    missing = list(dict.fromkeys(t for t, v in zip(texts, vectors) if v is None))
+    if missing:
+        encoded = dict(zip(missing, _encode(missing)))
+        embedding_cache.put_many(missing, encoded.values())
+        vectors = [v if v is not None else encoded[t] for t, v in zip(texts, vectors)]
+    return [v.tolist() for v in vectors]
+
+def close():
+    """Release the embedding service connection and its shared-memory buffers (app shutdown)"""
+    if EMBED_SERVICE_SOCKET and embedding_model is not None:
+        embedding_model.close()
+
+def cache_stats():
+    """Hit/miss counters for the embedding cache, plus micro-batching counters"""
+    stats = {**embedding_cache.stats(), "microbatch": _batcher.stats()}
+    if EMBED_SERVICE_SOCKET and embedding_model is not None:
+        stats["service"] = embedding_model.stats()
+    return stats
@@ -0,0 +1,43 @@
+# backend/limits.py
+import asyncio
+import time
+
+from .config import PERPLEXITY_RPS, ANTHROPIC_RPS
+
+
+class AsyncRateLimiter:
+    """Token bucket: at most `rate` acquisitions per second, bursting up to `burst`."""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        if self.rate <= 0:  # unlimited
+            return
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+# Per-provider limits shared by every async call in this worker
+provider_limits = {
+    "perplexity": AsyncRateLimiter(PERPLEXITY_RPS, burst=max(1, int(PERPLEXITY_RPS))),
+    "anthropic": AsyncRateLimiter(ANTHROPIC_RPS, burst=max(1, int(ANTHROPIC_RPS))),
+}
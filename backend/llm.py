@@ -1,27 +1,39 @@
+# backend/llm.py
+import asyncio
 import os
+from contextlib import aclosing
+import httpx
 import requests
 from dotenv import load_dotenv
-from anthropic import Anthropic
-from .vector_store import add_document, search, preload_from_mongo
-from .db import save_news, get_news
-from .threat_model import evaluate_threat
-from .vector_store import add_document, store_full_doc
-from .vector_store import add_document, search, store_full_doc, preload_from_local
-# ✅ Pathway vector store
-from .vector_store import add_document, search  
+from .clients import get_anthropic, get_async_anthropic, get_http_session, get_async_http
+
+# Pathway memory + helper functions
+from .vector_store import add_document, store_full_doc, search, search_many, preload_from_mongo, preload_many_from_mongo
+from .vector_index import Filter
+
+# Threat model that returns {"score": int, "reason": str}
+from .threat_model import evaluate_threat, evaluate_threat_async
+from .limits import provider_limits
+from .config import BATCH_CONCURRENCY, PERPLEXITY_CACHE_TTL, CLAUDE_CACHE_TTL, RESPONSE_CACHE_SIZE
+from .response_cache import ResponseCache
 
 load_dotenv()
 
-# Load API keys
+# Load API keys & URLs
 ANTHROPIC_API_KEY = os.getenv("ANTHROPIC_API_KEY")
 PERPLEXITY_API_KEY = os.getenv("perplexity_api")
 PERPLEXITY_API_URL = os.getenv("perplexity_url")  # e.g. https://api.perplexity.ai/chat/completions
 
-anthropic_client = Anthropic(api_key=ANTHROPIC_API_KEY)
+CLAUDE_MODEL = "claude-3-5-sonnet-20240620"
 
 
-def analyze_with_perplexity(stock: str, query: str, timeout: int = 90):
-    """Query Perplexity API for anomaly-related stock info (short + source links)."""
+# Identical calls within the TTL are answered from cache (single-flight on misses)
+perplexity_cache = ResponseCache("perplexity", ttl=PERPLEXITY_CACHE_TTL, max_items=RESPONSE_CACHE_SIZE)
+claude_cache = ResponseCache("claude", ttl=CLAUDE_CACHE_TTL, max_items=RESPONSE_CACHE_SIZE)
+
+
+# ------------------ Prompt builders (shared by sync + async paths) ------------------
+def _perplexity_request(query: str):
     headers = {
         "Authorization": f"Bearer {PERPLEXITY_API_KEY}",
         "Content-Type": "application/json"
@@ -41,125 +53,104 @@ def analyze_with_perplexity(stock: str, query: str, timeout: int = 90):
             {"role": "user", "content": query},
         ]
     }
+    return headers, data
+
 
+def _store_perplexity_result(stock: str, result: dict, analysis: str):
+    # ✅ Save full raw Perplexity response locally
     try:
-        response = requests.post(
-            PERPLEXITY_API_URL,
-            headers=headers,
-            json=data,
-            timeout=timeout
-        )
-        response.raise_for_status()
-        result = response.json()
-        analysis = result["choices"][0]["message"]["content"]
+        store_full_doc(stock, result)   # <- new function in vector_store.py
+    except Exception as e:
+        print(f"⚠️ Failed to save raw doc locally: {e}")
 
-        # ✅ Store into Pathway memory
+    # ✅ Store into Pathway memory + Mongo
+    try:
         add_document(stock, analysis)
+    except Exception as e:
+        print(f"⚠️ Failed to add doc to Pathway/Mongo: {e}")
 
-        # ✅ Store full raw JSON locally
-        try:
-            from .vector_store import store_full_doc
-            store_full_doc(stock, result)
-        except Exception as e:
-            print(f"⚠️ Failed to save local JSON doc: {e}")
 
-        # ✅ Store into MongoDB
-        try:
-            from .db import save_news  # helper function we’ll define
-            save_news(stock, analysis, result)
-        except Exception as e:
-            print(f"⚠️ Failed to save to MongoDB: {e}")
+def _claude_request(stock: str, analysis: str, neighbors: list):
+    context = "\n".join(str(n) for n in neighbors)
 
-        return analysis
+    query = f"""
+Stock: {stock}
+Perplexity Analysis: {analysis}
+Pathway Context (memory): {context}
 
-    except (requests.exceptions.Timeout, requests.exceptions.ReadTimeout):
-        print("⚠️ Perplexity request timed out. Falling back to Claude.")
-        return None
-    except requests.exceptions.RequestException as e:
-        print(f"❌ Perplexity API request failed: {e}")
-        return None
-    except Exception as e:
-        print(f"❌ Unexpected error with Perplexity: {e}")
-        return None
+Return exactly 5 bullet points.
+Each bullet = one anomaly/problem (or state 'No anomaly found').
+Each must include a credible source link.
+Do not add extra explanation outside the bullet list.
+"""
+    return dict(
+        model=CLAUDE_MODEL,
+        max_tokens=400,
+        temperature=0.2,
+        system="You are an anomaly detector for stock news. Always return 5 bullet points with sources.",
+        messages=[{"role": "user", "content": query}]
+    )
 
 
-def analyze_with_claude(stock: str, analysis: str = ""):
-    """Claude refines analysis using Pathway context + Perplexity result."""
-    # ✅ Retrieve relevant context from Pathway
-    neighbors = search(stock, k=5)
-    context = "\n".join(str(n) for n in neighbors)
+def _followup_request(stock: str, user_question: str, previous_report: dict, neighbors: list):
+    memory_context = "\n".join(str(n) for n in neighbors)
+
+    # If previous report not passed, build a minimal one
+    previous_report = previous_report or {}
 
+    # Build the query prompt
     query = f"""
-    Stock: {stock}
-    Perplexity Analysis: {analysis}
-    Pathway Context (memory): {context}
-
-    Return exactly 5 bullet points. 
-    Each bullet = one anomaly/problem (or state 'No anomaly found'). 
-    Each must include a credible source link. 
-    Do not add extra explanation outside the bullet list.
-    """
+Stock: {stock}
 
-    try:
-        response = anthropic_client.messages.create(
-            model="claude-3-5-sonnet-20240620",
-            max_tokens=400,
-            temperature=0.2,
-            system="You are an anomaly detector for stock news. Always return 5 bullet points with sources.",
-            messages=[{"role": "user", "content": query}]
-        )
-        return response.content[0].text
-    except Exception as e:
-        print(f"❌ Claude API request failed: {e}")
-        return "Error: Could not analyze query."
+Previous analysis:
+- Perplexity: {previous_report.get("perplexity_analysis")}
+- Final Report: {previous_report.get("final_report")}
+- Threat Score: {previous_report.get("threat_score")}
+- Threat Reason: {previous_report.get("threat_reason")}
 
+Memory Context from Pathway:
+{memory_context}
 
-# backend/llm.py
-import os
-import requests
-from dotenv import load_dotenv
-from anthropic import Anthropic
+User Question: {user_question}
 
-# Pathway memory + helper functions
-from .vector_store import add_document, search, preload_from_mongo
+Answer clearly and concisely. 
+If it's about market metrics (like all-time high), answer directly.
+If it's anomaly-related, use the provided context and cite sources if possible.
+"""
+    return dict(
+        model=CLAUDE_MODEL,
+        max_tokens=400,
+        temperature=0.3,
+        system="You are a financial assistant. Always answer clearly and concisely with context if available.",
+        messages=[{"role": "user", "content": query}]
+    )
 
-# Threat model that returns {"score": int, "reason": str}
-from .threat_model import evaluate_threat
 
-load_dotenv()
+def _safe_search(query: str, k: int = 5, stock: str = None):
+    try:
+        return search(query, k=k, stock=stock)
+    except Exception:
+        return []
 
-# Load API keys & URLs
-ANTHROPIC_API_KEY = os.getenv("ANTHROPIC_API_KEY")
-PERPLEXITY_API_KEY = os.getenv("perplexity_api")
-PERPLEXITY_API_URL = os.getenv("perplexity_url")  # e.g. https://api.perplexity.ai/chat/completions
 
-anthropic_client = Anthropic(api_key=ANTHROPIC_API_KEY)
+def _is_answer(text):
+    return bool(text) and not text.startswith("Error:")
 
 
-def analyze_with_perplexity(stock: str, query: str, timeout: int = 90):
-    """Query Perplexity API for anomaly-related stock info (short + source links)."""
-    headers = {
-        "Authorization": f"Bearer {PERPLEXITY_API_KEY}",
-        "Content-Type": "application/json"
-    }
-    data = {
-        "model": "sonar-reasoning-pro",
-        "messages": [
-            {
-                "role": "system",
-                "content": (
-                    "You are a financial anomaly detector. "
-                    "State clearly if anomalies/problems exist or not. "
-                    "Be concise, provide links to credible sources. "
-                    "Return facts, not long explanations."
-                ),
-            },
-            {"role": "user", "content": query},
-        ]
+def _report(stock, analysis, final_report, threat_result):
+    return {
+        "stock": stock,
+        "perplexity_analysis": analysis,
+        "final_report": final_report,
+        "threat_score": threat_result.get("score"),
+        "threat_reason": threat_result.get("reason"),
     }
 
+
+# ------------------ Sync workflow ------------------
+def _call_perplexity(stock: str, headers: dict, data: dict, timeout: int):
     try:
-        response = requests.post(
+        response = get_http_session().post(
             PERPLEXITY_API_URL,
             headers=headers,
             json=data,
@@ -170,19 +161,7 @@ def analyze_with_perplexity(stock: str, query: str, timeout: int = 90):
 
         # ✅ Extract short analysis text
         analysis = result["choices"][0]["message"]["content"]
-
-        # ✅ Save full raw Perplexity response locally
-        try:
-            store_full_doc(stock, result)   # <- new function in vector_store.py
-        except Exception as e:
-            print(f"⚠️ Failed to save raw doc locally: {e}")
-
-        # ✅ Store into Pathway memory + Mongo
-        try:
-            add_document(stock, analysis)
-        except Exception as e:
-            print(f"⚠️ Failed to add doc to Pathway/Mongo: {e}")
-
+        _store_perplexity_result(stock, result, analysis)
         return analysis
 
     except (requests.exceptions.Timeout, requests.exceptions.ReadTimeout):
@@ -196,36 +175,31 @@ def analyze_with_perplexity(stock: str, query: str, timeout: int = 90):
         return None
 
 
+def analyze_with_perplexity(stock: str, query: str, timeout: int = 90):
+    """Query Perplexity API for anomaly-related stock info (short + source links)."""
+    headers, data = _perplexity_request(query)
+    return perplexity_cache.get_or_call(
+        perplexity_cache.key(data),
+        lambda: _call_perplexity(stock, headers, data, timeout),
+    )
+
 
-def analyze_with_claude(stock: str, analysis: str = ""):
-    """Claude refines analysis using Pathway context + Perplexity result."""
+def analyze_with_claude(stock: str, analysis: str = "", neighbors: list = None):
+    """
+    Claude refines analysis using Pathway context + Perplexity result.
+    Pass `neighbors` (e.g. from search_many) to skip the per-call search.
+    """
     # Retrieve relevant context from Pathway (safe if search fails)
-    try:
-        neighbors = search(stock, k=5)
-    except Exception:
-        neighbors = []
-
-    context = "\n".join(str(n) for n in neighbors)
+    if neighbors is None:
+        neighbors = _safe_search(stock, stock=stock)
 
-    query = f"""
-Stock: {stock}
-Perplexity Analysis: {analysis}
-Pathway Context (memory): {context}
+    request = _claude_request(stock, analysis, neighbors)
+    return claude_cache.get_or_call(claude_cache.key(request), lambda: _call_claude(request), cacheable=_is_answer)
 
-Return exactly 5 bullet points.
-Each bullet = one anomaly/problem (or state 'No anomaly found').
-Each must include a credible source link.
-Do not add extra explanation outside the bullet list.
-"""
 
+def _call_claude(request: dict):
     try:
-        response = anthropic_client.messages.create(
-            model="claude-3-5-sonnet-20240620",
-            max_tokens=400,
-            temperature=0.2,
-            system="You are an anomaly detector for stock news. Always return 5 bullet points with sources.",
-            messages=[{"role": "user", "content": query}]
-        )
+        response = get_anthropic().messages.create(**request)
         # response.content[0].text is the assistant output
         return response.content[0].text
     except Exception as e:
@@ -233,6 +207,13 @@ Do not add extra explanation outside the bullet list.
         return "Error: Could not analyze query."
 
 
+def _threat_or_error(evaluate, *args, **kwargs):
+    try:
+        return evaluate(*args, **kwargs)
+    except Exception as e:
+        return {"score": None, "reason": f"Error computing threat: {e}"}
+
+
 def analyze_stock(stock: str):
     """
     Main entry: Try Perplexity first → always refine with Claude + Pathway context,
@@ -254,67 +235,282 @@ def analyze_stock(stock: str):
     final_report = analyze_with_claude(stock, analysis or "")
 
     # Step 3: Threat scoring (returns {"score": int, "reason": str} or error structure)
+    threat_result = _threat_or_error(evaluate_threat, stock, final_report)
+    return _report(stock, analysis, final_report, threat_result)
+
+
+def analyze_stocks(stocks: list[str]):
+    """
+    Watchlist variant of analyze_stock: same steps, but the Pathway retrievals
+    for all tickers are batched into one search_many pass per stage.
+    Returns a list of analyze_stock-shaped dicts in input order.
+    """
+    for stock in stocks:
+        try:
+            preload_from_mongo(stock, limit=20)
+        except Exception:
+            pass
+
+    analyses = [
+        analyze_with_perplexity(stock, f"latest news and anomalies about {stock}")
+        for stock in stocks
+    ]
+
     try:
-        threat_result = evaluate_threat(stock, final_report)
-        threat_score = threat_result.get("score")
-        threat_reason = threat_result.get("reason")
-    except Exception as e:
-        threat_score = None
-        threat_reason = f"Error computing threat: {e}"
+        neighbors = search_many(stocks, k=5, where=[Filter(stock=s) for s in stocks])
+    except Exception:
+        neighbors = [[] for _ in stocks]
+    reports = [
+        analyze_with_claude(stock, analysis or "", neighbors=n)
+        for stock, analysis, n in zip(stocks, analyses, neighbors)
+    ]
 
-    return {
-        "stock": stock,
-        "perplexity_analysis": analysis,
-        "final_report": final_report,
-        "threat_score": threat_score,
-        "threat_reason": threat_reason,
-    }
+    try:
+        retrieved = search_many(reports, k=5, where=[Filter(stock=s) for s in stocks])
+    except Exception:
+        retrieved = [None] * len(stocks)
+
+    return [
+        _report(stock, analysis, report, _threat_or_error(evaluate_threat, stock, report, retrieved=past))
+        for stock, analysis, report, past in zip(stocks, analyses, reports, retrieved)
+    ]
 
-def ask_followup(stock: str, user_question: str, previous_report: dict = None):
+
+def ask_followup(stock: str, user_question: str, previous_report: dict = None, neighbors: list = None):
     """
     Ask a follow-up question to Claude about a stock, using previous analysis + memory context.
     `previous_report` should ideally be the dict returned from analyze_stock(stock).
+    `neighbors` can be passed in from a batched search_many call.
     """
-    try:
+    if neighbors is None:
         # Retrieve memory context
-        neighbors = search(stock, k=5)
+        neighbors = _safe_search(stock, stock=stock)
+
+    try:
+        response = get_anthropic().messages.create(
+            **_followup_request(stock, user_question, previous_report, neighbors)
+        )
+        return response.content[0].text
+    except Exception as e:
+        print(f"❌ Claude follow-up failed: {e}")
+        return "Error: Could not answer follow-up question."
+
+
+# ------------------ Async workflow ------------------
+async def _call_perplexity_async(stock: str, headers: dict, data: dict, timeout: int):
+    try:
+        await provider_limits["perplexity"].acquire()
+        response = await get_async_http().post(
+            PERPLEXITY_API_URL,
+            headers=headers,
+            json=data,
+            timeout=timeout
+        )
+        response.raise_for_status()
+        result = response.json()
+
+        analysis = result["choices"][0]["message"]["content"]
+        await asyncio.to_thread(_store_perplexity_result, stock, result, analysis)
+        return analysis
+
+    except httpx.TimeoutException:
+        print("⚠️ Perplexity request timed out. Falling back to Claude.")
+        return None
+    except httpx.HTTPError as e:
+        print(f"❌ Perplexity API request failed: {e}")
+        return None
+    except Exception as e:
+        print(f"❌ Unexpected error with Perplexity: {e}")
+        return None
+
+
+async def analyze_with_perplexity_async(stock: str, query: str, timeout: int = 90):
+    """Async analyze_with_perplexity over httpx; storage runs in a worker thread."""
+    headers, data = _perplexity_request(query)
+    return await perplexity_cache.get_or_call_async(
+        perplexity_cache.key(data),
+        lambda: _call_perplexity_async(stock, headers, data, timeout),
+    )
+
+
+async def analyze_with_claude_async(stock: str, analysis: str = "", neighbors: list = None):
+    """Async analyze_with_claude via AsyncAnthropic."""
+    if neighbors is None:
+        neighbors = await asyncio.to_thread(_safe_search, stock, 5, stock)
+
+    request = _claude_request(stock, analysis, neighbors)
+    return await claude_cache.get_or_call_async(
+        claude_cache.key(request), lambda: _call_claude_async(request), cacheable=_is_answer
+    )
+
+
+async def _call_claude_async(request: dict):
+    try:
+        await provider_limits["anthropic"].acquire()
+        response = await get_async_anthropic().messages.create(**request)
+        return response.content[0].text
+    except Exception as e:
+        print(f"❌ Claude API request failed: {e}")
+        return "Error: Could not analyze query."
+
+
+def _preload_and_search(stock: str):
+    try:
+        preload_from_mongo(stock, limit=20)
     except Exception:
-        neighbors = []
+        pass
+    return _safe_search(stock, stock=stock)
 
-    memory_context = "\n".join(str(n) for n in neighbors)
 
-    # If previous report not passed, build a minimal one
-    previous_report = previous_report or {}
+async def analyze_stock_async(stock: str):
+    """
+    Async analyze_stock: the Mongo preload + Pathway retrieval run in a worker
+    thread concurrently with the Perplexity call, then Claude and threat scoring.
+    Returns the same dict as analyze_stock.
+    """
+    query = f"latest news and anomalies about {stock}"
 
-    # Build the query prompt
-    query = f"""
-Stock: {stock}
+    # Step 1: Perplexity ‖ (preload → retrieval)
+    analysis, neighbors = await asyncio.gather(
+        analyze_with_perplexity_async(stock, query),
+        asyncio.to_thread(_preload_and_search, stock),
+    )
 
-Previous analysis:
-- Perplexity: {previous_report.get("perplexity_analysis")}
-- Final Report: {previous_report.get("final_report")}
-- Threat Score: {previous_report.get("threat_score")}
-- Threat Reason: {previous_report.get("threat_reason")}
+    # Step 2: Always refine with Claude (with or without Perplexity result)
+    final_report = await analyze_with_claude_async(stock, analysis or "", neighbors=neighbors)
 
-Memory Context from Pathway:
-{memory_context}
+    # Step 3: Threat scoring
+    try:
+        threat_result = await evaluate_threat_async(stock, final_report)
+    except Exception as e:
+        threat_result = {"score": None, "reason": f"Error computing threat: {e}"}
+    return _report(stock, analysis, final_report, threat_result)
 
-User Question: {user_question}
 
-Answer clearly and concisely. 
-If it's about market metrics (like all-time high), answer directly.
-If it's anomaly-related, use the provided context and cite sources if possible.
-"""
+def _preload_and_search_many(stocks: list[str]):
+    try:
+        preload_many_from_mongo(stocks, limit=20)
+    except Exception:
+        pass
+    try:
+        return dict(zip(stocks, search_many(stocks, k=5, where=[Filter(stock=s) for s in stocks])))
+    except Exception:
+        return {}
+
+
+async def analyze_stocks_stream(stocks: list[str], concurrency: int = BATCH_CONCURRENCY):
+    """
+    Watchlist analysis as an async generator: yields each ticker's analyze_stock
+    dict as soon as it finishes. Duplicate tickers are analyzed once; the Mongo
+    preload is one bounded query per stock and the stock-name retrieval one search_many batch,
+    shared by every ticker. At most `concurrency` tickers are in flight.
+    """
+    stocks = list(dict.fromkeys(s.strip() for s in stocks if s and s.strip()))
+    if not stocks:
+        return
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    shared_context = asyncio.ensure_future(asyncio.to_thread(_preload_and_search_many, stocks))
+
+    async def run(stock):
+        async with semaphore:
+            try:
+                analysis = await analyze_with_perplexity_async(stock, f"latest news and anomalies about {stock}")
+                neighbors = (await asyncio.shield(shared_context)).get(stock, [])
+                final_report = await analyze_with_claude_async(stock, analysis or "", neighbors=neighbors)
+                threat_result = await evaluate_threat_async(stock, final_report)
+                return _report(stock, analysis, final_report, threat_result)
+            except Exception as e:
+                return {"stock": stock, "error": str(e)}
+
+    tasks = [asyncio.ensure_future(run(stock)) for stock in stocks]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def ask_followup_async(stock: str, user_question: str, previous_report: dict = None, neighbors: list = None):
+    """Async ask_followup via AsyncAnthropic."""
+    if neighbors is None:
+        neighbors = await asyncio.to_thread(_safe_search, stock, 5, stock)
 
     try:
-        response = anthropic_client.messages.create(
-            model="claude-3-5-sonnet-20240620",
-            max_tokens=400,
-            temperature=0.3,
-            system="You are a financial assistant. Always answer clearly and concisely with context if available.",
-            messages=[{"role": "user", "content": query}]
+        await provider_limits["anthropic"].acquire()
+        response = await get_async_anthropic().messages.create(
+            **_followup_request(stock, user_question, previous_report, neighbors)
         )
         return response.content[0].text
     except Exception as e:
         print(f"❌ Claude follow-up failed: {e}")
-        return "Error: Could not answer follow-up question."
\ No newline at end of file
+        return "Error: Could not answer follow-up question."
+
+
+# ------------------ Streaming workflow ------------------
+async def _stream_claude(request: dict):
+    """Yield Claude text deltas as they arrive."""
+    await provider_limits["anthropic"].acquire()
+    async with get_async_anthropic().messages.stream(**request) as stream:
+        async for text in stream.text_stream:
+            yield text
+
+
+async def analyze_stock_events(stock: str):
+    """
+    Streaming analyze_stock: yields (event, data) pairs —
+    "perplexity" once the summary is in, "token" for each Claude delta,
+    "threat" with the score, then "done" with the analyze_stock dict.
+    """
+    query = f"latest news and anomalies about {stock}"
+
+    analysis, neighbors = await asyncio.gather(
+        analyze_with_perplexity_async(stock, query),
+        asyncio.to_thread(_preload_and_search, stock),
+    )
+    yield "perplexity", {"stock": stock, "perplexity_analysis": analysis}
+
+    # Concurrent streams for the same report share one Claude call; hits come back as one token
+    request = _claude_request(stock, analysis or "", neighbors)
+    parts = []
+    try:
+        chunks = claude_cache.stream_async(claude_cache.key(request), lambda: _stream_claude(request), cacheable=_is_answer)
+        async with aclosing(chunks):
+            async for text in chunks:
+                parts.append(text)
+                yield "token", {"text": text}
+        final_report = "".join(parts)
+    except Exception as e:
+        print(f"❌ Claude API request failed: {e}")
+        final_report = "Error: Could not analyze query."
+
+    try:
+        threat_result = await evaluate_threat_async(stock, final_report)
+    except Exception as e:
+        threat_result = {"score": None, "reason": f"Error computing threat: {e}"}
+    yield "threat", {"threat_score": threat_result.get("score"), "threat_reason": threat_result.get("reason")}
+
+    yield "done", _report(stock, analysis, final_report, threat_result)
+
+
+async def ask_followup_events(stock: str, user_question: str, previous_report: dict = None):
+    """Streaming ask_followup: "token" events, then "done" with the full answer."""
+    neighbors = await asyncio.to_thread(_safe_search, stock, 5, stock)
+
+    parts = []
+    try:
+        async for text in _stream_claude(_followup_request(stock, user_question, previous_report, neighbors)):
+            parts.append(text)
+            yield "token", {"text": text}
+        answer = "".join(parts)
+    except Exception as e:
+        print(f"❌ Claude follow-up failed: {e}")
+        answer = "Error: Could not answer follow-up question."
+
+    yield "done", {"stock": stock, "question": user_question, "answer": answer}
+
+
+def cache_stats():
+    """Hit-rate / saved-latency metrics for the provider response caches."""
+    from .threat_model import threat_cache
+    return [perplexity_cache.stats(), claude_cache.stats(), threat_cache.stats()]
@@ -1,13 +1,95 @@
+# backend/main.py
+import time
+
+_IMPORT_STARTED = time.perf_counter()
+
+import asyncio
+import json
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
-from .llm import analyze_stock 
-from .llm import analyze_stock, ask_followup  # ✅ centralized workflow
+from .llm import (  # ✅ centralized workflow
+    analyze_stock_async, ask_followup_async, analyze_stocks_stream,
+    analyze_stock_events, ask_followup_events,
+)
+from .config import BATCH_CONCURRENCY, EMBEDDING_WARMUP, WATCHLIST
+from . import vector_runtime, vector_store, llm, embeddings, clients, db, watcher
+from .write_behind import news_writer
+
+# Startup progress and timings, served by /ready
+startup = {
+    "import_s": round(time.perf_counter() - _IMPORT_STARTED, 3),
+    "runtime": False,
+    "index": False,
+    "model": False,
+    "index_load_s": None,
+    "error": None,
+}
+
+
+def _timed(key, fn):
+    start = time.perf_counter()
+    result = fn()
+    startup[key] = round(time.perf_counter() - start, 3)
+    return result
+
+
+async def _warm_up():
+    """Load the vector index and the embedding model off the event loop; /ready flips when done."""
+    try:
+        await asyncio.to_thread(_timed, "index_load_s", vector_store.load_index)
+        startup["index"] = True
+        await asyncio.to_thread(embeddings.warmup if EMBEDDING_WARMUP else embeddings.get_model)
+        startup["model"] = True
+    except Exception as e:
+        startup["error"] = str(e)
+        print(f"❌ Warmup failed: {e}")
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Start the long-lived Pathway pipeline once per worker, then warm up in the background
+    so the worker accepts connections right away. Mongo being down only delays index builds.
+    """
+    if vector_store.PATHWAY_MIRROR:  # int8/float16 indexes are served from their shards, no Pathway copy
+        vector_runtime.start()
+    startup["runtime"] = True
+    warm = asyncio.create_task(_warm_up())
+    asyncio.get_running_loop().run_in_executor(None, db.ensure_indexes)
+    watch = watcher.Watcher(WATCHLIST, analyze_stock_async) if WATCHLIST else None
+    if watch is not None:
+        watch.start()
+    app.state.watcher = watch
+    yield
+    warm.cancel()
+    if watch is not None:
+        await watch.stop()
+    # Flush queued Mongo writes, save the vector index, then close pooled HTTP/Mongo connections
+    news_writer.close()
+    vector_store.save_index()
+    embeddings.close()
+    await clients.aclose()
+
+
+app = FastAPI(lifespan=lifespan)
+
+def _sse(events):
+    """Render (event, data) pairs as a server-sent events stream."""
+    async def body():
+        async for event, data in events:
+            yield f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+    return StreamingResponse(body(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
 
 class QueryRequest(BaseModel):
     stock: str
 
+class BatchRequest(BaseModel):
+    stocks: list[str]
+    concurrency: int | None = None
+
 class FollowupRequest(BaseModel):
     stock: str
     question: str
@@ -15,16 +97,52 @@ class FollowupRequest(BaseModel):
 
 
 @app.post("/analyze")
-def analyze(req: QueryRequest):
-    """API endpoint: analyze a stock for anomalies/problems."""
-    result = analyze_stock(req.stock)
+async def analyze(req: QueryRequest):
+    """API endpoint: analyze a stock for anomalies/problems (served from the watcher's stored report when fresh)."""
+    stored = watcher.results.get(req.stock)
+    if stored is not None:
+        return {**stored["result"], "analyzed_at": stored["analyzed_at"], "trigger": stored["trigger"]}
+    result = await analyze_stock_async(req.stock)
     return result
+@app.post("/analyze/stream")
+async def analyze_stream(req: QueryRequest):
+    """SSE version of /analyze: Perplexity summary, Claude tokens, threat score, then the final report."""
+    return _sse(analyze_stock_events(req.stock))
+@app.post("/analyze/batch")
+async def analyze_batch(req: BatchRequest):
+    """Analyze a watchlist; streams one NDJSON line per ticker as soon as it finishes."""
+    concurrency = max(1, min(req.concurrency or BATCH_CONCURRENCY, BATCH_CONCURRENCY))  # never above the server cap
+    async def lines():
+        async for result in analyze_stocks_stream(req.stocks, concurrency):
+            yield json.dumps(result, default=str) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
 @app.post("/followup")
-def followup(req: FollowupRequest):
+async def followup(req: FollowupRequest):
     """Ask follow-up questions after the initial analysis."""
-    answer = ask_followup(req.stock, req.question, req.previous_report)
+    answer = await ask_followup_async(req.stock, req.question, req.previous_report)
     return {
         "stock": req.stock,
         "question": req.question,
         "answer": answer,
-    }
\ No newline at end of file
+    }
+@app.post("/followup/stream")
+async def followup_stream(req: FollowupRequest):
+    """SSE version of /followup: Claude tokens as they arrive, then the final answer."""
+    return _sse(ask_followup_events(req.stock, req.question, req.previous_report))
+@app.get("/ready")
+def ready():
+    """200 once the Pathway runtime, vector index and embedding model are loaded; 503 until then."""
+    is_ready = startup["runtime"] and startup["index"] and startup["model"]
+    body = {"ready": is_ready, **startup, **embeddings.timings, "indexed_docs": len(vector_store.local_index())}
+    return JSONResponse(body, status_code=200 if is_ready else 503)
+@app.get("/metrics")
+def metrics():
+    """Cache hit rates, saved latency and connection reuse."""
+    return {
+        "response_caches": llm.cache_stats(),
+        "embedding_cache": embeddings.cache_stats(),
+        "connections": clients.connection_stats(),
+        "mongo_writes": news_writer.stats(),
+        "watcher": app.state.watcher.stats() if getattr(app.state, "watcher", None) else None,
+    }
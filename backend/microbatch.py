@@ -0,0 +1,69 @@
+# backend/microbatch.py
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+
+class MicroBatcher:
+    """
+    Collects single-item calls arriving within `max_wait_ms` of each other and
+    runs them through `batch_fn(items) -> results` as one batch.
+    Callers block on their own result, so the call site stays synchronous.
+    """
+
+    def __init__(self, batch_fn, max_batch: int = 32, max_wait_ms: float = 5.0):
+        self.batch_fn = batch_fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = queue.Queue()
+        self._worker = None
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.items = 0
+
+    def _ensure_worker(self):
+        if self._worker is not None:
+            return
+        with self._lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="microbatch", daemon=True)
+                self._worker.start()
+
+    def submit(self, item):
+        """Queue one item and block until its batch has been processed."""
+        self._ensure_worker()
+        future = Future()
+        self._queue.put((item, future))
+        return future.result()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            items = [item for item, _ in batch]
+            try:
+                results = self.batch_fn(items)
+                for (_, future), result in zip(batch, results):
+                    future.set_result(result)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+            self.batches += 1
+            self.items += len(batch)
+
+    def stats(self):
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch": round(self.items / self.batches, 2) if self.batches else 0.0,
+        }
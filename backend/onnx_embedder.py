@@ -0,0 +1,158 @@
+# backend/onnx_embedder.py
+# CPU embedding backend: the BGE encoder exported to ONNX (optionally int8
+# dynamic-quantized) and run with onnxruntime. Produces the same 384-dim,
+# CLS-pooled, L2-normalized vectors as SentenceTransformer("BAAI/bge-small-en-v1.5").
+#   python -m backend.onnx_embedder export [--no-quantize]
+#   python -m backend.onnx_embedder parity
+import argparse
+import os
+import time
+
+import numpy as np
+
+from .config import EMBEDDING_MODEL, EMBEDDING_ONNX_DIR, EMBEDDING_THREADS
+
+FP32_FILE = "model.onnx"
+INT8_FILE = "model_int8.onnx"
+MAX_LENGTH = 512
+
+
+def export_onnx(model_name: str = EMBEDDING_MODEL, out_dir: str = EMBEDDING_ONNX_DIR, quantize: bool = True):
+    """Export the HF encoder (+ tokenizer) to `out_dir`; with `quantize`, also write an int8 copy."""
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+
+    os.makedirs(out_dir, exist_ok=True)
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModel.from_pretrained(model_name).eval()
+    tokenizer.save_pretrained(out_dir)
+
+    sample = tokenizer(["export sample"], return_tensors="pt")
+    fp32_path = os.path.join(out_dir, FP32_FILE)
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            (sample["input_ids"], sample["attention_mask"], sample["token_type_ids"]),
+            fp32_path,
+            input_names=["input_ids", "attention_mask", "token_type_ids"],
+            output_names=["last_hidden_state"],
+            dynamic_axes={name: {0: "batch", 1: "seq"} for name in
+                          ("input_ids", "attention_mask", "token_type_ids", "last_hidden_state")},
+            opset_version=17,
+        )
+    print(f"✅ Exported {model_name} to {fp32_path}")
+
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        int8_path = os.path.join(out_dir, INT8_FILE)
+        quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+        print(f"✅ Quantized weights to int8: {int8_path}")
+    return out_dir
+
+
+def _pool(last_hidden_state):
+    """BGE pooling: CLS token, then L2 normalize."""
+    cls = np.asarray(last_hidden_state[:, 0], dtype=np.float32)
+    norms = np.linalg.norm(cls, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return cls / norms
+
+
+class OnnxEmbedder:
+    """Drop-in for SentenceTransformer.encode() backed by an onnxruntime CPU session."""
+
+    def __init__(self, model_dir: str = EMBEDDING_ONNX_DIR, quantized: bool = True, threads: int = EMBEDDING_THREADS,
+                 batch_size: int = 32):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        path = os.path.join(model_dir, INT8_FILE if quantized else FP32_FILE)
+        if not os.path.exists(path):
+            export_onnx(out_dir=model_dir, quantize=quantized)
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.inter_op_num_threads = 1
+        if threads > 0:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(path, sess_options=options, providers=["CPUExecutionProvider"])
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        self.inputs = {i.name for i in self.session.get_inputs()}
+        self.batch_size = batch_size
+        self.path = path
+
+    def encode(self, texts, convert_to_numpy: bool = True, batch_size: int = None):
+        texts = list(texts)
+        batch_size = batch_size or self.batch_size
+        out = np.empty((len(texts), 0), dtype=np.float32)
+        order = np.argsort([len(t) for t in texts])  # similar lengths per batch -> less padding
+        for start in range(0, len(texts), batch_size):
+            pick = order[start:start + batch_size]
+            tokens = self.tokenizer(
+                [texts[i] for i in pick], padding=True, truncation=True, max_length=MAX_LENGTH, return_tensors="np"
+            )
+            feed = {name: tokens[name].astype(np.int64) for name in self.inputs if name in tokens}
+            vectors = _pool(self.session.run(["last_hidden_state"], feed)[0])
+            if out.shape[1] == 0:
+                out = np.empty((len(texts), vectors.shape[1]), dtype=np.float32)
+            out[pick] = vectors
+        return out
+
+
+def cosine_drift(reference, candidate):
+    """Per-text cosine between two embedding sets, summarized."""
+    reference = _pool(np.asarray(reference)[:, None, :])
+    candidate = _pool(np.asarray(candidate)[:, None, :])
+    cosines = np.sum(reference * candidate, axis=1)
+    return {
+        "texts": len(cosines),
+        "mean_cosine": round(float(cosines.mean()), 6),
+        "min_cosine": round(float(cosines.min()), 6),
+        "max_drift": round(float(1.0 - cosines.min()), 6),
+    }
+
+
+PARITY_TEXTS = [
+    "AAPL shares jump after record iPhone sales",
+    "Tesla recalls 200,000 vehicles over steering defect",
+    "Unusual options activity in NVDA ahead of earnings",
+    "SEC opens insider trading probe into biotech executives",
+    "Microsoft announces $10B AI acquisition",
+    "Trading halted after 40% intraday drop",
+]
+
+
+def parity_check(texts=PARITY_TEXTS, quantized: bool = True, model_dir: str = EMBEDDING_ONNX_DIR):
+    """Compare ONNX vectors (and latency) against the PyTorch SentenceTransformer."""
+    from sentence_transformers import SentenceTransformer
+
+    torch_model = SentenceTransformer(EMBEDDING_MODEL)
+    onnx_model = OnnxEmbedder(model_dir, quantized=quantized)
+
+    start = time.perf_counter()
+    reference = torch_model.encode(texts, convert_to_numpy=True)
+    torch_s = time.perf_counter() - start
+    start = time.perf_counter()
+    candidate = onnx_model.encode(texts)
+    onnx_s = time.perf_counter() - start
+
+    report = cosine_drift(reference, candidate)
+    report.update(dim=int(candidate.shape[1]), torch_ms=round(torch_s * 1000, 2), onnx_ms=round(onnx_s * 1000, 2),
+                  model=onnx_model.path)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export / check the ONNX embedding backend")
+    parser.add_argument("command", choices=["export", "parity"])
+    parser.add_argument("--no-quantize", action="store_true")
+    parser.add_argument("--dir", default=EMBEDDING_ONNX_DIR)
+    args = parser.parse_args()
+    if args.command == "export":
+        export_onnx(out_dir=args.dir, quantize=not args.no_quantize)
+    else:
+        print(parity_check(quantized=not args.no_quantize, model_dir=args.dir))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 import requests
 import os
+from .clients import get_http_session
 import json
 from datetime import datetime
 from dotenv import load_dotenv
@@ -33,7 +34,7 @@ def search_perplexity(query: str) -> str:
     }
 
     try:
-        response = requests.post(PERPLEXITY_API_URL, headers=headers, json=data, timeout=30)
+        response = get_http_session().post(PERPLEXITY_API_URL, headers=headers, json=data, timeout=30)
         response.raise_for_status()
     except requests.exceptions.RequestException as e:
         print(f"❌ Perplexity API request failed: {e}")
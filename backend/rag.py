@@ -1,12 +1,17 @@
 # backend/rag.py
-from .vector_store import search
+from .vector_store import search, search_many
 from .llm import analyze_with_claude
 
-def get_context(query: str, k: int = 3):
-    """Retrieve relevant context for a query using Pathway."""
-    results = search(query, k=k)
-    context = "\n".join([f"- {doc} (score: {score:.2f})" for _, doc, score in results])
-    return context
+def _format_context(results):
+    return "\n".join([f"- {doc} (score: {score:.2f})" for _, doc, score in results])
+
+def get_context(query: str, k: int = 3, stock=None, since=None, source=None):
+    """Retrieve relevant context for a query using Pathway (optionally one stock / source / time window)."""
+    return _format_context(search(query, k=k, stock=stock, since=since, source=source))
+
+def get_contexts(queries: list[str], k: int = 3):
+    """Retrieve context for many queries in one batched search."""
+    return [_format_context(results) for results in search_many(queries, k=k)]
 
 def answer_query(query: str):
     """RAG pipeline: retrieve with Pathway, answer with Claude."""
@@ -0,0 +1,190 @@
+# backend/response_cache.py
+import asyncio
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+_RETRY = object()  # in-flight result meaning "leader cancelled, call again"
+
+
+class ResponseCache:
+    """
+    TTL + size-bounded cache for slow, paid provider calls, with single-flight:
+    concurrent callers for the same key wait on one in-flight call instead of
+    issuing their own. Tracks hit rate and the latency saved by hits.
+    """
+
+    def __init__(self, name: str, ttl: float, max_items: int = 1024):
+        self.name = name
+        self.ttl = ttl
+        self.max_items = max_items
+        self._items = OrderedDict()  # key -> (expires_at, value, cost_seconds)
+        self._lock = threading.Lock()
+        self._inflight = {}          # key -> threading.Event (sync callers)
+        self._inflight_async = {}    # key -> asyncio.Future (async callers)
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.saved_seconds = 0.0
+
+    @staticmethod
+    def key(*parts) -> str:
+        """Stable hash of the model, prompt and parameters."""
+        raw = json.dumps(parts, sort_keys=True, default=str)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _lookup(self, key):
+        with self._lock:
+            entry = self._items.get(key)
+            if entry is None:
+                return False, None, 0.0
+            expires_at, value, cost = entry
+            if expires_at < time.monotonic():
+                del self._items[key]
+                return False, None, 0.0
+            self._items.move_to_end(key)
+            return True, value, cost
+
+    def peek(self, key):
+        """Return (found, value) without computing anything; counts as a hit when found."""
+        found, value, cost = self._lookup(key)
+        if found:
+            self.hits += 1
+            self.saved_seconds += cost
+        return found, value
+
+    def put(self, key, value, cost: float = 0.0):
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            self._items[key] = (time.monotonic() + self.ttl, value, cost)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+
+    def _compute(self, key, fn, cacheable):
+        start = time.monotonic()
+        value = fn()
+        if cacheable(value):
+            self.put(key, value, time.monotonic() - start)
+        return value
+
+    def get_or_call(self, key, fn, cacheable=lambda value: value is not None):
+        """Sync lookup; on a miss only one thread runs `fn` per key."""
+        found, value = self.peek(key)
+        if found:
+            return value
+        while True:
+            with self._lock:
+                event = self._inflight.get(key)
+                if event is None:
+                    event = self._inflight[key] = threading.Event()
+                    self.misses += 1
+                    leader = True
+                else:
+                    self.coalesced += 1
+                    leader = False
+            if not leader:
+                event.wait()
+                found, value, cost = self._lookup(key)
+                if found:
+                    self.saved_seconds += cost
+                    return value
+                continue  # leader's result wasn't cacheable; compute ourselves
+            try:
+                return self._compute(key, fn, cacheable)
+            finally:
+                with self._lock:
+                    self._inflight.pop(key, None)
+                event.set()
+
+    async def get_or_call_async(self, key, coro_fn, cacheable=lambda value: value is not None):
+        """Async lookup; on a miss concurrent coroutines share one awaited call."""
+        found, value = self.peek(key)
+        if found:
+            return value
+        while True:
+            future = self._inflight_async.get(key)
+            if future is None:
+                break
+            self.coalesced += 1
+            value = await asyncio.shield(future)
+            if value is not _RETRY:
+                return value
+            # leader was cancelled (e.g. its client went away): retry, one waiter takes over
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight_async[key] = future
+        start = time.monotonic()
+        try:
+            value = await coro_fn()
+        except asyncio.CancelledError:
+            future.set_result(_RETRY)  # wake waiters to retry; cancelling them would fail unrelated requests
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # mark retrieved when nobody else is waiting
+            raise
+        else:
+            if cacheable(value):
+                self.put(key, value, time.monotonic() - start)
+            future.set_result(value)
+            return value
+        finally:
+            self._inflight_async.pop(key, None)
+
+    async def stream_async(self, key, stream_fn, cacheable=lambda value: value is not None):
+        """
+        Single-flight for streamed text: the leader yields stream_fn()'s chunks as they
+        arrive and caches the joined text; cache hits and concurrent callers for the
+        same key get the finished text as one chunk.
+        """
+        found, value = self.peek(key)
+        if found:
+            yield value
+            return
+        while True:
+            future = self._inflight_async.get(key)
+            if future is None:
+                break
+            self.coalesced += 1
+            value = await asyncio.shield(future)
+            if value is not _RETRY:
+                yield value
+                return
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight_async[key] = future
+        start = time.monotonic()
+        parts = []
+        try:
+            async for chunk in stream_fn():
+                parts.append(chunk)
+                yield chunk
+        except BaseException:
+            future.set_result(_RETRY)  # failed, cancelled or abandoned mid-stream: a waiter takes over
+            raise
+        else:
+            value = "".join(parts)
+            if cacheable(value):
+                self.put(key, value, time.monotonic() - start)
+            future.set_result(value)
+        finally:
+            self._inflight_async.pop(key, None)
+
+    def stats(self):
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "name": self.name,
+            "ttl": self.ttl,
+            "size": len(self._items),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_rate": round((self.hits + self.coalesced) / lookups, 4) if lookups else 0.0,
+            "saved_seconds": round(self.saved_seconds, 3),
+        }
@@ -1,22 +1,33 @@
 # backend/threat_model.py
+import asyncio
 from .vector_store import search
-from anthropic import Anthropic
-import os
+from .limits import provider_limits
+from .config import THREAT_CACHE_TTL, RESPONSE_CACHE_SIZE
+from .response_cache import ResponseCache
+from .clients import get_anthropic, get_async_anthropic
 import re
 
-anthropic_client = Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
+THREAT_MODEL = "claude-3-5-sonnet-20240620"
 
-def evaluate_threat(stock: str, anomalies: str):
-    """
-    Given Claude’s anomalies, retrieve past events and output a numeric threat score 0-10.
-    Returns {score: int, reason: str}
-    """
-    # Step 1: Retrieve past related events from Pathway
-    retrieved = search(anomalies, k=5)
-    context = "\n".join([f"- {r[1]}" for r in retrieved])
+threat_cache = ResponseCache("threat", ttl=THREAT_CACHE_TTL, max_items=RESPONSE_CACHE_SIZE)
+
+
+def _threat_request(prompt: str):
+    return dict(
+        model=THREAT_MODEL,
+        max_tokens=150,
+        temperature=0,
+        messages=[{"role": "user", "content": prompt}]
+    )
 
-    # Step 2: Ask Claude for threat score
-    prompt = f"""
+
+def _is_score(result):
+    return result.get("score") is not None
+
+
+def _threat_prompt(stock: str, anomalies: str, retrieved: list):
+    context = "\n".join([f"- {r[1]}" for r in retrieved])
+    return f"""
     Stock: {stock}
     Current anomalies:
     {anomalies}
@@ -30,25 +41,63 @@ def evaluate_threat(stock: str, anomalies: str):
     Reason: <short one-line explanation>
     """
 
+
+def _parse_threat(text: str):
+    text = text.strip()
+
+    # Parse out the score
+    match = re.search(r"Score:\s*(\d+)", text)
+    score = int(match.group(1)) if match else None
+
+    # Extract reason
+    reason_match = re.search(r"Reason:\s*(.*)", text)
+    reason = reason_match.group(1).strip() if reason_match else "No reason provided."
+
+    return {"score": score, "reason": reason}
+
+
+def evaluate_threat(stock: str, anomalies: str, retrieved: list = None):
+    """
+    Given Claude’s anomalies, retrieve past events and output a numeric threat score 0-10.
+    Pass `retrieved` (e.g. from search_many) to skip the per-call search.
+    Returns {score: int, reason: str}
+    """
+    # Step 1: Retrieve past related events from Pathway
+    if retrieved is None:
+        retrieved = search(anomalies, k=5, stock=stock)
+    prompt = _threat_prompt(stock, anomalies, retrieved)
+
+    # Step 2: Ask Claude for threat score (cached per prompt)
+    request = _threat_request(prompt)
+    return threat_cache.get_or_call(threat_cache.key(request), lambda: _call_threat(request), cacheable=_is_score)
+
+
+def _call_threat(request: dict):
     try:
-        response = anthropic_client.messages.create(
-            model="claude-3-5-sonnet-20240620",
-            max_tokens=150,
-            temperature=0,
-            messages=[{"role": "user", "content": prompt}]
-        )
+        response = get_anthropic().messages.create(**request)
+        return _parse_threat(response.content[0].text)
 
-        text = response.content[0].text.strip()
+    except Exception as e:
+        return {"score": None, "reason": f"Error scoring threat: {e}"}
 
-        # Parse out the score
-        match = re.search(r"Score:\s*(\d+)", text)
-        score = int(match.group(1)) if match else None
 
-        # Extract reason
-        reason_match = re.search(r"Reason:\s*(.*)", text)
-        reason = reason_match.group(1).strip() if reason_match else "No reason provided."
+async def evaluate_threat_async(stock: str, anomalies: str, retrieved: list = None):
+    """Async evaluate_threat: retrieval runs in a worker thread, Claude via AsyncAnthropic."""
+    if retrieved is None:
+        retrieved = await asyncio.to_thread(search, anomalies, 5, stock)
+    prompt = _threat_prompt(stock, anomalies, retrieved)
 
-        return {"score": score, "reason": reason}
+    request = _threat_request(prompt)
+    return await threat_cache.get_or_call_async(
+        threat_cache.key(request), lambda: _call_threat_async(request), cacheable=_is_score
+    )
+
+
+async def _call_threat_async(request: dict):
+    try:
+        await provider_limits["anthropic"].acquire()
+        response = await get_async_anthropic().messages.create(**request)
+        return _parse_threat(response.content[0].text)
 
     except Exception as e:
         return {"score": None, "reason": f"Error scoring threat: {e}"}
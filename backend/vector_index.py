@@ -0,0 +1,575 @@
+# backend/vector_index.py
+import json
+import os
+import threading
+from datetime import datetime, timezone
+from typing import NamedTuple
+
+import numpy as np
+
+from .vector_shards import ShardStore
+
+try:  # optional: only needed for VECTOR_INDEX_BACKEND=hnsw
+    import hnswlib
+except ImportError:
+    hnswlib = None
+
+
+class Hit(NamedTuple):
+    id: str
+    content: str
+    score: float
+    metadata: dict
+
+
+class Filter(NamedTuple):
+    """Metadata constraints for a query; each field is optional. stock/source may be one value or a list."""
+    stock: object = None
+    source: object = None
+    since: object = None  # datetime, ISO string or epoch seconds
+
+    def __bool__(self):
+        return any(v is not None for v in self)
+
+
+def _epoch(value) -> float:
+    """datetime / ISO string / number -> epoch seconds (naive times are UTC); NaN if unknown."""
+    if value is None:
+        return np.nan
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value)
+        except ValueError:
+            return np.nan
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+class VectorIndex:
+    """
+    In-process cosine index backed by a contiguous, pre-normalized float32 matrix.
+    Capacity doubles (in chunk_size steps) when full, so inserts stay amortized O(1),
+    and a query is a single matrix-vector product + argpartition top-k.
+    Ids resolve to rows through a dict, so lookups and upserts are O(1).
+    Stock, source and timestamp are also kept as per-row arrays, so a filtered
+    query builds a bitmap and only scores the rows that pass it.
+    """
+
+    backend = "brute"
+
+    def __init__(self, dim: int = 384, chunk_size: int = 4096):
+        self.dim = dim
+        self.chunk_size = chunk_size
+        self._matrix = np.zeros((0, dim), dtype=np.float32)
+        self._size = 0
+        self.ids = []
+        self.contents = []
+        self.metadata = []
+        self._slot_by_id = {}
+        self._lock = threading.Lock()
+        # filter columns: interned stock/source codes (-1 = missing) and epoch timestamps
+        self._codes = {}
+        self._stock_codes = np.zeros(0, dtype=np.int32)
+        self._source_codes = np.zeros(0, dtype=np.int32)
+        self._times = np.zeros(0, dtype=np.float64)
+
+    def __len__(self):
+        return self._size
+
+    def __contains__(self, doc_id):
+        return doc_id in self._slot_by_id
+
+    def get(self, doc_id: str):
+        """Return (content, metadata) for an id, or None."""
+        slot = self._slot_by_id.get(doc_id)
+        if slot is None:
+            return None
+        return self.contents[slot], self.metadata[slot]
+
+    @property
+    def matrix(self):
+        """View of the filled rows (no copy)."""
+        return self._matrix[:self._size]
+
+    def _grow(self, extra: int):
+        needed = self._size + extra
+        if needed <= len(self._times):
+            return
+        # Grow geometrically: a fixed step would copy the whole matrix every chunk_size inserts
+        capacity = -(-max(needed, 2 * len(self._times)) // self.chunk_size) * self.chunk_size
+        self._resize_vectors(capacity)
+        self._stock_codes = np.concatenate([self._stock_codes, np.full(capacity - len(self._stock_codes), -1, np.int32)])
+        self._source_codes = np.concatenate([self._source_codes, np.full(capacity - len(self._source_codes), -1, np.int32)])
+        self._times = np.concatenate([self._times, np.full(capacity - len(self._times), np.nan)])
+
+    def _resize_vectors(self, capacity: int):
+        grown = np.zeros((capacity, self.dim), dtype=np.float32)
+        grown[:self._size] = self._matrix[:self._size]
+        self._matrix = grown
+
+    def _write_vectors(self, slots, vectors):
+        self._matrix[slots] = vectors
+
+    def _code(self, value) -> int:
+        if value is None:
+            return -1
+        return self._codes.setdefault(value, len(self._codes))
+
+    def _set_columns(self, slot, meta: dict):
+        self._stock_codes[slot] = self._code(meta.get("stock"))
+        self._source_codes[slot] = self._code(meta.get("source"))
+        self._times[slot] = _epoch(meta.get("timestamp"))
+
+    @staticmethod
+    def _normalize(vectors):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.ndim == 1:
+            vectors = vectors[None, :]
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    def add(self, doc_id: str, content: str, embedding, metadata: dict = None):
+        """Insert (or replace, by id) one document and its embedding."""
+        self.add_many([doc_id], [content], [embedding], [metadata])
+
+    def add_many(self, ids, contents, embeddings, metadatas=None):
+        """Insert a batch of documents; existing ids are overwritten in place. Returns their row slots."""
+        if not ids:
+            return []
+        vectors = self._normalize(embeddings)
+        if vectors.shape != (len(ids), self.dim):
+            raise ValueError(f"Expected {len(ids)}x{self.dim} embeddings, got {vectors.shape}")
+        metadatas = metadatas or [None] * len(ids)
+        slots = []
+        with self._lock:
+            self._grow(len(ids))
+            size = self._size
+            for doc_id, content, meta in zip(ids, contents, metadatas):
+                slot = self._slot_by_id.get(doc_id)
+                if slot is None:
+                    slot = size
+                    size += 1
+                    self._slot_by_id[doc_id] = slot
+                    self.ids.append(doc_id)
+                    self.contents.append(content)
+                    self.metadata.append(meta or {})
+                else:
+                    self.contents[slot] = content
+                    self.metadata[slot] = meta or {}
+                self._set_columns(slot, meta or {})
+                slots.append(slot)
+            self._write_vectors(slots, vectors)
+            self._size = size
+        return slots
+
+    def _hit(self, slot, score):
+        return Hit(self.ids[slot], self.contents[slot], float(score), self.metadata[slot])
+
+    @staticmethod
+    def _top_k(scores, k):
+        """Indices of the k best scores (descending) in a 1-D array."""
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        return top[np.argsort(-scores[top])]
+
+    def _mask(self, where: Filter):
+        """Bitmap of the filled rows that satisfy `where`."""
+        mask = np.ones(self._size, dtype=bool)
+        for column, wanted in ((self._stock_codes, where.stock), (self._source_codes, where.source)):
+            if wanted is None:
+                continue
+            wanted = [wanted] if isinstance(wanted, str) else wanted
+            codes = [self._codes[w] for w in wanted if w in self._codes]
+            mask &= np.isin(column[:self._size], codes)
+        if where.since is not None:
+            mask &= self._times[:self._size] >= _epoch(where.since)
+        return mask
+
+    def query(self, vectors, k: int = 3, where=None):
+        """
+        Top-k Hits per query vector. `where` is a Filter applied to every query,
+        or a list with one Filter (or None) per query.
+        """
+        queries = self._normalize(vectors)
+        if self._size == 0 or k <= 0:
+            return [[] for _ in range(len(queries))]
+        filters = where if isinstance(where, list) else [where] * len(queries)
+        if not any(filters):
+            return self._query_all(queries, k)
+        masks = {}
+        results = []
+        for query, flt in zip(queries, filters):
+            if not flt:
+                results.append(self._query_all(query[None, :], k)[0])
+                continue
+            key = tuple(tuple(v) if isinstance(v, (list, set, tuple)) else v for v in flt)
+            if key not in masks:
+                masks[key] = self._mask(flt)
+            results.append(self._query_filtered(query, k, masks[key]))
+        return results
+
+    def _query_all(self, queries, k):
+        """Score a batch of queries with one matrix-matrix product."""
+        scores = queries @ self.matrix.T
+        k = min(k, scores.shape[1])
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1)
+        top = np.take_along_axis(top, order, axis=1)
+        return [
+            [self._hit(i, row_scores[i]) for i in row]
+            for row, row_scores in zip(top, scores)
+        ]
+
+    def _query_filtered(self, query, k, mask):
+        """Exact scan over only the rows that pass the bitmap."""
+        candidates = np.flatnonzero(mask)
+        return self._score_candidates(query, k, candidates)
+
+    def _score_candidates(self, query, k, candidates):
+        if len(candidates) == 0:
+            return []
+        scores = self._matrix[candidates] @ query
+        return [self._hit(candidates[i], scores[i]) for i in self._top_k(scores, k)]
+
+    def search(self, vector, k: int = 3, stock=None, source=None, since=None):
+        """Return top-k (id, content, score) tuples by cosine similarity, optionally filtered."""
+        return [hit[:3] for hit in self.query([vector], k, Filter(stock, source, since))[0]]
+
+    def search_many(self, vectors, k: int = 3, where=None):
+        """Batched search; one list of (id, content, score) tuples per query."""
+        return [[hit[:3] for hit in hits] for hits in self.query(vectors, k, where)]
+
+    # ------------------ Persistence ------------------
+    def save(self, directory: str):
+        """Write vectors (.npy) and docs (.json) to `directory`."""
+        os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            np.save(os.path.join(directory, "vectors.npy"), self.matrix)
+            with open(os.path.join(directory, "docs.json"), "w", encoding="utf-8") as f:
+                json.dump({
+                    "backend": self.backend,
+                    "dim": self.dim,
+                    "ids": self.ids,
+                    "contents": self.contents,
+                    "metadata": self.metadata,
+                }, f, separators=(",", ":"))
+            self._save_extra(directory)
+
+    def _save_extra(self, directory: str):
+        pass
+
+    def load(self, directory: str):
+        """Load a saved index into this (empty) instance; returns False if nothing is saved."""
+        docs_path = os.path.join(directory, "docs.json")
+        if not os.path.exists(docs_path):
+            return False
+        with open(docs_path, "r", encoding="utf-8") as f:
+            docs = json.load(f)
+        if docs["dim"] != self.dim:
+            print(f"⚠️ Saved index has dim {docs['dim']}, expected {self.dim}; ignoring it")
+            return False
+        vectors = np.load(os.path.join(directory, "vectors.npy"))
+        if docs.get("backend") == self.backend and self._load_extra(directory, vectors, docs):
+            return True
+        VectorIndex.add_many(self, docs["ids"], docs["contents"], vectors, docs["metadata"])
+        self._after_bulk_load()
+        return True
+
+    def _load_extra(self, directory: str, vectors, docs) -> bool:
+        return False
+
+    def _after_bulk_load(self):
+        pass
+
+
+class IVFIndex(VectorIndex):
+    """
+    Inverted-file index: spherical k-means splits rows into `nlist` lists and a
+    query only scores the rows in its `nprobe` closest lists. Until the corpus
+    reaches `train_min` rows it answers exactly, like VectorIndex.
+    Knobs: more `nprobe` = better recall, slower queries.
+    """
+
+    backend = "ivf"
+
+    def __init__(self, dim: int = 384, chunk_size: int = 4096, nlist: int = 256, nprobe: int = 16,
+                 train_min: int = None):
+        super().__init__(dim, chunk_size)
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.train_min = train_min or nlist * 39
+        self.centroids = None
+        self._assign = np.zeros(0, dtype=np.int32)
+        self._lists = []
+        self._list_arrays = []
+
+    @property
+    def trained(self):
+        return self.centroids is not None
+
+    def train(self, iterations: int = 10, seed: int = 0):
+        """Fit centroids on (a sample of) the current rows and assign every row to a list."""
+        data = self.matrix
+        rng = np.random.default_rng(seed)
+        nlist = min(self.nlist, len(data))
+        sample = data[rng.choice(len(data), min(len(data), nlist * 256), replace=False)]
+        centroids = sample[rng.choice(len(sample), nlist, replace=False)].copy()
+        for _ in range(iterations):
+            assign = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assign, sample)
+            counts = np.bincount(assign, minlength=nlist)
+            filled = counts > 0
+            centroids[filled] = self._normalize(sums[filled])
+        with self._lock:
+            self.centroids = centroids
+            self._reassign_all()
+
+    def _nearest_list(self, vectors):
+        return np.argmax(vectors @ self.centroids.T, axis=1).astype(np.int32)
+
+    def _reassign_all(self):
+        assign = np.concatenate([
+            self._nearest_list(self.matrix[i:i + self.chunk_size])
+            for i in range(0, self._size, self.chunk_size)
+        ]) if self._size else np.zeros(0, dtype=np.int32)
+        self._set_assignments(assign)
+
+    def _set_assignments(self, assign):
+        self._assign = assign
+        order = np.argsort(assign, kind="stable")
+        bounds = np.searchsorted(assign[order], np.arange(len(self.centroids) + 1))
+        self._lists = [order[a:b].tolist() for a, b in zip(bounds[:-1], bounds[1:])]
+        self._list_arrays = [None] * len(self._lists)
+
+    def add_many(self, ids, contents, embeddings, metadatas=None):
+        slots = super().add_many(ids, contents, embeddings, metadatas)
+        if not self.trained:
+            if self._size >= self.train_min:
+                self.train()
+            return slots
+        with self._lock:
+            if self._size > len(self._assign):
+                self._assign = np.concatenate([self._assign, np.full(self._size - len(self._assign), -1, np.int32)])
+            for slot, target in zip(slots, self._nearest_list(self._matrix[slots])):
+                current = self._assign[slot]
+                if current == target:
+                    continue
+                if current >= 0:
+                    self._lists[current].remove(slot)
+                    self._list_arrays[current] = None
+                self._lists[target].append(slot)
+                self._list_arrays[target] = None
+                self._assign[slot] = target
+        return slots
+
+    def _list_array(self, c):
+        array = self._list_arrays[c]
+        if array is None:
+            array = self._list_arrays[c] = np.asarray(self._lists[c], dtype=np.int64)
+        return array
+
+    def _candidates(self, query):
+        centroid_scores = self.centroids @ query
+        probes = self._top_k(centroid_scores, self.nprobe)
+        return np.concatenate([self._list_array(c) for c in probes])
+
+    def _query_all(self, queries, k):
+        if not self.trained:
+            return super()._query_all(queries, k)
+        return [self._score_candidates(query, k, self._candidates(query)) for query in queries]
+
+    def _query_filtered(self, query, k, mask):
+        # A selective filter leaves fewer rows than the probed lists would hold: scan them exactly
+        if not self.trained or mask.sum() <= self._size * self.nprobe / len(self.centroids):
+            return super()._query_filtered(query, k, mask)
+        candidates = self._candidates(query)
+        hits = self._score_candidates(query, k, candidates[mask[candidates]])
+        if len(hits) < k:  # probed lists too sparse for this filter
+            return super()._query_filtered(query, k, mask)
+        return hits
+
+    def _save_extra(self, directory: str):
+        if self.trained:
+            np.savez(os.path.join(directory, "ivf.npz"), centroids=self.centroids, assign=self._assign)
+
+    def _load_extra(self, directory: str, vectors, docs) -> bool:
+        path = os.path.join(directory, "ivf.npz")
+        if not os.path.exists(path):
+            return False
+        saved = np.load(path)
+        VectorIndex.add_many(self, docs["ids"], docs["contents"], vectors, docs["metadata"])
+        with self._lock:
+            self.centroids = saved["centroids"]
+            self._set_assignments(saved["assign"])
+        return True
+
+    def _after_bulk_load(self):
+        if self._size >= self.train_min:
+            self.train()
+
+
+class HNSWIndex(VectorIndex):
+    """
+    HNSW graph (via the optional `hnswlib` package) over the same rows.
+    Knobs: `m` / `ef_construction` shape the graph, `ef_search` trades recall for latency.
+    """
+
+    backend = "hnsw"
+
+    def __init__(self, dim: int = 384, chunk_size: int = 4096, m: int = 16, ef_construction: int = 200,
+                 ef_search: int = 64):
+        if hnswlib is None:
+            raise ImportError("VECTOR_INDEX_BACKEND=hnsw needs the `hnswlib` package (pip install hnswlib)")
+        super().__init__(dim, chunk_size)
+        self.ef_search = ef_search
+        self._graph = hnswlib.Index(space="ip", dim=dim)
+        self._graph.init_index(max_elements=chunk_size, ef_construction=ef_construction, M=m)
+        self._graph.set_ef(ef_search)
+
+    def add_many(self, ids, contents, embeddings, metadatas=None):
+        slots = super().add_many(ids, contents, embeddings, metadatas)
+        if slots:
+            with self._lock:
+                if self._size > self._graph.get_max_elements():
+                    self._graph.resize_index(self._matrix.shape[0])
+                self._graph.add_items(self._matrix[slots], np.asarray(slots))
+        return slots
+
+    def _query_all(self, queries, k, mask=None):
+        k = min(k, self._size)
+        self._graph.set_ef(max(self.ef_search, k))
+        row_filter = None if mask is None else (lambda slot: bool(mask[slot]))
+        labels, distances = self._graph.knn_query(queries, k=k, filter=row_filter)
+        # hnswlib "ip" distance is 1 - dot product
+        return [
+            [self._hit(int(slot), 1.0 - float(d)) for slot, d in zip(row_labels, row_distances)]
+            for row_labels, row_distances in zip(labels, distances)
+        ]
+
+    def _query_filtered(self, query, k, mask):
+        matches = int(mask.sum())
+        if matches <= max(k, self.ef_search) * 8:  # cheaper to scan the few matching rows
+            return super()._query_filtered(query, k, mask)
+        return self._query_all(query[None, :], min(k, matches), mask)[0]
+
+    def _save_extra(self, directory: str):
+        self._graph.save_index(os.path.join(directory, "hnsw.bin"))
+
+    def _load_extra(self, directory: str, vectors, docs) -> bool:
+        path = os.path.join(directory, "hnsw.bin")
+        if not os.path.exists(path):
+            return False
+        VectorIndex.add_many(self, docs["ids"], docs["contents"], vectors, docs["metadata"])
+        self._graph.load_index(path, max_elements=max(self._matrix.shape[0], len(vectors)))
+        self._graph.set_ef(self.ef_search)
+        return True
+
+    def _after_bulk_load(self):
+        if self._size:
+            self._graph.resize_index(max(self._matrix.shape[0], self._size))
+            self._graph.add_items(self.matrix, np.arange(self._size))
+
+
+class QuantizedIndex(VectorIndex):
+    """
+    Same API as VectorIndex, but vectors live in memory-mapped ShardStore files
+    (int8 + per-vector scale, or float16) instead of a float32 matrix on the heap.
+    Queries scan the compact codes, then re-rank the best `k * rerank` candidates
+    against the float32 copies. The store is its own persistence: constructing
+    the index on an existing directory replays the doc log and maps the shards.
+    Resident memory shrinks, disk does not: with the float32 copies a shard takes
+    1.25x (int8) / 1.5x (float16) the bytes of plain float32 vectors.
+    """
+
+    def __init__(self, dim: int = 384, chunk_size: int = 4096, path: str = "cache/vector_index",
+                 dtype: str = "int8", rerank: int = 4, shard_rows: int = 65536):
+        super().__init__(dim, chunk_size)
+        self.backend = dtype
+        self.rerank = rerank
+        self.store = ShardStore(path, dim, dtype=dtype, shard_rows=shard_rows)
+        self._restore()
+
+    def _restore(self):
+        records = sorted(self.store.read_docs().values(), key=lambda r: r["slot"])
+        if not records:
+            return
+        size = records[-1]["slot"] + 1
+        self._grow(size)
+        self.ids = [None] * size
+        self.contents = [""] * size
+        self.metadata = [{}] * size
+        for record in records:
+            slot = record["slot"]
+            self.ids[slot], self.contents[slot], self.metadata[slot] = record["id"], record["content"], record["metadata"]
+            self._slot_by_id[record["id"]] = slot
+            self._set_columns(slot, record["metadata"])
+        self._size = size
+
+    @property
+    def matrix(self):
+        return self.store.gather(np.arange(self._size), exact=True)
+
+    def _resize_vectors(self, capacity: int):
+        pass  # shards are added as rows are written (no copy), see _write_vectors
+
+    def _write_vectors(self, slots, vectors):
+        self.store.reserve(int(np.max(slots)) + 1)
+        self.store.write(slots, vectors)
+        self.store.log_docs(
+            {"id": self.ids[slot], "slot": slot, "content": self.contents[slot], "metadata": self.metadata[slot]}
+            for slot in slots
+        )
+
+    def _rerank(self, query, k, candidates):
+        """Exact float32 scores for the shortlisted slots."""
+        scores = self.store.gather(candidates, exact=True) @ query
+        return [self._hit(candidates[i], scores[i]) for i in self._top_k(scores, k)]
+
+    def _query_all(self, queries, k):
+        approx = self.store.scan(queries, self._size)
+        shortlist = min(k * self.rerank, self._size)
+        return [self._rerank(query, k, self._top_k(scores, shortlist)) for query, scores in zip(queries, approx)]
+
+    def _score_candidates(self, query, k, candidates):
+        if len(candidates) == 0:
+            return []
+        approx = self.store.gather(candidates) @ query
+        return self._rerank(query, k, candidates[self._top_k(approx, k * self.rerank)])
+
+    def save(self, directory: str):
+        if os.path.abspath(directory) == os.path.abspath(self.store.directory):
+            self.store.flush()
+        else:
+            super().save(directory)
+
+    def load(self, directory: str):
+        if os.path.abspath(directory) == os.path.abspath(self.store.directory) and len(self):
+            return True  # already mapped in __init__
+        return super().load(directory)  # import a brute/ivf/hnsw save (docs.json + vectors.npy) into shards
+
+
+def make_index(backend: str = "brute", dim: int = 384, **knobs):
+    """Build the local index for a VECTOR_INDEX_BACKEND name: brute | ivf | hnsw | int8 | float16."""
+    backends = {"brute": VectorIndex, "ivf": IVFIndex, "hnsw": HNSWIndex, "int8": QuantizedIndex, "float16": QuantizedIndex}
+    if backend not in backends:
+        raise ValueError(f"Unknown vector index backend {backend!r}; expected one of {sorted(backends)}")
+    if backends[backend] is QuantizedIndex:
+        knobs["dtype"] = backend
+    return backends[backend](dim=dim, **knobs)
+
+
+def recall_at_k(approx_hits, exact_hits) -> float:
+    """Mean fraction of the exact top-k ids that the approximate search also returned."""
+    if not exact_hits:
+        return 1.0
+    total = 0.0
+    for approx, exact in zip(approx_hits, exact_hits):
+        exact_ids = {hit[0] for hit in exact}
+        total += len(exact_ids & {hit[0] for hit in approx}) / max(1, len(exact_ids))
+    return total / len(exact_hits)
@@ -1,13 +1,205 @@
-import pathway as pw
-from . import vector_store
+# backend/vector_runtime.py
+# Long-lived Pathway pipeline: built once at startup, run in a background thread.
+# Documents stream into the KNN index through `_doc_queue`; queries stream in
+# through `_query_queue` and answers come back via `pw.io.subscribe`.
+import json
+import queue
+import threading
+import uuid
+from concurrent.futures import Future
 
-def run_query(query: str, k: int = 3):
-    """Run Pathway pipeline end-to-end and return search results."""
-    # Define the query computation
-    results = vector_store.search(query, k)
+from .vector_index import _epoch
+from .config import VECTOR_INDEX_BACKEND, HNSW_M, HNSW_EF_CONSTRUCTION, HNSW_EF_SEARCH
+
+DIMENSIONS = 384
+
+# Rows queue up here before the pipeline starts, so early inserts are buffered.
+# Pathway itself is only imported by start(), which keeps importing this module cheap.
+_doc_queue = queue.Queue()
+_query_queue = queue.Queue()
+
+_pending = {}            # request_id -> Future
+_pending_lock = threading.Lock()
+# Query rows are upserted under a reusable slot key, so the query table holds at
+# most as many rows as there were concurrent queries instead of one per query ever made
+_free_slots = []
+_slot_count = 0
+_thread = None
+_start_lock = threading.Lock()
+
+
+def _on_result(key, row, time, is_addition):
+    if not is_addition:
+        return
+    with _pending_lock:
+        future = _pending.pop(row["request_id"], None)
+    if future is not None and not future.done():
+        metadatas = [getattr(m, "value", m) for m in row["metadatas"] or ()]  # unwrap pw.Json
+        hits = list(zip(row["ids"] or (), row["contents"] or (), row["scores"] or (), metadatas))
+        future.set_result(hits)
+
+
+def _build_graph():
+    import pathway as pw
+    from pathway.internals.api import SessionType
+    from pathway.stdlib.indexing import default_brute_force_knn_document_index
+    from pathway.stdlib.indexing.nearest_neighbors import UsearchKnnFactory
+
+    class DocSchema(pw.Schema):
+        doc_id: str = pw.column_definition(primary_key=True)  # `id` is reserved by Pathway
+        content: str
+        embedding: list[float]
+        metadata: pw.Json  # {"stock", "source", "timestamp", "ts"}
+
+    class QuerySchema(pw.Schema):
+        query_id: str = pw.column_definition(primary_key=True)  # slot key, see _acquire_slot()
+        request_id: str  # unique per query; a late answer for a slot's previous query is ignored
+        embedding: list[float]
+        k: int
+        metadata_filter: str | None  # JMESPath over doc metadata, see _jmespath()
+
+    class StreamSubject(pw.io.python.ConnectorSubject):
+        """Queue-fed connector: rows sent at any time are streamed into the graph."""
+
+        def __init__(self, rows: queue.Queue):
+            super().__init__()
+            self._queue = rows
+
+        @property
+        def _session_type(self):
+            # Re-sending a primary key replaces the row instead of duplicating it
+            return SessionType.UPSERT
+
+        def run(self):
+            while True:
+                row = self._queue.get()
+                if row is None:
+                    return
+                self.next(**row)
+
+        def on_stop(self):
+            self._queue.put(None)
+
+    docs = pw.io.python.read(StreamSubject(_doc_queue), schema=DocSchema, autocommit_duration_ms=50)
+    queries = pw.io.python.read(StreamSubject(_query_queue), schema=QuerySchema, autocommit_duration_ms=10)
 
-    # Execute pipeline
-    pw.run()
+    if VECTOR_INDEX_BACKEND in ("brute", "int8", "float16"):
+        index = default_brute_force_knn_document_index(
+            data_column=docs.embedding,
+            data_table=docs,
+            dimensions=DIMENSIONS,
+            metadata_column=docs.metadata,
+        )
+    else:
+        # Approximate HNSW graph (USearch); Pathway has no IVF, so "ivf" maps here too
+        index = UsearchKnnFactory(
+            dimensions=DIMENSIONS,
+            connectivity=HNSW_M,
+            expansion_add=HNSW_EF_CONSTRUCTION,
+            expansion_search=HNSW_EF_SEARCH,
+        ).build_index(docs.embedding, docs, metadata_column=docs.metadata)
+    results = index.query_as_of_now(
+        queries.embedding,
+        number_of_matches=queries.k,
+        metadata_filter=queries.metadata_filter,
+        collapse_rows=True,
+        with_distances=True,
+    ).select(
+        request_id=pw.left.request_id,
+        ids=pw.right.doc_id,
+        contents=pw.right.content,
+        metadatas=pw.right.metadata,
+        scores=pw.right._pw_index_reply_score,
+    )
+    pw.io.subscribe(results, on_change=_on_result)
+    return pw
 
-    # Collect results into Python list
+
+def start():
+    """Build the dataflow graph once and run it in a daemon thread (idempotent)."""
+    global _thread
+    with _start_lock:
+        if _thread is not None:
+            return
+        pw = _build_graph()
+        _thread = threading.Thread(
+            target=pw.run,
+            kwargs={"monitoring_level": pw.MonitoringLevel.NONE},
+            name="pathway-runtime",
+            daemon=True,
+        )
+        _thread.start()
+        print("✅ Pathway runtime started")
+
+
+def is_running() -> bool:
+    return _thread is not None and _thread.is_alive()
+
+
+def push(rows):
+    """Stream documents ({doc_id, content, embedding, metadata}) into the index."""
+    for row in rows:
+        _doc_queue.put(row)
+
+
+def _jmespath(where) -> str | None:
+    """vector_index.Filter -> JMESPath filter the index applies before ranking."""
+    if not where:
+        return None
+    clauses = []
+    for field, wanted in (("stock", where.stock), ("source", where.source)):
+        if wanted is None:
+            continue
+        wanted = [wanted] if isinstance(wanted, str) else list(wanted)
+        clauses.append(f"contains(`{json.dumps(wanted)}`, {field})")
+    if where.since is not None:
+        clauses.append(f"ts >= `{_epoch(where.since)}`")
+    return " && ".join(clauses)
+
+
+def _acquire_slot() -> str:
+    global _slot_count
+    if _free_slots:
+        return _free_slots.pop()
+    _slot_count += 1
+    return f"q{_slot_count - 1}"
+
+
+def query_many(vectors, k: int = 3, timeout: float = 2.0, filters=None):
+    """
+    Send query vectors through the running pipeline; `filters` holds an optional Filter per vector.
+    Returns one list of (id, content, score, metadata) per vector; raises if not running or on timeout.
+    """
+    if not is_running():
+        raise RuntimeError("Pathway runtime is not running")
+    futures = []
+    rows = []
+    filters = filters or [None] * len(vectors)
+    with _pending_lock:
+        for vector, where in zip(vectors, filters):
+            slot, request_id = _acquire_slot(), uuid.uuid4().hex
+            future = Future()
+            _pending[request_id] = future
+            futures.append((slot, request_id, future))
+            rows.append({
+                "query_id": slot, "request_id": request_id,
+                "embedding": list(vector), "k": k, "metadata_filter": _jmespath(where),
+            })
+    for row in rows:
+        _query_queue.put(row)
+
+    try:
+        return [future.result(timeout=timeout) for _, _, future in futures]
+    finally:
+        with _pending_lock:
+            for slot, request_id, _ in futures:
+                _pending.pop(request_id, None)
+                _free_slots.append(slot)
+
+
+def run_query(query: str, k: int = 3):
+    """Search through the running pipeline and return (id, content) pairs."""
+    from . import vector_store
+
+    results = vector_store.search(query, k)
     return [(r[0], r[1]) for r in results]  # (id, content)
@@ -0,0 +1,137 @@
+# backend/vector_shards.py
+# Append-only, memory-mapped vector storage. Each shard holds `shard_rows`
+# quantized vectors (int8 + per-vector scale, or float16) that queries scan,
+# plus float32 copies that are only paged in to re-rank the top candidates.
+# Docs (id, slot, content, metadata) go to an append-only JSONL log; the last
+# record for an id wins, so reopening a store is a log replay + mmap, no re-embedding.
+import json
+import os
+
+import numpy as np
+
+CODE_DTYPES = {"int8": np.int8, "float16": np.float16}
+SCAN_BLOCK = 8192  # rows widened to float32 at a time while scanning
+
+
+def quantize(vectors, dtype: str = "int8"):
+    """float32 rows -> (codes, scales). int8 uses a symmetric per-vector scale; float16 is a plain cast."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if dtype == "float16":
+        return vectors.astype(np.float16), np.ones(len(vectors), dtype=np.float32)
+    scales = np.abs(vectors).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    codes = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+
+def dequantize(codes, scales):
+    return codes.astype(np.float32) * scales[:, None]
+
+
+class ShardStore:
+    def __init__(self, directory: str, dim: int, dtype: str = "int8", shard_rows: int = 65536):
+        if dtype not in CODE_DTYPES:
+            raise ValueError(f"Unknown shard dtype {dtype!r}; expected one of {sorted(CODE_DTYPES)}")
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        meta_path = os.path.join(directory, "shards.json")
+        if os.path.exists(meta_path):
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            if (meta["dim"], meta["dtype"]) != (dim, dtype):
+                raise ValueError(f"Shards in {directory} are {meta['dtype']} x {meta['dim']}, expected {dtype} x {dim}")
+            shard_rows = meta["shard_rows"]
+        else:
+            with open(meta_path, "w", encoding="utf-8") as f:
+                json.dump({"dim": dim, "dtype": dtype, "shard_rows": shard_rows}, f)
+        self.dim = dim
+        self.dtype = dtype
+        self.shard_rows = shard_rows
+        self.codes = []   # per shard: (shard_rows, dim) int8/float16 memmap
+        self.scales = []  # per shard: (shard_rows,) float32 memmap
+        self.exact = []   # per shard: (shard_rows, dim) float32 memmap, only touched for re-ranking
+        while os.path.exists(self._path(len(self.codes), "codes")):
+            self._open_shard(len(self.codes))
+        self._log = open(os.path.join(directory, "docs.jsonl"), "a", encoding="utf-8")
+
+    def _path(self, shard: int, kind: str):
+        return os.path.join(self.directory, f"shard-{shard:05d}.{kind}")
+
+    def _open_shard(self, shard: int):
+        def mapped(kind, dtype, shape):
+            path = self._path(shard, kind)
+            return np.memmap(path, dtype=dtype, mode="r+" if os.path.exists(path) else "w+", shape=shape)
+
+        self.codes.append(mapped("codes", CODE_DTYPES[self.dtype], (self.shard_rows, self.dim)))
+        self.scales.append(mapped("scale", np.float32, (self.shard_rows,)))
+        self.exact.append(mapped("f32", np.float32, (self.shard_rows, self.dim)))
+
+    @property
+    def capacity(self):
+        return len(self.codes) * self.shard_rows
+
+    def reserve(self, rows: int):
+        while self.capacity < rows:
+            self._open_shard(len(self.codes))
+
+    def write(self, slots, vectors):
+        """Store normalized float32 rows at the given slots (quantized + exact copy)."""
+        slots = np.asarray(slots)
+        codes, scales = quantize(vectors, self.dtype)
+        for shard in np.unique(slots // self.shard_rows):
+            pick = slots // self.shard_rows == shard
+            rows = slots[pick] % self.shard_rows
+            self.codes[shard][rows] = codes[pick]
+            self.scales[shard][rows] = scales[pick]
+            self.exact[shard][rows] = vectors[pick]
+
+    def gather(self, slots, exact: bool = False):
+        """float32 rows for `slots`: the exact copies, or the dequantized codes."""
+        slots = np.asarray(slots)
+        out = np.empty((len(slots), self.dim), dtype=np.float32)
+        for shard in np.unique(slots // self.shard_rows):
+            pick = slots // self.shard_rows == shard
+            rows = slots[pick] % self.shard_rows
+            out[pick] = self.exact[shard][rows] if exact else dequantize(self.codes[shard][rows], self.scales[shard][rows])
+        return out
+
+    def scan(self, queries, size: int):
+        """Approximate scores of every stored row (first `size` slots) against each query."""
+        parts = []
+        start = 0
+        while start < size:
+            shard, row = divmod(start, self.shard_rows)
+            rows = min(SCAN_BLOCK, size - start, self.shard_rows - row)
+            codes = self.codes[shard][row:row + rows].astype(np.float32)  # dequantize one block at a time
+            parts.append((queries @ codes.T) * self.scales[shard][row:row + rows])
+            start += rows
+        return np.concatenate(parts, axis=1)
+
+    def log_docs(self, records):
+        for record in records:
+            self._log.write(json.dumps(record, separators=(",", ":")) + "\n")
+        self._log.flush()
+
+    def read_docs(self):
+        """Replay the doc log: {doc_id: record}, last write wins."""
+        self._log.flush()
+        docs = {}
+        with open(os.path.join(self.directory, "docs.jsonl"), "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    docs[record["id"]] = record
+        return docs
+
+    def flush(self):
+        for arrays in (self.codes, self.scales, self.exact):
+            for array in arrays:
+                array.flush()
+        self._log.flush()
+
+    def nbytes(self):
+        """Bytes scanned per query (codes + scales) vs. kept only for re-ranking (float32)."""
+        return {
+            "scanned": sum(c.nbytes for c in self.codes) + sum(s.nbytes for s in self.scales),
+            "rerank": sum(e.nbytes for e in self.exact),
+        }
@@ -1,191 +1,274 @@
 # backend/vector_store.py
-import math
-import heapq
-import pathway as pw
-from pathway.stdlib.indexing import default_brute_force_knn_document_index
-from .embeddings import embed_text  
-from datetime import datetime
-from pymongo import MongoClient
-import os
-from dotenv import load_dotenv
 import json
-from datetime import datetime
-import os, json, time
-from .embeddings import embed_text
-
-DOCS_DIR = "stored_docs"
-os.makedirs(DOCS_DIR, exist_ok=True)
-# ------------------ MongoDB Setup ------------------
-load_dotenv()
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+from bson import ObjectId
+
+from . import db, vector_runtime
+from .embeddings import embed_text, embed_batch
+from .vector_index import Filter, Hit, make_index, _epoch
+from .write_behind import news_writer
+from .config import (
+    EMBEDDING_MODEL_TAG, EMBEDDING_DIM, LEGACY_EMBEDDING_MODEL,
+    VECTOR_INDEX_BACKEND, VECTOR_INDEX_PATH, PRELOAD_WATERMARK_LAG_MS,
+    IVF_NLIST, IVF_NPROBE, HNSW_M, HNSW_EF_CONSTRUCTION, HNSW_EF_SEARCH, VECTOR_RERANK_FACTOR,
+)
 
-MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017/")
-DB_NAME = os.getenv("MONGO_DB", "insideX")
-COLLECTION_NAME = os.getenv("MONGO_COLLECTION", "news")
+DOCS_DIR = "stored_docs"  # created on first write
 
-client = MongoClient(MONGO_URI)
-db = client[DB_NAME]
-news_collection = db[COLLECTION_NAME]
+# Shared MongoClient (one per process) lives in clients.py
 
 # ------------------ Pathway Setup ------------------
-class DocSchema(pw.Schema):
-    id: str
-    content: str
-    embedding: list[float]
-
-class MemorySubject(pw.io.python.ConnectorSubject):
-    def __init__(self):
-        super().__init__()
-        self.buffer = []
-
-    def send(self, rows):
-        self.buffer.extend(rows)
-
-    def run(self):
-        while self.buffer:
-            yield self.buffer.pop(0)
-
-subject = MemorySubject()
-
-docs = pw.io.python.read(
-    subject=subject,
-    schema=DocSchema,
-    primary_key="id",
-)
-
-index = default_brute_force_knn_document_index(
-    data_column=docs.embedding,
-    data_table=docs,
-    dimensions=384,
-    metadata_column=docs.content,
-)
-
-# Local fallback memory
-_local_docs = []  
+# The Pathway graph lives in vector_runtime and is started once by the app.
+PATHWAY_QUERY_TIMEOUT = float(os.getenv("PATHWAY_QUERY_TIMEOUT", "2.0"))
+
+# Local fallback memory (NumPy index, id -> row registry); exact or approximate per VECTOR_INDEX_BACKEND
+_INDEX_KNOBS = {
+    "brute": {},
+    "ivf": {"nlist": IVF_NLIST, "nprobe": IVF_NPROBE},
+    "hnsw": {"m": HNSW_M, "ef_construction": HNSW_EF_CONSTRUCTION, "ef_search": HNSW_EF_SEARCH},
+    "int8": {"path": VECTOR_INDEX_PATH or "cache/vector_index", "rerank": VECTOR_RERANK_FACTOR},
+    "float16": {"path": VECTOR_INDEX_PATH or "cache/vector_index", "rerank": VECTOR_RERANK_FACTOR},
+}
+_local_index = None
+_index_lock = threading.Lock()
+# int8/float16 exist to shrink resident memory per doc; mirroring them into Pathway would keep a
+# boxed list[float] per doc in its index again, so those backends are served by the shards alone
+PATHWAY_MIRROR = VECTOR_INDEX_BACKEND not in ("int8", "float16")
+
+
+def local_index():
+    """The process-wide local index, built on first use (int8/float16 map their shards here)."""
+    global _local_index
+    if _local_index is None:
+        with _index_lock:
+            if _local_index is None:
+                _local_index = make_index(
+                    VECTOR_INDEX_BACKEND, dim=EMBEDDING_DIM, **_INDEX_KNOBS.get(VECTOR_INDEX_BACKEND, {})
+                )
+    return _local_index
 
 # ------------------ Helpers ------------------
-def _cosine(a, b):
-    dot = 0.0
-    na = 0.0
-    nb = 0.0
-    for x, y in zip(a, b):
-        dot += x * y
-        na += x * x
-        nb += y * y
-    if na == 0 or nb == 0:
-        return 0.0
-    return dot / (math.sqrt(na) * math.sqrt(nb))
-
-def _local_search_vector(vector, k):
-    heap = []
-    for doc in _local_docs:
-        score = _cosine(vector, doc["embedding"])
-        heap.append((score, doc["id"], doc["content"]))
-    top = heapq.nlargest(k, heap, key=lambda x: x[0])
-    return [(doc_id, content, float(score)) for (score, doc_id, content) in top]
+def _metadata(stock: str, source: str, timestamp) -> dict:
+    if isinstance(timestamp, datetime):
+        timestamp = timestamp.isoformat()
+    # "ts" (epoch seconds) lets Pathway's JMESPath metadata_filter compare times numerically
+    ts = _epoch(timestamp)
+    return {"stock": stock, "source": source, "timestamp": timestamp, "ts": None if np.isnan(ts) else ts}
+
+def _index_docs(rows):
+    """Stream rows ({doc_id, content, embedding, metadata}) into Pathway and the local index."""
+    if not rows:
+        return
+    if PATHWAY_MIRROR:
+        vector_runtime.push(rows)
+    local_index().add_many(
+        [r["doc_id"] for r in rows],
+        [r["content"] for r in rows],
+        [r["embedding"] for r in rows],
+        [r["metadata"] for r in rows],
+    )
+
+def load_index():
+    """Restore the local index saved at VECTOR_INDEX_PATH and stream it into Pathway (int8/float16: only map the shards)."""
+    if not VECTOR_INDEX_PATH or not local_index().load(VECTOR_INDEX_PATH):
+        return 0
+    index = local_index()
+    if PATHWAY_MIRROR:
+        vector_runtime.push([
+            {"doc_id": doc_id, "content": content, "embedding": vector.tolist(), "metadata": metadata or {}}
+            for doc_id, content, vector, metadata in zip(index.ids, index.contents, index.matrix, index.metadata)
+        ])
+    print(f"✅ Loaded {len(index)} vectors ({index.backend}) from {VECTOR_INDEX_PATH}")
+    return len(index)
+
+def save_index():
+    """Persist the local index (vectors, docs and the IVF lists / HNSW graph) for the next start."""
+    if VECTOR_INDEX_PATH and _local_index is not None and len(_local_index):
+        _local_index.save(VECTOR_INDEX_PATH)
 
 # ------------------ Public API ------------------
 def add_document(stock: str, text: str, source: str = "perplexity"):
     """
     Add a document to MongoDB, Pathway, and local fallback memory.
+    Returns the new document id.
     """
     vector = embed_text(text)
+    timestamp = datetime.utcnow()
 
-    # Save to MongoDB
-    news_collection.insert_one({
+    # Save to MongoDB (write-behind: batched insert off the request path)
+    object_id = ObjectId()
+    news_writer.put({
+        "_id": object_id,
         "stock": stock,
         "analysis": text,
-        "embedding": vector,
+        "embedding": db.pack_vector(vector),
+        "embedding_model": EMBEDDING_MODEL_TAG,
         "source": source,
-        "timestamp": datetime.utcnow()
+        "timestamp": timestamp
     })
+    doc_id = str(object_id)
 
-    # Save to Pathway
-    subject.send([{"id": stock, "content": text, "embedding": vector}])
+    # Stream into Pathway + local fallback
+    _index_docs([{
+        "doc_id": doc_id,
+        "content": text,
+        "embedding": vector,
+        "metadata": _metadata(stock, source, timestamp),
+    }])
+    return doc_id
 
-    # Save to local fallback
-    _local_docs.append({"id": stock, "content": text, "embedding": vector})
 
-    pw.run()
+def search(query: str, k: int = 3, stock=None, since=None, source=None):
+    """
+    Search Pathway index first, fallback to local cosine search if needed.
+    `stock` / `source` (one value or a list) and `since` (datetime) restrict
+    the candidates inside the index, before ranking.
+    """
+    return search_many([query], k, where=Filter(stock, source, since))[0]
 
 
-def search(query: str, k: int = 3):
+def search_many(queries: list[str], k: int = 3, where=None):
     """
-    Search Pathway index first, fallback to local cosine search if needed.
+    Search several queries at once: one embedding batch, one index pass.
+    `where` is a Filter for all queries or a list of one Filter per query.
+    Returns one list of (id, content, score) per query, in input order.
     """
-    vector = embed_text(query)
+    return [[hit[:3] for hit in hits] for hits in search_hits(queries, k, where)]
 
-    query_table = pw.debug.table_from_rows(
-        schema=DocSchema,
-        rows=[("q1", query, vector)],
-    )
+
+def search_hits(queries: list[str], k: int = 3, where=None):
+    """
+    Like search_many, but each result is a Hit(id, content, score, metadata)
+    carrying the stock/source/timestamp stored with the document.
+    """
+    if not queries:
+        return []
+    vectors = embed_batch(queries)
+    filters = where if isinstance(where, list) else [where] * len(queries)
+    if not PATHWAY_MIRROR:
+        return local_index().query(vectors, k, filters)
 
     try:
-        neighbors = index.query(query_table.embedding)
-        pw.run()
-        results = []
-        for row in neighbors.as_rows():
-            try:
-                doc_meta = row[1]
-                distance = float(row[2])
-                doc_id = None
-                for d in _local_docs:
-                    if d["content"] == doc_meta:
-                        doc_id = d["id"]
-                        break
-                results.append((doc_id if doc_id else doc_meta, doc_meta, distance))
-            except Exception:
-                continue
-        if results:
-            return results[:k]
+        answers = vector_runtime.query_many(vectors, k, timeout=PATHWAY_QUERY_TIMEOUT, filters=filters)
+        results = [
+            [Hit(doc_id, content, float(score), metadata or {}) for doc_id, content, score, metadata in hits][:k]
+            for hits in answers
+        ]
+        if all(results):
+            return results
         raise RuntimeError("Pathway returned no results, falling back.")
     except NotImplementedError:
-        return _local_search_vector(vector, k)
+        return local_index().query(vectors, k, filters)
     except Exception:
-        return _local_search_vector(vector, k)
+        return local_index().query(vectors, k, filters)
 
 
-def get_news(stock: str, limit: int = 20):
+def get_news(stock: str, limit: int = 20, since: datetime = None):
     """
-    Fetch last N docs for a stock from MongoDB.
+    Fetch docs for a stock from MongoDB (text + embedding only): the last N,
+    or with `since` every doc from that timestamp on.
     """
-    return list(
-        news_collection.find({"stock": stock})
-        .sort("_id", -1)  # latest first
-        .limit(limit)
-    )
+    return db.get_news_vectors(stock, limit=limit, since=since)
 
 
-def preload_from_mongo(stock: str, limit: int = 20):
+def get_news_many(stocks: list[str], limit: int = 20, since: dict = None):
     """
-    Preload last N news docs from Mongo into Pathway memory.
+    Fetch last N docs for each of several stocks (one bounded query per stock).
+    Returns a flat list of docs.
     """
-    docs = get_news(stock, limit=limit)
+    return db.get_news_vectors_many(stocks, limit=limit, since=since)
+
+
+# Per-stock high-water mark: newest Mongo timestamp already loaded into the index
+_watermarks = {}
+_watermark_locks = {}
+_watermark_guard = threading.Lock()
+
+
+def _stock_lock(stock: str):
+    with _watermark_guard:
+        return _watermark_locks.setdefault(stock, threading.Lock())
+
+
+def _read_from(stock: str):
+    """Where the next incremental read starts: the watermark, held back by the write-behind lag."""
+    watermark = _watermarks.get(stock)
+    return None if watermark is None else watermark - timedelta(milliseconds=PRELOAD_WATERMARK_LAG_MS)
+
+
+def _advance_watermarks(docs):
     for doc in docs:
-        vector = embed_text(doc["analysis"])
-        subject.send([{
-            "id": str(doc["_id"]),
+        stock, timestamp = doc.get("stock"), doc.get("timestamp")
+        if stock is None or not isinstance(timestamp, datetime):
+            continue
+        if stock not in _watermarks or timestamp > _watermarks[stock]:
+            _watermarks[stock] = timestamp
+
+
+def _stored_vector(doc):
+    """Return the doc's stored embedding if it was made by the current model, else None."""
+    if doc.get("embedding_model", LEGACY_EMBEDDING_MODEL) != EMBEDDING_MODEL_TAG:
+        return None
+    vector = db.unpack_vector(doc.get("embedding"))
+    if vector is None or len(vector) != EMBEDDING_DIM:
+        return None
+    return vector
+
+
+def _preload_docs(docs, default_stock: str = None):
+    """
+    Index Mongo news docs not already in memory. Stored embeddings are loaded
+    as-is; only docs from another model (or without a vector) are re-embedded, in one batch.
+    """
+    docs = [doc for doc in docs if doc.get("analysis") and str(doc["_id"]) not in local_index()]
+    vectors = [_stored_vector(doc) for doc in docs]
+    stale = [i for i, v in enumerate(vectors) if v is None]
+    if stale:
+        for i, vector in zip(stale, embed_batch([docs[i]["analysis"] for i in stale])):
+            vectors[i] = vector
+    _index_docs([
+        {
+            "doc_id": str(doc["_id"]),
             "content": doc["analysis"],
-            "embedding": vector
-        }])
-    pw.run()
+            "embedding": vector,
+            "metadata": _metadata(doc.get("stock", default_stock), doc.get("source", "perplexity"), doc.get("timestamp")),
+        }
+        for doc, vector in zip(docs, vectors)
+    ])
 
-DOCS_DIR = "stored_docs"
-os.makedirs(DOCS_DIR, exist_ok=True)
 
-def store_full_doc(stock: str, doc: dict):
+def preload_from_mongo(stock: str, limit: int = 20):
     """
-    Save the entire news document locally as JSON.
-    Filename format: stored_docs/{stock}_{timestamp}.json
+    Preload news docs from Mongo into Pathway memory: the last N on first call,
+    then every doc at/after the stock's watermark (held back by PRELOAD_WATERMARK_LAG_MS
+    for write-behind stragglers). Docs already indexed are skipped; safe to call concurrently.
     """
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"{DOCS_DIR}/{stock}_{timestamp}.json"
+    with _stock_lock(stock):
+        docs = get_news(stock, limit=limit, since=_read_from(stock))
+        _preload_docs(docs, default_stock=stock)
+        _advance_watermarks(docs)
+
 
+def preload_many_from_mongo(stocks: list[str], limit: int = 20):
+    """
+    Incremental preload for several stocks with one bounded Mongo query per stock and one embedding batch.
+    """
+    stocks = sorted(set(stocks))  # fixed lock order
+    locks = [_stock_lock(stock) for stock in stocks]
+    for lock in locks:
+        lock.acquire()
     try:
-        with open(filename, "w", encoding="utf-8") as f:
-            json.dump(doc, f, ensure_ascii=False, indent=2)
-        print(f"📄 Saved full document: {filename}")
-    except Exception as e:
-        print(f"❌ Failed to save full document: {e}")
+        docs = get_news_many(stocks, limit=limit, since={s: _read_from(s) for s in stocks if s in _watermarks})
+        _preload_docs(docs)
+        _advance_watermarks(docs)
+    finally:
+        for lock in reversed(locks):
+            lock.release()
 
 def store_full_doc(stock: str, raw_response: dict):
     """Save full Perplexity response as JSON locally."""
@@ -193,39 +276,65 @@ def store_full_doc(stock: str, raw_response: dict):
     filename = f"{stock}_{timestamp}.json"
     filepath = os.path.join(DOCS_DIR, filename)
 
+    os.makedirs(DOCS_DIR, exist_ok=True)
     with open(filepath, "w", encoding="utf-8") as f:
-        json.dump(raw_response, f, indent=2)
+        json.dump(raw_response, f, separators=(",", ":"))
 
     print(f"📁 Saved full doc: {filepath}")
     return filepath
 
 
+def _sidecar_path(path: str) -> str:
+    """Vector file stored next to a local JSON doc, tagged with the embedding model."""
+    model_tag = EMBEDDING_MODEL_TAG.replace("/", "__")
+    return f"{os.path.splitext(path)[0]}.{model_tag}.npy"
+
+
+def _load_or_embed(path: str, analysis: str):
+    sidecar = _sidecar_path(path)
+    if os.path.exists(sidecar):
+        vector = np.load(sidecar)
+        if vector.shape == (EMBEDDING_DIM,):
+            return vector.tolist()
+    vector = embed_text(analysis)
+    try:
+        np.save(sidecar, np.asarray(vector, dtype=np.float32))
+    except OSError as e:
+        print(f"⚠️ Failed to write vector sidecar {sidecar}: {e}")
+    return vector
+
+
 def preload_from_local(stock: str, limit: int = 5):
     """
     Reload last N locally saved JSON docs into Pathway memory.
-    Only extracts 'analysis' text from stored JSON.
+    Only extracts 'analysis' text from stored JSON; vectors come from the
+    sidecar .npy file when present, so each file is embedded at most once.
     """
+    if not os.path.isdir(DOCS_DIR):
+        return
     files = sorted(
-        [f for f in os.listdir(DOCS_DIR) if f.startswith(stock)],
+        [f for f in os.listdir(DOCS_DIR) if f.startswith(stock) and f.endswith(".json")],
         reverse=True
     )[:limit]
 
+    rows = []
     for f in files:
+        if f in local_index():
+            continue  # already indexed (filename is the doc id)
         path = os.path.join(DOCS_DIR, f)
         try:
             with open(path, "r", encoding="utf-8") as infile:
                 raw = json.load(infile)
                 analysis = raw["choices"][0]["message"]["content"]
 
-                # embed + push into Pathway
-                vector = embed_text(analysis)
-                subject.send([{
-                    "id": f,  # filename as ID
+                rows.append({
+                    "doc_id": f,  # filename as ID
                     "content": analysis,
-                    "embedding": vector
-                }])
+                    "embedding": _load_or_embed(path, analysis),
+                    "metadata": _metadata(stock, "local", datetime.fromtimestamp(os.path.getmtime(path), tz=timezone.utc)),
+                })
         except Exception as e:
             print(f"⚠️ Failed to preload {f}: {e}")
 
-    pw.run()
-    print(f"✅ Preloaded {len(files)} local docs into Pathway for {stock}")
\ No newline at end of file
+    _index_docs(rows)
+    print(f"✅ Preloaded {len(rows)} new local docs into Pathway for {stock}")
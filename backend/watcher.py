@@ -0,0 +1,237 @@
+# backend/watcher.py
+# Event-driven analysis: poll 1-minute bars for a watchlist, push every new bar
+# through the vectorized AnomalyDetector, and queue an LLM analysis only for
+# tickers that trip it. Finished reports are kept in `results` so /analyze can
+# answer from them instead of running Perplexity + Claude on the request path.
+import asyncio
+import heapq
+import itertools
+import time
+
+import numpy as np
+
+from . import data_ingest
+from .anomaly import AnomalyDetector
+from .config import WATCH_COOLDOWN, WATCH_CONCURRENCY, WATCH_INTERVAL, WATCH_RESULT_TTL, WATCH_RETRY_BACKOFF
+from .llm import _is_answer
+
+
+class JobQueue:
+    """
+    Priority queue of tickers to analyze. A ticker is queued at most once (a
+    higher-priority trigger bumps it), never while its job is running, and not
+    again until `cooldown` seconds after its last analysis finished (only
+    `retry_backoff` seconds when that analysis failed).
+    """
+
+    def __init__(self, cooldown: float = 900.0, retry_backoff: float = 60.0, clock=time.monotonic):
+        self.cooldown = cooldown
+        self.retry_backoff = retry_backoff
+        self.clock = clock
+        self._heap = []          # (-priority, seq, ticker)
+        self._queued = {}        # ticker -> (priority, seq, trigger) of the live heap entry
+        self._running = set()
+        self._blocked_until = {}
+        self._seq = itertools.count()
+        self._ready = asyncio.Event()
+        self.pushed = 0
+        self.deduped = 0
+        self.cooled_down = 0
+        self.done_count = 0
+        self.failed_count = 0
+
+    def __len__(self):
+        return len(self._queued)
+
+    def push(self, ticker: str, priority: float, trigger: dict = None) -> bool:
+        """Queue a ticker; returns False when deduped or still cooling down."""
+        if ticker in self._running:
+            self.deduped += 1
+            return False
+        if self.clock() < self._blocked_until.get(ticker, float("-inf")):
+            self.cooled_down += 1
+            return False
+        current = self._queued.get(ticker)
+        if current is not None:
+            self.deduped += 1
+            if priority <= current[0]:
+                return False
+        seq = next(self._seq)
+        self._queued[ticker] = (priority, seq, trigger)
+        heapq.heappush(self._heap, (-priority, seq, ticker))
+        self.pushed += 1
+        self._ready.set()
+        return True
+
+    def pop_nowait(self):
+        """Highest-priority (ticker, trigger), or None; stale heap entries are skipped."""
+        while self._heap:
+            _, seq, ticker = heapq.heappop(self._heap)
+            entry = self._queued.get(ticker)
+            if entry is None or entry[1] != seq:
+                continue
+            del self._queued[ticker]
+            self._running.add(ticker)
+            return ticker, entry[2]
+        self._ready.clear()
+        return None
+
+    async def pop(self):
+        while True:
+            job = self.pop_nowait()
+            if job is not None:
+                return job
+            await self._ready.wait()
+
+    def done(self, ticker: str, ok: bool = True):
+        self._running.discard(ticker)
+        self._blocked_until[ticker] = self.clock() + (self.cooldown if ok else self.retry_backoff)
+        self.done_count += 1
+        if not ok:
+            self.failed_count += 1
+
+    def stats(self):
+        return {
+            "queued": len(self._queued),
+            "running": len(self._running),
+            "pushed": self.pushed,
+            "deduped": self.deduped,
+            "cooled_down": self.cooled_down,
+            "done": self.done_count,
+            "failed": self.failed_count,
+        }
+
+
+class ResultStore:
+    """Latest analysis per ticker, served while younger than `ttl` seconds."""
+
+    def __init__(self, ttl: float = 3600.0, clock=time.time):
+        self.ttl = ttl
+        self.clock = clock
+        self._items = {}
+
+    @staticmethod
+    def _key(ticker: str) -> str:
+        return ticker.strip().upper()  # WATCHLIST is upper-cased; requests may not be
+
+    def put(self, ticker: str, result: dict, trigger: dict = None):
+        self._items[self._key(ticker)] = {"result": result, "trigger": trigger, "analyzed_at": self.clock()}
+
+    def get(self, ticker: str):
+        entry = self._items.get(self._key(ticker))
+        if entry is None or self.clock() - entry["analyzed_at"] > self.ttl:
+            return None
+        return entry
+
+    def tickers(self):
+        return sorted(t for t in self._items if self.get(t) is not None)
+
+
+def _priority(anomaly: dict) -> float:
+    """Bigger surprises first: the strongest of z-score, % move and volume multiple."""
+    return max(abs(anomaly["zscore"]), abs(anomaly["change"]), anomaly["volume_ratio"])
+
+
+results = ResultStore(ttl=WATCH_RESULT_TTL)
+
+
+class Watcher:
+    def __init__(self, tickers: list[str], analyze, interval: float = WATCH_INTERVAL,
+                 concurrency: int = WATCH_CONCURRENCY, cooldown: float = WATCH_COOLDOWN,
+                 retry_backoff: float = WATCH_RETRY_BACKOFF, detector: AnomalyDetector = None, store: ResultStore = None):
+        self.tickers = list(dict.fromkeys(tickers))
+        self.analyze = analyze  # async fn(ticker) -> report dict
+        self.interval = interval
+        self.concurrency = concurrency
+        self.detector = detector or AnomalyDetector()
+        self.queue = JobQueue(cooldown=cooldown, retry_backoff=retry_backoff)
+        self.results = store if store is not None else results
+        self._tasks = []
+        self.primed = False
+        self.polls = 0
+        self.bars_seen = 0
+        self.errors = 0
+
+    def _new_bars(self):
+        """Refresh the bar cache and return every bar newer than before, in time order."""
+        cache = data_ingest.get_bar_cache()
+        marks = {ticker: cache.watermark(ticker) for ticker in self.tickers}
+        data_ingest.refresh_bars(self.tickers)
+        tickers, ts, closes, volumes = [], [], [], []
+        for ticker in self.tickers:
+            bars = cache.bars(ticker, since=marks[ticker])
+            tickers.extend([ticker] * len(bars))
+            ts.append(bars["ts"])
+            closes.append(bars["close"])
+            volumes.append(bars["volume"])
+        if not tickers:
+            return [], np.zeros(0), np.zeros(0)
+        order = np.argsort(np.concatenate(ts), kind="stable")
+        return [tickers[i] for i in order], np.concatenate(closes)[order], np.concatenate(volumes)[order]
+
+    async def poll_once(self):
+        """
+        One ingestion step: new bars -> detector -> queue analyses for the tickers that fired.
+        The first poll only primes the detector: on a cold cache it replays the day's
+        history, and old moves must not each start a paid analysis.
+        """
+        tickers, closes, volumes = await asyncio.to_thread(self._new_bars)
+        self.polls += 1
+        self.bars_seen += len(tickers)
+        anomalies = self.detector.update(tickers, closes, volumes) if tickers else []
+        if not self.primed:
+            self.primed = True
+            return []
+        for anomaly in anomalies:
+            self.queue.push(anomaly["ticker"], _priority(anomaly), anomaly)
+        return anomalies
+
+    async def _poll_loop(self):
+        while True:
+            try:
+                await self.poll_once()
+            except Exception as e:
+                self.errors += 1
+                print(f"⚠️ Watcher poll failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    async def _worker(self):
+        while True:
+            ticker, trigger = await self.queue.pop()
+            ok = False
+            try:
+                result = await self.analyze(ticker)
+                # analyze_stock_async reports provider failures in the result instead of raising
+                ok = _is_answer(result.get("final_report")) and result.get("threat_score") is not None
+                if ok:
+                    self.results.put(ticker, result, trigger)
+                else:
+                    self.errors += 1
+                    print(f"❌ Watcher analysis failed for {ticker}: {result.get('final_report')}")
+            except Exception as e:
+                self.errors += 1
+                print(f"❌ Watcher analysis failed for {ticker}: {e}")
+            finally:
+                self.queue.done(ticker, ok)
+
+    def start(self):
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._poll_loop())]
+            self._tasks += [asyncio.create_task(self._worker()) for _ in range(max(1, self.concurrency))]
+            print(f"✅ Watching {len(self.tickers)} tickers every {self.interval}s")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def stats(self):
+        return {
+            "tickers": len(self.tickers),
+            "polls": self.polls,
+            "bars_seen": self.bars_seen,
+            "errors": self.errors,
+            "queue": self.queue.stats(),
+            "analyzed": self.results.tickers(),
+        }
@@ -0,0 +1,143 @@
+# backend/write_behind.py
+import atexit
+import queue
+import threading
+import time
+
+from pymongo.errors import BulkWriteError, PyMongoError
+
+from .clients import get_news_collection
+from .config import MONGO_WRITE_BATCH, MONGO_WRITE_INTERVAL_MS, MONGO_WRITE_MAX_PENDING, MONGO_WRITE_RETRIES
+
+
+class WriteBehindQueue:
+    """
+    Buffers Mongo inserts off the request path and writes them with
+    insert_many(ordered=False), flushing every `max_batch` docs or `interval_ms`.
+    The buffer is bounded: when it is full, put() blocks (backpressure) for up
+    to `put_timeout` seconds and then falls back to a direct insert.
+    A batch that fails (e.g. Mongo briefly unreachable) is retried up to `retries`
+    times with exponential backoff before its documents are counted as errors.
+    """
+
+    def __init__(self, get_collection, max_batch: int = 100, interval_ms: float = 200,
+                 max_pending: int = 10_000, put_timeout: float = 5.0, retries: int = 5, retry_backoff: float = 0.5):
+        self.get_collection = get_collection
+        self.max_batch = max_batch
+        self.retries = retries
+        self.retry_backoff = retry_backoff
+        self.interval = interval_ms / 1000.0
+        self.put_timeout = put_timeout
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._stop = threading.Event()
+        self._worker = None
+        self._lock = threading.Lock()
+        self.written = 0
+        self.batches = 0
+        self.errors = 0
+        self.retried = 0
+        self.direct_writes = 0
+
+    def _ensure_worker(self):
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._stop.clear()
+                self._worker = threading.Thread(target=self._run, name="mongo-write-behind", daemon=True)
+                self._worker.start()
+
+    def put(self, doc: dict):
+        """Queue one document for insertion (assign `_id` beforehand if the caller needs it)."""
+        self._ensure_worker()
+        try:
+            self._queue.put(doc, timeout=self.put_timeout)
+        except queue.Full:
+            print("⚠️ Mongo write-behind queue full, writing directly")
+            self.get_collection().insert_one(doc)
+            self.direct_writes += 1
+
+    def _insert(self, batch, attempt: int):
+        """One insert_many; returns the docs still to write (empty when done)."""
+        try:
+            self.get_collection().insert_many(batch, ordered=False)
+            self.written += len(batch)
+        except BulkWriteError as e:
+            errors = e.details.get("writeErrors", [])
+            # On a retry, duplicate _ids are docs the failed attempt had already written
+            dupes = sum(1 for err in errors if err.get("code") == 11000) if attempt else 0
+            self.written += e.details.get("nInserted", 0) + dupes
+            self.errors += len(errors) - dupes
+            if len(errors) > dupes:
+                print(f"⚠️ Mongo bulk write partially failed: {len(errors) - dupes} errors")
+        except PyMongoError as e:
+            if attempt >= self.retries:
+                self.errors += len(batch)
+                print(f"❌ Mongo bulk write failed, dropping {len(batch)} docs: {e}")
+            else:
+                print(f"⚠️ Mongo bulk write failed (attempt {attempt + 1}), retrying: {e}")
+                return batch
+        return []
+
+    def _write(self, batch):
+        try:
+            pending, attempt = batch, 0
+            while pending:
+                if attempt:
+                    self.retried += 1
+                    time.sleep(min(self.retry_backoff * 2 ** (attempt - 1), 30.0))
+                pending = self._insert(pending, attempt)
+                attempt += 1
+        finally:
+            self.batches += 1
+            for _ in batch:
+                self._queue.task_done()
+
+    def _run(self):
+        while not (self._stop.is_set() and self._queue.empty()):
+            try:
+                batch = [self._queue.get(timeout=self.interval)]
+            except queue.Empty:
+                continue
+            deadline = time.monotonic() + self.interval
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._write(batch)
+
+    def flush(self):
+        """Block until everything queued so far has been written."""
+        if self._worker is not None and self._worker.is_alive():
+            self._queue.join()
+
+    def close(self):
+        """Flush pending writes and stop the worker (app shutdown)."""
+        self.flush()
+        self._stop.set()
+        if self._worker is not None:
+            self._worker.join(timeout=self.interval * 2 + 1)
+
+    def stats(self):
+        return {
+            "pending": self._queue.qsize(),
+            "written": self.written,
+            "batches": self.batches,
+            "errors": self.errors,
+            "retried": self.retried,
+            "direct_writes": self.direct_writes,
+        }
+
+
+news_writer = WriteBehindQueue(
+    get_news_collection,
+    max_batch=MONGO_WRITE_BATCH,
+    interval_ms=MONGO_WRITE_INTERVAL_MS,
+    max_pending=MONGO_WRITE_MAX_PENDING,
+    retries=MONGO_WRITE_RETRIES,
+)
+atexit.register(news_writer.close)
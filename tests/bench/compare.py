@@ -0,0 +1,46 @@
+# Compare two benchmark JSON files (from tests/bench) and flag regressions.
+#   python tests/bench/compare.py bench/base.json bench/new.json [--threshold 0.2]
+import argparse
+import json
+import sys
+
+
+def _key(result):
+    return result["name"], json.dumps(result["params"], sort_keys=True)
+
+
+def compare(base: dict, new: dict, threshold: float = 0.2):
+    """Rows of (name, params, base_ms, new_ms, ratio, status) for benchmarks present in both runs."""
+    before = {_key(r): r for r in base["results"]}
+    rows = []
+    for result in new["results"]:
+        old = before.get(_key(result))
+        if old is None:
+            continue
+        ratio = result["median_ms"] / old["median_ms"] if old["median_ms"] else float("inf")
+        status = "slower" if ratio > 1 + threshold else "faster" if ratio < 1 / (1 + threshold) else "same"
+        rows.append((result["name"], result["params"], old["median_ms"], result["median_ms"], ratio, status))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files")
+    parser.add_argument("base")
+    parser.add_argument("new")
+    parser.add_argument("--threshold", type=float, default=0.2, help="relative change counted as a regression")
+    args = parser.parse_args()
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.new) as f:
+        new = json.load(f)
+
+    rows = compare(base, new, args.threshold)
+    print(f"{base.get('commit')} -> {new.get('commit')}")
+    for name, params, old_ms, new_ms, ratio, status in rows:
+        mark = {"slower": "❌", "faster": "✅", "same": "  "}[status]
+        print(f"{mark} {name:<24} {json.dumps(params):<60} {old_ms:>10.3f} -> {new_ms:>10.3f} ms  x{ratio:.2f}")
+    sys.exit(1 if any(row[-1] == "slower" for row in rows) else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+# Benchmark suite: opt-in, fully offline. Mongo is mongomock, Perplexity /
+# Anthropic are fake clients, the embedder is a deterministic fake, so the
+# numbers measure our code, not the network or the model.
+#   BENCH=1 python -m pytest -q tests/bench
+#   BENCH=1 BENCH_SIZES=1000,10000,100000,1000000 BENCH_OUTPUT=bench/base.json python -m pytest -q tests/bench
+#   python tests/bench/compare.py bench/base.json bench/new.json
+import hashlib
+import json
+import os
+import platform
+import statistics
+import subprocess
+import time
+import types
+
+import mongomock
+import numpy as np
+import pytest
+
+from backend import clients, embeddings
+from backend.limits import AsyncRateLimiter, provider_limits
+from backend.config import EMBEDDING_DIM
+from backend.embedding_cache import EmbeddingCache
+
+if not os.getenv("BENCH"):
+    collect_ignore_glob = ["test_*.py"]
+
+MIN_TIME = float(os.getenv("BENCH_MIN_TIME", "0.2"))  # seconds of calls per timed round
+ROUNDS = int(os.getenv("BENCH_ROUNDS", "5"))
+
+_results = []
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return None
+
+
+def pytest_sessionfinish(session, exitstatus):
+    if not _results:
+        return
+    commit = _git_commit()
+    path = os.getenv("BENCH_OUTPUT") or os.path.join("bench", f"{commit or 'results'}.json")
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        json.dump({
+            "commit": commit,
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": f"{platform.system()} {platform.machine()} ({os.cpu_count()} cpus)",
+            "results": _results,
+        }, f, indent=2)
+    print(f"\n📊 Wrote {len(_results)} benchmark results to {path}")
+
+
+def _calibrate(fn):
+    """Calls per round so one round takes about MIN_TIME."""
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= MIN_TIME or number >= 1 << 20:
+            return number
+        number *= 2 if elapsed <= 0 else max(2, min(10, int(MIN_TIME / elapsed) + 1))
+
+
+@pytest.fixture
+def bench(request):
+    """
+    bench(name, fn, items=1, **params): time fn() over ROUNDS rounds and record
+    per-call latency plus items/sec (items = units of work per call).
+    """
+
+    def run(name, fn, items: int = 1, number: int = None, **params):
+        fn()  # warm caches / lazy init outside the timing
+        number = number or _calibrate(fn)
+        times = []
+        for _ in range(ROUNDS):
+            start = time.perf_counter()
+            for _ in range(number):
+                fn()
+            times.append((time.perf_counter() - start) / number)
+        result = {
+            "name": name,
+            "test": request.node.nodeid,
+            "params": params,
+            "calls": number * ROUNDS,
+            "min_ms": round(min(times) * 1000, 4),
+            "median_ms": round(statistics.median(times) * 1000, 4),
+            "mean_ms": round(statistics.fmean(times) * 1000, 4),
+            "ops_per_s": round(items / statistics.median(times), 1),
+        }
+        _results.append(result)
+        print(f"⏱️ {name} {params or ''}: {result['median_ms']} ms/call, {result['ops_per_s']} ops/s")
+        return result
+
+    return run
+
+
+# ------------------ Stubs ------------------
+class FakeEmbedder:
+    """Deterministic unit vectors seeded by the text hash; same encode() contract as SentenceTransformer."""
+
+    def __init__(self, dim: int = EMBEDDING_DIM):
+        self.dim = dim
+        self.texts = 0
+
+    def encode(self, texts, convert_to_numpy: bool = True):
+        texts = list(texts)
+        self.texts += len(texts)
+        out = np.empty((len(texts), self.dim), dtype=np.float32)
+        for i, text in enumerate(texts):
+            seed = int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "little")
+            out[i] = np.random.default_rng(seed).standard_normal(self.dim)
+        out /= np.linalg.norm(out, axis=1, keepdims=True)
+        return out
+
+
+class FakeResponse:
+    def __init__(self, payload):
+        self._payload = payload
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self._payload
+
+
+class FakeAsyncHttp:
+    """Stands in for the shared httpx.AsyncClient: answers Perplexity chat completions."""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def post(self, url, headers=None, json=None, timeout=None):
+        self.calls += 1
+        query = json["messages"][-1]["content"]
+        return FakeResponse({"choices": [{"message": {"content": f"No anomalies found for: {query}"}}]})
+
+    async def aclose(self):
+        pass
+
+
+class FakeAsyncAnthropic:
+    """Stands in for AsyncAnthropic: report prompts get bullets, threat prompts get a score."""
+
+    def __init__(self):
+        self.calls = 0
+        self.messages = self
+
+    async def create(self, **request):
+        self.calls += 1
+        prompt = request["messages"][-1]["content"]
+        text = "Score: 3\nReason: nothing unusual" if "Score" in prompt else "- No anomaly found (https://example.com)"
+        return types.SimpleNamespace(content=[types.SimpleNamespace(text=text)])
+
+
+@pytest.fixture
+def fake_embedder(monkeypatch):
+    embedder = FakeEmbedder()
+    monkeypatch.setattr(embeddings, "embedding_model", embedder)
+    monkeypatch.setattr(embeddings, "embedding_cache", EmbeddingCache("bench", max_items=1_000_000))
+    return embedder
+
+
+@pytest.fixture
+def mongo(monkeypatch):
+    client = mongomock.MongoClient()
+    monkeypatch.setitem(clients._clients, "mongo", client)
+    return clients.get_news_collection()
+
+
+@pytest.fixture
+def providers(monkeypatch):
+    http, anthropic = FakeAsyncHttp(), FakeAsyncAnthropic()
+    monkeypatch.setitem(clients._clients, "async_http", http)
+    monkeypatch.setitem(clients._clients, "async_anthropic", anthropic)
+    for name in provider_limits:  # keep the limiter on the path, but never throttle
+        monkeypatch.setitem(provider_limits, name, AsyncRateLimiter(1e9, burst=1_000_000))
+    return http, anthropic
+
+
+@pytest.fixture
+def fresh_index(monkeypatch):
+    """Empty in-process index, no Pathway runtime (search uses the local fallback)."""
+    from backend import vector_runtime, vector_store
+
+    monkeypatch.setattr(vector_runtime, "push", lambda rows: None)  # nothing drains the queue without the runtime
+    monkeypatch.setattr(vector_store, "_local_index", None)
+    monkeypatch.setattr(vector_store, "_watermarks", {})
+    return vector_store
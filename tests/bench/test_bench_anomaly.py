@@ -0,0 +1,26 @@
+import itertools
+
+import numpy as np
+
+from backend.anomaly import AnomalyDetector, detect_anomaly
+
+
+def test_detect_anomaly_single_tick(bench):
+    prices = itertools.cycle(100 + np.random.default_rng(0).standard_normal(4096).cumsum() * 0.1)
+    bench("detect_anomaly", lambda: detect_anomaly("BENCH", next(prices), 1000.0))
+
+
+def test_detector_batch_ticks(bench):
+    tickers = [f"T{i}" for i in range(8000)]
+    detector = AnomalyDetector()
+    slots = detector.slots_for(tickers)
+    rng = np.random.default_rng(0)
+    prices = 100 * np.exp(rng.standard_normal((64, len(tickers))).cumsum(axis=0) * 0.001)
+    volumes = rng.uniform(500, 1500, (64, len(tickers)))
+    rows = itertools.cycle(range(64))
+
+    def tick():
+        row = next(rows)
+        detector.update_slots(slots, prices[row], volumes[row])
+
+    bench("detector.update", tick, items=len(tickers), tickers=len(tickers))
@@ -0,0 +1,31 @@
+import itertools
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend import main
+
+
+@pytest.fixture
+def client(monkeypatch, tmp_path, fake_embedder, mongo, providers, fresh_index):
+    monkeypatch.chdir(tmp_path)  # raw Perplexity responses are saved under ./stored_docs
+    monkeypatch.setattr(main.vector_runtime, "start", lambda: None)
+    monkeypatch.setattr(main.vector_store, "load_index", lambda: 0)
+    monkeypatch.setattr(main.vector_store, "save_index", lambda: None)
+    monkeypatch.setattr(main.vector_store, "PATHWAY_QUERY_TIMEOUT", 0)
+    with TestClient(main.app) as test_client:
+        yield test_client
+
+
+def test_analyze_end_to_end(bench, client, providers, tmp_path):
+    http, anthropic = providers
+    counter = itertools.count()
+
+    def uncached():
+        response = client.post("/analyze", json={"stock": f"S{next(counter)}"})
+        assert response.status_code == 200
+
+    bench("/analyze", uncached, providers="fake", cache="miss")
+    assert http.calls and anthropic.calls
+    assert any((tmp_path / "stored_docs").iterdir())  # raw Perplexity responses were saved
+    bench("/analyze", lambda: client.post("/analyze", json={"stock": "S0"}), providers="fake", cache="hit")
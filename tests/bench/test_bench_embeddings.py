@@ -0,0 +1,20 @@
+import itertools
+
+from backend import embeddings
+
+
+def test_embed_text_throughput(bench, fake_embedder, monkeypatch):
+    monkeypatch.setattr(embeddings, "EMBED_MICROBATCH_WAIT_MS", 0)  # single caller: no batching window
+    counter = itertools.count()
+    bench("embed_text", lambda: embeddings.embed_text(f"AAPL headline {next(counter)}"), cache="miss")
+    bench("embed_text", lambda: embeddings.embed_text("AAPL headline 0"), cache="hit")
+
+
+def test_embed_batch_throughput(bench, fake_embedder):
+    counter = itertools.count()
+
+    def batch():
+        start = next(counter) * 64
+        embeddings.embed_batch([f"TSLA headline {i}" for i in range(start, start + 64)])
+
+    bench("embed_batch", batch, items=64, batch=64, cache="miss")
@@ -0,0 +1,46 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from backend import db
+from backend.config import EMBEDDING_DIM, EMBEDDING_MODEL_TAG
+
+STOCKS = ["AAPL", "TSLA", "MSFT", "NVDA"]
+
+
+@pytest.fixture
+def news(mongo):
+    rng = np.random.default_rng(0)
+    start = datetime(2025, 1, 1)
+    mongo.insert_many([
+        {
+            "stock": STOCKS[i % len(STOCKS)],
+            "analysis": f"analysis {i}",
+            "embedding": db.pack_vector(rng.standard_normal(EMBEDDING_DIM)),
+            "embedding_model": EMBEDDING_MODEL_TAG,
+            "source": "perplexity",
+            "timestamp": start + timedelta(minutes=i),
+        }
+        for i in range(400)
+    ])
+    return mongo
+
+
+@pytest.mark.parametrize("limit", [20, 100])
+def test_preload_cost(bench, fake_embedder, fresh_index, news, monkeypatch, limit):
+    def cold():
+        monkeypatch.setattr(fresh_index, "_local_index", None)
+        fresh_index._watermarks.clear()
+        fresh_index.preload_from_mongo("AAPL", limit=limit)
+
+    bench("preload_from_mongo", cold, items=limit, limit=limit, state="cold")
+    bench("preload_from_mongo", lambda: fresh_index.preload_from_mongo("AAPL", limit=limit), limit=limit, state="no-op")
+
+    def cold_many():
+        monkeypatch.setattr(fresh_index, "_local_index", None)
+        fresh_index._watermarks.clear()
+        fresh_index.preload_many_from_mongo(STOCKS, limit=limit)
+
+    bench("preload_many_from_mongo", cold_many, items=limit * len(STOCKS), limit=limit, stocks=len(STOCKS))
+    assert fake_embedder.texts == 0  # stored vectors are reused, never re-embedded
@@ -0,0 +1,40 @@
+import os
+
+import numpy as np
+import pytest
+
+from backend.bench_index import clustered_vectors
+from backend.config import EMBEDDING_DIM
+from backend.vector_index import make_index
+
+SIZES = [int(n) for n in os.getenv("BENCH_SIZES", "1000,10000,100000").split(",")]
+BACKENDS = os.getenv("BENCH_BACKENDS", "brute").split(",")
+STOCKS = ["AAPL", "TSLA", "MSFT", "NVDA", "AMZN", "META", "GOOG", "NFLX"]
+
+
+def _corpus_index(backend, n, tmp_path):
+    knobs = {"path": str(tmp_path / "index")} if backend in ("int8", "float16") else {}
+    index = make_index(backend, dim=EMBEDDING_DIM, **knobs)
+    vectors = clustered_vectors(n, EMBEDDING_DIM)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    for start in range(0, n, 8192):
+        rows = range(start, min(n, start + 8192))
+        index.add_many(
+            [str(i) for i in rows],
+            [f"doc {i}" for i in rows],
+            vectors[start:start + len(rows)],
+            [{"stock": STOCKS[i % len(STOCKS)], "source": "perplexity", "timestamp": None} for i in rows],
+        )
+    return index
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+@pytest.mark.parametrize("n", SIZES)
+def test_search_latency_vs_corpus_size(bench, fake_embedder, fresh_index, monkeypatch, tmp_path, backend, n):
+    monkeypatch.setattr(fresh_index, "_local_index", _corpus_index(backend, n, tmp_path))
+    monkeypatch.setattr(fresh_index, "PATHWAY_QUERY_TIMEOUT", 0)
+    bench("search", lambda: fresh_index.search("unusual options activity", k=5), docs=n, backend=backend)
+    bench("search", lambda: fresh_index.search("unusual options activity", k=5, stock="AAPL"),
+          docs=n, backend=backend, filter="stock")
+    queries = [f"{s} news" for s in STOCKS]
+    bench("search_many", lambda: fresh_index.search_many(queries, k=5), items=len(queries), docs=n, backend=backend)
@@ -0,0 +1,56 @@
+import numpy as np
+
+from backend.anomaly import AnomalyDetector
+
+
+def _feed(detector, n_tickers=50, ticks=40, seed=0):
+    rng = np.random.default_rng(seed)
+    tickers = [f"T{i}" for i in range(n_tickers)]
+    prices = np.full(n_tickers, 100.0)
+    for _ in range(ticks):
+        prices *= 1 + 0.001 * rng.standard_normal(n_tickers)
+        assert detector.update(tickers, prices, np.full(n_tickers, 1000.0)) == []
+    return tickers, prices
+
+
+def test_quiet_market_then_one_jump():
+    detector = AnomalyDetector(warmup=20, z_threshold=8)
+    tickers, prices = _feed(detector)
+
+    prices = prices.copy()
+    prices[7] *= 1.03  # 3%: under the 5% rule, but a huge z-score for a 0.1% vol stock
+    anomalies = detector.update(tickers, prices, np.full(len(tickers), 1000.0))
+    assert [a["ticker"] for a in anomalies] == ["T7"]
+    assert anomalies[0]["reasons"] == ["zscore"] and anomalies[0]["change"] == 3.0
+
+
+def test_volume_spike_and_large_move():
+    detector = AnomalyDetector(warmup=20, z_threshold=8)
+    tickers, prices = _feed(detector)
+    volumes = np.full(len(tickers), 1000.0)
+    volumes[3] = 20000.0
+    prices = prices.copy()
+    prices[9] *= 0.90
+
+    by_ticker = {a["ticker"]: a for a in detector.update(tickers, prices, volumes)}
+    assert by_ticker["T3"]["reasons"] == ["volume"] and by_ticker["T3"]["volume_ratio"] == 20.0
+    assert set(by_ticker["T9"]["reasons"]) == {"move", "zscore"}
+
+
+def test_repeated_ticker_in_one_batch_matches_sequential_updates():
+    batched, sequential = AnomalyDetector(warmup=2), AnomalyDetector(warmup=2)
+    ticks = [("A", 10.0), ("B", 20.0), ("A", 10.1), ("A", 11.0), ("B", 20.1), ("A", 10.0)]
+
+    got = batched.update([t for t, _ in ticks], [p for _, p in ticks])
+    expected = [a for t, p in ticks for a in sequential.update([t], [p])]
+    assert got == expected
+    assert batched.snapshot("A") == sequential.snapshot("A")
+    assert batched.snapshot("A")["ticks"] == 4 and batched.snapshot("Z") is None
+
+
+def test_state_grows_past_initial_capacity():
+    detector = AnomalyDetector(capacity=4)
+    tickers = [f"S{i}" for i in range(100)]
+    detector.update(tickers, np.full(100, 50.0))
+    anomalies = detector.update(tickers, np.r_[np.full(99, 50.0), 60.0])
+    assert len(detector) == 100 and [a["ticker"] for a in anomalies] == ["S99"]
@@ -0,0 +1,188 @@
+import sys
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend import main
+
+
+@pytest.fixture
+def client(monkeypatch):
+    calls = []
+    monkeypatch.setattr(main.vector_runtime, "start", lambda: calls.append("runtime"))
+    monkeypatch.setattr(main.vector_store, "load_index", lambda: calls.append("index") or 0)
+    monkeypatch.setattr(main.vector_store, "save_index", lambda: calls.append("save"))
+    monkeypatch.setattr(main.embeddings, "warmup", lambda: calls.append("warmup"))
+    monkeypatch.setattr(main.db, "ensure_indexes", lambda: None)
+    for key in ("runtime", "index", "model"):
+        monkeypatch.setitem(main.startup, key, False)
+    with TestClient(main.app) as test_client:
+        deadline = time.monotonic() + 5
+        while not main.startup["model"] and time.monotonic() < deadline:
+            time.sleep(0.01)  # warmup runs as a background task
+        yield test_client, calls
+    assert calls[-1] == "save"
+
+
+def test_import_does_not_load_heavy_dependencies():
+    assert not main.embeddings.is_loaded()
+    assert "sentence_transformers" not in sys.modules and "pathway" not in sys.modules
+    assert main.startup["import_s"] >= 0
+
+
+def test_ready_after_warmup(client):
+    test_client, calls = client
+    response = test_client.get("/ready")
+    assert response.status_code == 200
+    body = response.json()
+    assert body["ready"] and body["index_load_s"] is not None
+    assert calls[:3] == ["runtime", "index", "warmup"]
+
+
+def test_not_ready_until_model_loaded(client, monkeypatch):
+    test_client, _ = client
+    monkeypatch.setitem(main.startup, "model", False)
+    assert test_client.get("/ready").status_code == 503
+
+
+def test_analyze_serves_stored_watcher_report(client, monkeypatch):
+    test_client, _ = client
+    store = main.watcher.ResultStore()
+    store.put("TSLA", {"stock": "TSLA", "final_report": "stored"}, {"reasons": ["move"]})
+    monkeypatch.setattr(main.watcher, "results", store)
+
+    async def fail(stock):
+        raise AssertionError("should not run the LLM chain")
+
+    monkeypatch.setattr(main, "analyze_stock_async", fail)
+    body = test_client.post("/analyze", json={"stock": "tsla"}).json()  # WATCHLIST keys are upper-cased
+    assert body["final_report"] == "stored" and body["trigger"] == {"reasons": ["move"]}
+
+
+def test_batch_concurrency_is_capped(client, monkeypatch):
+    test_client, _ = client
+    seen = []
+
+    async def fake_stream(stocks, concurrency):
+        seen.append(concurrency)
+        yield {"stock": stocks[0]}
+
+    monkeypatch.setattr(main, "analyze_stocks_stream", fake_stream)
+    test_client.post("/analyze/batch", json={"stocks": ["AAPL"], "concurrency": 10_000})
+    test_client.post("/analyze/batch", json={"stocks": ["AAPL"], "concurrency": 0})
+    assert seen == [main.BATCH_CONCURRENCY, main.BATCH_CONCURRENCY]
+
+
+class FakeStream:
+    def __init__(self, parts):
+        self.parts = parts
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    @property
+    async def text_stream(self):
+        import asyncio
+
+        for part in self.parts:
+            await asyncio.sleep(0.005)  # let concurrent requests interleave
+            yield part
+
+
+class FakeAnthropic:
+    """AsyncAnthropic stand-in: streamed reports, plain create() for threat scores."""
+
+    def __init__(self):
+        self.messages = self
+        self.streams = 0
+
+    def stream(self, **request):
+        self.streams += 1
+        return FakeStream(["- No anomaly ", "found ", "(https://example.com)"])
+
+    async def create(self, **request):
+        from types import SimpleNamespace
+        return SimpleNamespace(content=[SimpleNamespace(text="Score: 2\nReason: quiet")])
+
+
+class FakeHttp:
+    async def post(self, url, headers=None, json=None, timeout=None):
+        from types import SimpleNamespace
+        payload = {"choices": [{"message": {"content": "Perplexity: nothing unusual"}}]}
+        return SimpleNamespace(raise_for_status=lambda: None, json=lambda: payload)
+
+    async def aclose(self):
+        pass
+
+
+@pytest.fixture
+def providers(monkeypatch):
+    from backend import clients, llm, threat_model
+    from backend.limits import AsyncRateLimiter, provider_limits
+    from backend.response_cache import ResponseCache
+
+    anthropic = FakeAnthropic()
+    monkeypatch.setitem(clients._clients, "async_anthropic", anthropic)
+    monkeypatch.setitem(clients._clients, "async_http", FakeHttp())
+    for name in provider_limits:
+        monkeypatch.setitem(provider_limits, name, AsyncRateLimiter(1e9, burst=1000))
+    for module, name in ((llm, "perplexity_cache"), (llm, "claude_cache"), (threat_model, "threat_cache")):
+        monkeypatch.setattr(module, name, ResponseCache(name, ttl=60))
+    monkeypatch.setattr(llm, "_store_perplexity_result", lambda *args: None)
+    monkeypatch.setattr(llm, "_preload_and_search", lambda stock: [])
+    monkeypatch.setattr(llm, "_safe_search", lambda *args, **kwargs: [])
+    monkeypatch.setattr(threat_model, "search", lambda *args, **kwargs: [])
+    return anthropic
+
+
+def _events(response):
+    import json
+
+    events = []
+    for block in response.text.strip().split("\n\n"):
+        event, data = block.split("\n", 1)
+        events.append((event.removeprefix("event: "), json.loads(data.removeprefix("data: "))))
+    return events
+
+
+def test_analyze_stream_event_order_and_cache_hit(client, providers):
+    test_client, _ = client
+    events = _events(test_client.post("/analyze/stream", json={"stock": "AAPL"}))
+    names = [name for name, _ in events]
+    assert names == ["perplexity", "token", "token", "token", "threat", "done"]
+    assert "".join(data["text"] for name, data in events if name == "token") == "- No anomaly found (https://example.com)"
+
+    done = events[-1][1]
+    assert done == test_client.post("/analyze", json={"stock": "AAPL"}).json()  # same schema and values as /analyze
+    assert done["threat_score"] == 2
+
+    cached = _events(test_client.post("/analyze/stream", json={"stock": "AAPL"}))
+    assert [name for name, _ in cached] == ["perplexity", "token", "threat", "done"]
+    assert cached[1][1]["text"] == done["final_report"]
+    assert providers.streams == 1
+
+
+def test_concurrent_streams_share_one_claude_call(providers):
+    import asyncio
+
+    async def run(stock):
+        return [event async for event in main.llm.analyze_stock_events(stock)]
+
+    async def both():
+        return await asyncio.gather(run("NVDA"), run("NVDA"))
+
+    first, second = asyncio.run(both())
+    assert providers.streams == 1
+    assert first[-1] == second[-1]
+    assert sorted(len([e for e in events if e[0] == "token"]) for events in (first, second)) == [1, 3]
+
+
+def test_followup_stream(client, providers):
+    test_client, _ = client
+    events = _events(test_client.post("/followup/stream", json={"stock": "AAPL", "question": "Why?"}))
+    assert [name for name, _ in events] == ["token", "token", "token", "done"]
+    assert events[-1][1] == {"stock": "AAPL", "question": "Why?", "answer": "- No anomaly found (https://example.com)"}
@@ -0,0 +1,14 @@
+from backend import clients
+
+
+def test_clients_are_shared_singletons():
+    assert clients.get_http_session() is clients.get_http_session()
+    assert clients.get_mongo_client() is clients.get_mongo_client()
+    assert clients.get_anthropic() is clients.get_anthropic()
+    assert clients.get_news_collection().name == clients.MONGO_COLLECTION
+
+
+def test_http_pool_is_sized_from_config():
+    adapter = clients.get_http_session().get_adapter("https://api.perplexity.ai")
+    assert adapter._pool_maxsize == clients.HTTP_POOL_MAXSIZE
+    assert "http" in clients.connection_stats()
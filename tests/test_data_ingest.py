@@ -0,0 +1,47 @@
+import csv
+
+import pytest
+
+from backend import data_ingest
+from backend.bar_cache import BarCache
+
+
+def _write_csv(directory, ticker, rows):
+    with open(directory / f"{ticker}.csv", "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["ts", "open", "high", "low", "close", "volume"])
+        writer.writerows(rows)
+
+
+@pytest.fixture
+def feed(tmp_path, monkeypatch):
+    source = tmp_path / "feed"
+    source.mkdir()
+    _write_csv(source, "AAPL", [(60 * i, 10, 11, 9, 10 + i, 100) for i in range(5)])
+    _write_csv(source, "TSLA", [(60 * i, 20, 21, 19, 20 - i, 50) for i in range(3)])
+    fetcher = data_ingest.FileFetcher(str(source))
+    monkeypatch.setattr(data_ingest, "fetcher", fetcher)
+    monkeypatch.setattr(data_ingest, "_bar_cache", BarCache(str(tmp_path / "bars")))
+    return source, fetcher
+
+
+def test_batch_prices_from_one_fetch(feed):
+    _, fetcher = feed
+    prices = data_ingest.get_stock_prices(["AAPL", "TSLA", "NOPE"])
+    assert prices == {"AAPL": 14.0, "TSLA": 18.0, "NOPE": None}
+    assert fetcher.calls == 1
+    assert data_ingest.get_stock_price("AAPL") == 14.0
+
+
+def test_only_bars_newer_than_watermark_are_appended(feed, tmp_path):
+    source, _ = feed
+    assert data_ingest.refresh_bars(["AAPL"]) == {"AAPL": 5}
+    assert data_ingest.refresh_bars(["AAPL"]) == {"AAPL": 0}
+
+    _write_csv(source, "AAPL", [(60 * i, 10, 11, 9, 10 + i, 100) for i in range(7)])
+    assert data_ingest.refresh_bars(["AAPL"]) == {"AAPL": 2}
+
+    reopened = BarCache(str(tmp_path / "bars"))  # memory-mapped files survive a restart
+    assert reopened.watermark("AAPL") == 360
+    assert reopened.bars("AAPL")["close"].tolist() == [10, 11, 12, 13, 14, 15, 16]
+    assert reopened.bars("AAPL", since=240)["ts"].tolist() == [300, 360]
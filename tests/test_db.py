@@ -0,0 +1,61 @@
+from datetime import datetime, timedelta
+
+import mongomock
+import pytest
+
+from backend import db
+
+
+@pytest.fixture
+def collection(monkeypatch):
+    collection = mongomock.MongoClient().insideX.news
+    monkeypatch.setattr(db, "get_news_collection", lambda: collection)
+    now = datetime(2025, 1, 1)
+    for i in range(6):
+        collection.insert_one({
+            "stock": "AAPL" if i % 2 else "TSLA",
+            "analysis": f"doc {i}",
+            "embedding": [float(i)] * 4,
+            "source": "perplexity",
+            "timestamp": now + timedelta(minutes=i),
+        })
+    return collection
+
+
+def test_ensure_indexes(collection):
+    db.ensure_indexes()
+    indexes = collection.index_information()
+    assert indexes["stock_timestamp"]["key"] == [("stock", 1), ("timestamp", -1)]
+    assert indexes["timestamp_ttl"]["expireAfterSeconds"] == db.NEWS_TTL_DAYS * 86400
+
+
+def test_text_queries_skip_embeddings(collection):
+    docs = db.get_news("AAPL", limit=2)
+    assert [d["analysis"] for d in docs] == ["doc 5", "doc 3"]
+    assert all("embedding" not in d for d in docs)
+
+
+def test_vector_queries_include_embeddings(collection):
+    docs = db.get_news_vectors("TSLA", limit=1)
+    assert docs[0]["analysis"] == "doc 4" and docs[0]["embedding"] == [4.0] * 4
+
+    many = db.get_news_vectors_many(["AAPL", "TSLA"], limit=2)
+    assert sorted(d["analysis"] for d in many) == ["doc 2", "doc 3", "doc 4", "doc 5"]
+
+
+def test_since_watermark_returns_only_newer_docs(collection):
+    watermark = datetime(2025, 1, 1) + timedelta(minutes=3)
+    docs = db.get_news_vectors("AAPL", limit=20, since=watermark)
+    assert [d["analysis"] for d in docs] == ["doc 3", "doc 5"]  # oldest first, no limit past a watermark
+
+    many = db.get_news_vectors_many(["AAPL", "TSLA"], limit=20, since={"AAPL": watermark + timedelta(minutes=5)})
+    assert sorted(d["analysis"] for d in many) == ["doc 0", "doc 2", "doc 4"]
+
+
+def test_packed_vectors_roundtrip(collection):
+    packed = db.pack_vector([0.5, -1.25, 3.0])
+    collection.insert_one({"stock": "NVDA", "analysis": "packed", "embedding": packed, "timestamp": datetime(2025, 2, 1)})
+    doc = db.get_news_vectors("NVDA", limit=1)[0]
+    assert db.unpack_vector(doc["embedding"]) == [0.5, -1.25, 3.0]
+    assert db.unpack_vector([1.0, 2.0]) == [1.0, 2.0] and db.unpack_vector(None) is None
+    assert len(packed) == 12
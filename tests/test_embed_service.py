@@ -0,0 +1,58 @@
+import os
+import threading
+
+import numpy as np
+import pytest
+
+from backend.embed_service import EmbedClient, serve
+
+
+def _fake_encoder():
+    pid = os.getpid()
+
+    def encode(texts):
+        if "boom" in texts:
+            raise ValueError("bad text")
+        return np.array([[len(t), float(pid), 1.0, 0.0] for t in texts], dtype=np.float32)
+
+    return encode
+
+
+@pytest.fixture
+def service(tmp_path):
+    path = str(tmp_path / "embed.sock")
+    processes = serve(path, workers=2, encoder_factory=_fake_encoder)
+    client = EmbedClient(path, dim=4, timeout=10)
+    yield client, processes
+    client.close()
+    for process in processes:
+        process.terminate()
+
+
+def test_vectors_come_back_through_shared_memory(service):
+    client, processes = service
+    assert client.ping()["pid"] in {p.pid for p in processes}
+    vectors = client.encode(["a", "abc", "abcdef"])
+    assert vectors.shape == (3, 4) and vectors[:, 0].tolist() == [1.0, 3.0, 6.0]
+
+    big = client.encode(["x" * i for i in range(200)])  # grows the buffer
+    assert big[:, 0].tolist() == list(range(200))
+    assert client.stats()["texts"] == 203
+
+
+def test_errors_and_concurrent_threads(service):
+    client, _ = service
+    with pytest.raises(RuntimeError):
+        client.encode(["ok", "boom"])
+
+    results = {}
+
+    def work(i):
+        results[i] = client.encode(["t" * i] * 5)[:, 0].tolist()
+
+    threads = [threading.Thread(target=work, args=(i,)) for i in range(1, 9)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert all(results[i] == [float(i)] * 5 for i in range(1, 9))
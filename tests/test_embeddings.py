@@ -0,0 +1,110 @@
+import numpy as np
+
+from backend.embedding_cache import EmbeddingCache
+
+
+def test_lru_eviction_and_counters():
+    cache = EmbeddingCache("m", max_items=2)
+    cache.put("a", [1.0, 0.0])
+    cache.put("b", [0.0, 1.0])
+    assert cache.get("a") is not None  # a becomes most recent
+    cache.put("c", [1.0, 1.0])          # evicts b
+
+    assert cache.get("b") is None
+    assert np.allclose(cache.get("c"), [1.0, 1.0])
+    stats = cache.stats()
+    assert stats["hits"] == 2 and stats["misses"] == 1 and stats["size"] == 2
+
+
+def test_keys_are_model_scoped():
+    assert EmbeddingCache("m1").key("AAPL") != EmbeddingCache("m2").key("AAPL")
+
+
+def test_vectors_survive_restart(tmp_path):
+    path = str(tmp_path / "emb.sqlite3")
+    EmbeddingCache("m", path=path).put_many(["x", "y"], [[0.5, 0.25], [1.0, 2.0]])
+
+    reopened = EmbeddingCache("m", path=path)
+    assert np.allclose(reopened.get("y"), [1.0, 2.0])
+    assert reopened.stats()["disk_hits"] == 1
+    assert EmbeddingCache("other", path=path).get("y") is None
+
+
+def test_database_is_opened_on_first_use(tmp_path):
+    path = tmp_path / "cache" / "emb.sqlite3"
+    cache = EmbeddingCache("m", path=str(path))
+    assert not path.parent.exists()  # constructing it at import time must not touch the disk
+    assert cache.get("x") is None
+    assert path.exists()
+
+
+def test_unwritable_path_falls_back_to_memory(tmp_path):
+    blocker = tmp_path / "file"
+    blocker.write_text("")
+    cache = EmbeddingCache("m", path=str(blocker / "emb.sqlite3"))
+    cache.put("x", [1.0, 2.0])
+    assert cache.get("x") is not None and not cache.stats()["persistent"]
+
+
+def test_microbatcher_coalesces_concurrent_calls():
+    import threading
+    from backend.microbatch import MicroBatcher
+
+    seen = []
+
+    def double_all(items):
+        seen.append(len(items))
+        return [x * 2 for x in items]
+
+    batcher = MicroBatcher(double_all, max_batch=8, max_wait_ms=50)
+    results = {}
+    threads = [
+        threading.Thread(target=lambda i=i: results.__setitem__(i, batcher.submit(i)))
+        for i in range(8)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert results == {i: i * 2 for i in range(8)}
+    assert sum(seen) == 8 and len(seen) < 8
+
+
+def test_microbatcher_propagates_errors():
+    import pytest
+    from backend.microbatch import MicroBatcher
+
+    def boom(items):
+        raise RuntimeError("model down")
+
+    with pytest.raises(RuntimeError, match="model down"):
+        MicroBatcher(boom, max_wait_ms=1).submit("x")
+
+
+def test_cosine_drift_report():
+    from backend.onnx_embedder import _pool, cosine_drift
+
+    rng = np.random.default_rng(0)
+    reference = rng.normal(size=(8, 384)).astype(np.float32)
+    assert cosine_drift(reference, reference * 3.0)["max_drift"] < 1e-6
+
+    noisy = reference + 0.05 * rng.normal(size=reference.shape)
+    report = cosine_drift(reference, noisy)
+    assert report["texts"] == 8 and 0.99 < report["mean_cosine"] < 1.0
+    assert np.allclose(np.linalg.norm(_pool(rng.normal(size=(2, 5, 4))), axis=1), 1.0)
+
+
+def test_model_tag_separates_backends(monkeypatch):
+    import importlib
+
+    from backend import config
+
+    try:
+        monkeypatch.setenv("EMBEDDING_BACKEND", "onnx-int8")
+        assert importlib.reload(config).EMBEDDING_MODEL_TAG == f"{config.EMBEDDING_MODEL}@onnx-int8"
+        monkeypatch.setenv("EMBEDDING_BACKEND", "torch")
+        assert importlib.reload(config).EMBEDDING_MODEL_TAG == config.EMBEDDING_MODEL  # existing tags stay valid
+    finally:
+        monkeypatch.undo()
+        importlib.reload(config)
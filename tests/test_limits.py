@@ -0,0 +1,29 @@
+import asyncio
+import time
+
+from backend.limits import AsyncRateLimiter
+
+
+def test_rate_limiter_spaces_out_calls():
+    limiter = AsyncRateLimiter(rate=20, burst=1)
+
+    async def run():
+        start = time.monotonic()
+        for _ in range(5):
+            await limiter.acquire()
+        return time.monotonic() - start
+
+    # first call is free, the remaining four wait ~50 ms each
+    assert asyncio.run(run()) >= 0.18
+
+
+def test_rate_limiter_allows_burst_and_unlimited():
+    async def run(limiter, n):
+        start = time.monotonic()
+        for _ in range(n):
+            async with limiter:
+                pass
+        return time.monotonic() - start
+
+    assert asyncio.run(run(AsyncRateLimiter(rate=1, burst=3), 3)) < 0.1
+    assert asyncio.run(run(AsyncRateLimiter(rate=0), 100)) < 0.1
@@ -0,0 +1,14 @@
+from backend import rag
+
+
+def test_context_formatting_and_filters(monkeypatch):
+    seen = {}
+
+    def fake_search(query, k, stock, since, source):
+        seen.update(query=query, k=k, stock=stock)
+        return [("1", "AAPL beats earnings", 0.912), ("2", "AAPL recall", 0.5)]
+
+    monkeypatch.setattr(rag, "search", fake_search)
+    context = rag.get_context("earnings", k=2, stock="AAPL")
+    assert context == "- AAPL beats earnings (score: 0.91)\n- AAPL recall (score: 0.50)"
+    assert seen == {"query": "earnings", "k": 2, "stock": "AAPL"}
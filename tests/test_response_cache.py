@@ -0,0 +1,147 @@
+import asyncio
+import threading
+import time
+
+from backend.response_cache import ResponseCache
+
+
+def test_ttl_expiry_and_size_bound():
+    cache = ResponseCache("t", ttl=0.05, max_items=2)
+    calls = []
+    fn = lambda: calls.append(1) or "answer"
+
+    assert cache.get_or_call("k", fn) == "answer"
+    assert cache.get_or_call("k", fn) == "answer"
+    assert len(calls) == 1
+    time.sleep(0.06)
+    cache.get_or_call("k", fn)
+    assert len(calls) == 2
+
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.stats()["size"] == 2
+
+
+def test_failures_are_not_cached():
+    cache = ResponseCache("t", ttl=60)
+    calls = []
+    fn = lambda: calls.append(1) or None
+    cache.get_or_call("k", fn)
+    cache.get_or_call("k", fn)
+    assert len(calls) == 2
+
+
+def test_sync_single_flight():
+    cache = ResponseCache("t", ttl=60)
+    calls = []
+
+    def slow():
+        calls.append(1)
+        time.sleep(0.05)
+        return "v"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_call("k", slow))) for _ in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert results == ["v"] * 5
+    assert len(calls) == 1
+    stats = cache.stats()
+    assert stats["misses"] == 1 and stats["hits"] + stats["coalesced"] == 4
+
+
+def test_async_single_flight_and_saved_latency():
+    cache = ResponseCache("t", ttl=60)
+    calls = []
+
+    async def slow():
+        calls.append(1)
+        await asyncio.sleep(0.02)
+        return "v"
+
+    async def run():
+        first = await asyncio.gather(*[cache.get_or_call_async("k", slow) for _ in range(5)])
+        second = await cache.get_or_call_async("k", slow)
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first == ["v"] * 5 and second == "v"
+    assert len(calls) == 1
+    stats = cache.stats()
+    assert stats["coalesced"] == 4 and stats["hits"] == 1
+    assert stats["saved_seconds"] >= 0.015
+
+
+def test_cancelled_leader_does_not_cancel_waiters():
+    cache = ResponseCache("t", ttl=60)
+    calls = []
+
+    async def slow():
+        calls.append(1)
+        await asyncio.sleep(0.02)
+        return "v"
+
+    async def run():
+        leader = asyncio.create_task(cache.get_or_call_async("k", slow))
+        await asyncio.sleep(0)
+        followers = [asyncio.create_task(cache.get_or_call_async("k", slow)) for _ in range(3)]
+        await asyncio.sleep(0)
+        leader.cancel()
+        return await asyncio.gather(*followers), leader
+
+    results, leader = asyncio.run(run())
+    assert leader.cancelled()
+    assert results == ["v"] * 3
+    assert len(calls) == 2  # the cancelled call, then one retry shared by the followers
+
+
+def test_stream_single_flight():
+    cache = ResponseCache("t", ttl=60)
+    calls = []
+
+    async def stream():
+        calls.append(1)
+        for chunk in ("a", "b", "c"):
+            await asyncio.sleep(0.01)
+            yield chunk
+
+    async def consume():
+        return [chunk async for chunk in cache.stream_async("k", stream)]
+
+    async def run():
+        concurrent = await asyncio.gather(consume(), consume(), consume())
+        return concurrent, await consume()
+
+    concurrent, cached = asyncio.run(run())
+    assert concurrent[0] == ["a", "b", "c"]            # the leader streams
+    assert concurrent[1:] == [["abc"], ["abc"]]        # waiters get the finished text
+    assert cached == ["abc"] and len(calls) == 1
+
+
+def test_stream_leader_failure_hands_over_to_a_waiter():
+    cache = ResponseCache("t", ttl=60)
+    calls = []
+
+    async def stream():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        if len(calls) == 1:
+            raise RuntimeError("stream dropped")
+        yield "ok"
+
+    async def consume():
+        return [chunk async for chunk in cache.stream_async("k", stream)]
+
+    async def run():
+        return await asyncio.gather(consume(), consume(), return_exceptions=True)
+
+    leader, waiter = asyncio.run(run())
+    assert isinstance(leader, RuntimeError) and waiter == ["ok"] and len(calls) == 2
+
+
+def test_keys_depend_on_params():
+    assert ResponseCache.key({"model": "a", "t": 0}) == ResponseCache.key({"t": 0, "model": "a"})
+    assert ResponseCache.key({"model": "a", "t": 0}) != ResponseCache.key({"model": "a", "t": 1})
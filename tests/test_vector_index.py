@@ -0,0 +1,203 @@
+import numpy as np
+import pytest
+
+from backend.bench_index import clustered_vectors
+from backend.vector_index import Filter, VectorIndex, IVFIndex, QuantizedIndex, make_index, recall_at_k
+
+
+def _brute_force(matrix, query, k):
+    matrix = matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
+    query = query / np.linalg.norm(query)
+    scores = matrix @ query
+    return list(np.argsort(-scores)[:k])
+
+
+def test_search_matches_brute_force():
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(500, 16)).astype(np.float32)
+    index = VectorIndex(dim=16, chunk_size=64)
+    index.add_many([f"d{i}" for i in range(500)], [f"text {i}" for i in range(500)], vectors)
+
+    query = rng.normal(size=16)
+    results = index.search(query, k=5)
+
+    assert [r[0] for r in results] == [f"d{i}" for i in _brute_force(vectors, query, 5)]
+    scores = [r[2] for r in results]
+    assert scores == sorted(scores, reverse=True)
+
+
+def test_index_grows_geometrically():
+    index = VectorIndex(dim=4, chunk_size=8)
+    capacities = set()
+    for i in range(100):
+        index.add(str(i), f"doc {i}", [1.0, float(i), 0.0, 0.0])
+        capacities.add(index._matrix.shape[0])
+    assert len(index) == 100
+    assert sorted(capacities) == [8, 16, 32, 64, 128]  # log(n) copies, not n / chunk_size
+    assert len(index._times) == len(index._stock_codes) == 128
+    assert np.allclose(np.linalg.norm(index.matrix, axis=1), 1.0)
+
+
+def test_search_empty_and_small_k():
+    index = VectorIndex(dim=3)
+    assert index.search([1.0, 0.0, 0.0], k=3) == []
+    index.add("a", "alpha", [1.0, 0.0, 0.0])
+    index.add("b", "beta", [0.0, 1.0, 0.0])
+    assert index.search([1.0, 0.1, 0.0], k=10)[0][:2] == ("a", "alpha")
+    assert len(index.search([1.0, 0.1, 0.0], k=10)) == 2
+
+
+def test_search_many_matches_single_searches():
+    rng = np.random.default_rng(1)
+    vectors = rng.normal(size=(200, 8)).astype(np.float32)
+    index = VectorIndex(dim=8)
+    index.add_many([str(i) for i in range(200)], [f"t{i}" for i in range(200)], vectors)
+
+    queries = rng.normal(size=(4, 8))
+    batched = index.search_many(queries, k=3)
+
+    assert len(batched) == 4
+    for query, results in zip(queries, batched):
+        single = index.search(query, k=3)
+        assert [r[0] for r in results] == [r[0] for r in single]
+        assert np.allclose([r[2] for r in results], [r[2] for r in single], atol=1e-6)
+
+
+def test_ids_are_upserted_and_carry_metadata():
+    index = VectorIndex(dim=3)
+    index.add("n1", "old text", [1.0, 0.0, 0.0], {"stock": "AAPL"})
+    index.add("n2", "other", [0.0, 1.0, 0.0], {"stock": "TSLA"})
+    index.add("n1", "new text", [0.0, 0.0, 1.0], {"stock": "AAPL", "source": "perplexity"})
+
+    assert len(index) == 2
+    assert "n1" in index and "missing" not in index
+    assert index.get("n1") == ("new text", {"stock": "AAPL", "source": "perplexity"})
+
+    hit = index.query([[0.0, 0.0, 1.0]], k=1)[0][0]
+    assert (hit.id, hit.content, hit.metadata["stock"]) == ("n1", "new text", "AAPL")
+
+
+def test_identical_content_keeps_distinct_ids():
+    index = VectorIndex(dim=2)
+    index.add_many(["a", "b"], ["same", "same"], [[1.0, 0.0], [0.9, 0.1]])
+    assert {r[0] for r in index.search([1.0, 0.0], k=2)} == {"a", "b"}
+
+
+def _ivf(n=3000, dim=32, nlist=32, nprobe=8):
+    vectors = clustered_vectors(n, dim, clusters=16)
+    index = IVFIndex(dim=dim, nlist=nlist, nprobe=nprobe, train_min=1000)
+    index.add_many([str(i) for i in range(n)], [f"t{i}" for i in range(n)], vectors)
+    return index, vectors
+
+
+def test_ivf_recall_against_brute_force():
+    index, vectors = _ivf()
+    assert index.trained
+    exact = VectorIndex(dim=32)
+    exact.add_many(index.ids, index.contents, vectors)
+
+    queries = clustered_vectors(50, 32, clusters=16, seed=3)
+    assert recall_at_k(index.query(queries, 10), exact.query(queries, 10)) > 0.9
+    index.nprobe = index.nlist  # scanning every list is exact
+    assert recall_at_k(index.query(queries, 10), exact.query(queries, 10)) == 1.0
+
+
+def test_ivf_upsert_moves_row_between_lists():
+    index, vectors = _ivf()
+    index.add("0", "moved", -vectors[0])
+    assert sum(len(lst) for lst in index._lists) == len(index)
+    assert index.query([-vectors[0]], k=1)[0][0].content == "moved"
+
+
+def test_save_and_load_roundtrip(tmp_path):
+    index, vectors = _ivf()
+    index.add("extra", "meta doc", vectors[1], {"stock": "AAPL"})
+    index.save(str(tmp_path))
+
+    restored = make_index("ivf", dim=32, nlist=32, nprobe=8)
+    assert restored.load(str(tmp_path))
+    assert restored.trained and len(restored) == len(index)
+    assert restored.get("extra") == ("meta doc", {"stock": "AAPL"})
+    queries = vectors[:5]
+    assert [[h.id for h in r] for r in restored.query(queries, 5)] == [[h.id for h in r] for r in index.query(queries, 5)]
+
+    brute = make_index("brute", dim=32)
+    assert brute.load(str(tmp_path)) and len(brute) == len(index)
+    assert not make_index("brute", dim=8).load(str(tmp_path))
+
+
+def test_unknown_backend_rejected():
+    with pytest.raises(ValueError):
+        make_index("annoy")
+
+
+def _tagged_index(index):
+    rng = np.random.default_rng(4)
+    vectors = rng.normal(size=(600, 16)).astype(np.float32)
+    metadatas = [
+        {"stock": ["AAPL", "TSLA", "NVDA"][i % 3], "source": "perplexity" if i % 2 else "news",
+         "timestamp": f"2025-01-{1 + i % 28:02d}T00:00:00"}
+        for i in range(600)
+    ]
+    index.add_many([str(i) for i in range(600)], [f"t{i}" for i in range(600)], vectors, metadatas)
+    return index, vectors, metadatas
+
+
+def test_filtered_query_matches_exact_scan_of_matching_rows():
+    index, vectors, metadatas = _tagged_index(VectorIndex(dim=16))
+    query = vectors[7] + 0.1
+
+    hits = index.query([query], k=5, where=Filter(stock="TSLA", source="perplexity", since="2025-01-10"))[0]
+    keep = [i for i, m in enumerate(metadatas)
+            if m["stock"] == "TSLA" and m["source"] == "perplexity" and m["timestamp"] >= "2025-01-10"]
+    expected = [str(keep[i]) for i in _brute_force(vectors[keep], query, 5)]
+    assert [h.id for h in hits] == expected
+    assert all(h.metadata["stock"] == "TSLA" for h in hits)
+
+
+def test_per_query_filters_and_unknown_values():
+    index, vectors, _ = _tagged_index(VectorIndex(dim=16))
+    results = index.query(vectors[:2], k=3, where=[Filter(stock="AAPL"), None])
+    assert {h.metadata["stock"] for h in results[0]} == {"AAPL"}
+    assert results[1][0].id == "1"
+    assert index.search(vectors[0], k=3, stock="MSFT") == []
+    assert {r[0] for r in index.search(vectors[0], k=50, stock=["AAPL", "NVDA"])} <= {str(i) for i in range(600) if i % 3 != 1}
+
+
+def test_ivf_filtered_query_returns_only_matching_rows():
+    index, vectors, _ = _tagged_index(IVFIndex(dim=16, nlist=8, nprobe=2, train_min=100))
+    assert index.trained
+    hits = index.query([vectors[3]], k=10, where=Filter(stock="AAPL"))[0]
+    assert len(hits) == 10 and hits[0].id == "3"
+    assert all(h.metadata["stock"] == "AAPL" for h in hits)
+
+
+@pytest.mark.parametrize("dtype", ["int8", "float16"])
+def test_quantized_index_reranks_to_exact_order(tmp_path, dtype):
+    vectors = clustered_vectors(2000, 32, clusters=16)
+    index = QuantizedIndex(dim=32, chunk_size=512, path=str(tmp_path), dtype=dtype, shard_rows=512)
+    exact = VectorIndex(dim=32)
+    for idx in (index, exact):
+        idx.add_many([str(i) for i in range(2000)], [f"t{i}" for i in range(2000)], vectors)
+
+    queries = clustered_vectors(20, 32, clusters=16, seed=5)
+    approx_hits, exact_hits = index.query(queries, 5), exact.query(queries, 5)
+    assert recall_at_k(approx_hits, exact_hits) >= 0.95
+    assert np.allclose(approx_hits[0][0].score, exact_hits[0][0].score, atol=1e-5)  # re-ranked in float32
+    assert len(index.store.codes) == 4
+
+
+def test_quantized_index_reopens_from_shards(tmp_path):
+    vectors = clustered_vectors(300, 16)
+    index = make_index("int8", dim=16, path=str(tmp_path), shard_rows=128)
+    index.add_many([str(i) for i in range(300)], [f"t{i}" for i in range(300)], vectors,
+                   [{"stock": "AAPL" if i % 2 else "TSLA"} for i in range(300)])
+    index.add("5", "updated", vectors[6], {"stock": "NVDA"})
+    index.save(str(tmp_path))
+
+    reopened = make_index("int8", dim=16, path=str(tmp_path))
+    assert len(reopened) == 300 and reopened.load(str(tmp_path))
+    assert reopened.get("5") == ("updated", {"stock": "NVDA"})
+    assert reopened.query([vectors[10]], k=1, where=Filter(stock="TSLA"))[0][0].id == "10"
+    with pytest.raises(ValueError):
+        make_index("float16", dim=16, path=str(tmp_path))
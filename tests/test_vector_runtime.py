@@ -0,0 +1,83 @@
+import queue
+import threading
+from concurrent.futures import TimeoutError
+
+import pytest
+
+from backend import vector_runtime
+
+
+class FakeSubject:
+    """Stands in for the Pathway graph: answers each query row through _on_result."""
+
+    def __init__(self, answer=True):
+        self.answer = answer
+        self.rows = []
+        self.queue = queue.Queue()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def is_alive(self):
+        return True
+
+    def run(self):
+        while True:
+            row = self.queue.get()
+            if row is None:
+                return
+            self.rows.append(row)
+            if self.answer:
+                vector_runtime._on_result(None, {
+                    "request_id": row["request_id"],
+                    "ids": ["d1"], "contents": ["AAPL beats"], "scores": [0.9], "metadatas": [{"stock": "AAPL"}],
+                }, 0, True)
+
+
+@pytest.fixture
+def runtime(monkeypatch):
+    def make(answer=True):
+        subject = FakeSubject(answer)
+        monkeypatch.setattr(vector_runtime, "_thread", subject)
+        monkeypatch.setattr(vector_runtime, "_query_queue", subject.queue)
+        monkeypatch.setattr(vector_runtime, "_pending", {})
+        monkeypatch.setattr(vector_runtime, "_free_slots", [])
+        monkeypatch.setattr(vector_runtime, "_slot_count", 0)
+        subject.thread.start()
+        return subject
+
+    yield make
+    vector_runtime._query_queue.put(None)
+
+
+def test_answers_reach_the_waiting_query_and_slots_are_reused(runtime):
+    subject = runtime()
+    for _ in range(3):
+        hits = vector_runtime.query_many([[0.1] * 4, [0.2] * 4], k=1, timeout=2)
+        assert hits == [[("d1", "AAPL beats", 0.9, {"stock": "AAPL"})]] * 2
+
+    assert {row["query_id"] for row in subject.rows} == {"q0", "q1"}  # query table stays bounded
+    assert len({row["request_id"] for row in subject.rows}) == 6
+    assert vector_runtime._pending == {}
+
+
+def test_late_answer_for_a_reused_slot_is_ignored(runtime):
+    runtime()
+    vector_runtime._on_result(None, {"request_id": "gone", "ids": [], "contents": [], "scores": [],
+                                     "metadatas": []}, 0, True)
+    assert vector_runtime.query_many([[0.1] * 4], timeout=2)[0][0][0] == "d1"
+
+
+def test_timeout_releases_the_query_and_search_falls_back(runtime, monkeypatch):
+    runtime(answer=False)
+    with pytest.raises(TimeoutError):
+        vector_runtime.query_many([[0.1] * 4], timeout=0.05)
+    assert vector_runtime._pending == {} and vector_runtime._free_slots == ["q0"]
+
+    from backend import vector_store
+    from backend.vector_index import VectorIndex
+
+    index = VectorIndex(dim=4)
+    index.add_many(["local"], ["from local index"], [[1.0, 0.0, 0.0, 0.0]], [{"stock": "AAPL"}])
+    monkeypatch.setattr(vector_store, "_local_index", index)
+    monkeypatch.setattr(vector_store, "embed_batch", lambda texts: [[1.0, 0.0, 0.0, 0.0] for _ in texts])
+    monkeypatch.setattr(vector_store, "PATHWAY_QUERY_TIMEOUT", 0.05)
+    assert vector_store.search("anything", k=1) == [("local", "from local index", pytest.approx(1.0))]
@@ -0,0 +1,137 @@
+import os
+import time
+from datetime import datetime, timedelta
+
+import mongomock
+import numpy as np
+import pytest
+
+from backend import clients, db, vector_store
+from backend.config import EMBEDDING_DIM
+
+
+@pytest.fixture
+def store(monkeypatch, tmp_path):
+    """Empty local index, no Pathway runtime, counting embedder."""
+    encoded = []
+
+    def embed_text(text):
+        encoded.append(text)
+        return [1.0] + [0.0] * (EMBEDDING_DIM - 1)
+
+    def embed_batch(texts):
+        return [embed_text(t) for t in texts]
+
+    monkeypatch.setattr(vector_store.vector_runtime, "push", lambda rows: None)
+    monkeypatch.setattr(vector_store, "_local_index", None)
+    monkeypatch.setattr(vector_store, "embed_text", embed_text)
+    monkeypatch.setattr(vector_store, "embed_batch", embed_batch)
+    monkeypatch.setattr(vector_store, "_watermarks", {})
+    monkeypatch.setattr(vector_store, "DOCS_DIR", str(tmp_path / "docs"))
+    return encoded
+
+
+def _save_local_doc(stock, text, mtime):
+    path = vector_store.store_full_doc(stock, {"choices": [{"message": {"content": text}}]})
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+def test_local_doc_timestamps_are_utc(store, monkeypatch):
+    monkeypatch.setenv("TZ", "America/New_York")  # host offset must not shift `since` filters
+    time.tzset()
+    _save_local_doc("AAPL", "AAPL local analysis", 1_700_000_000)
+    vector_store.preload_from_local("AAPL")
+
+    (metadata,) = vector_store.local_index().metadata
+    assert metadata["ts"] == 1_700_000_000
+    hits = vector_store.local_index().query([[1.0] + [0.0] * (EMBEDDING_DIM - 1)], 1,
+                                            vector_store.Filter(since=1_700_000_000 - 1))
+    assert len(hits[0]) == 1
+
+
+@pytest.fixture(autouse=True)
+def _restore_tz():
+    yield
+    time.tzset()
+
+
+@pytest.fixture
+def news(monkeypatch):
+    monkeypatch.setitem(clients._clients, "mongo", mongomock.MongoClient())
+    return clients.get_news_collection()
+
+
+def _doc(i, vector, model=vector_store.EMBEDDING_MODEL_TAG):
+    return {"stock": "AAPL", "analysis": f"doc {i}", "embedding": db.pack_vector(vector), "embedding_model": model,
+            "source": "perplexity", "timestamp": datetime(2025, 1, 1) + timedelta(minutes=i)}
+
+
+def test_stored_vectors_are_reused_and_stale_ones_reembedded(store, news):
+    stored = np.full(EMBEDDING_DIM, 1 / np.sqrt(EMBEDDING_DIM), dtype=np.float32)  # unit length, as stored
+    news.insert_many([
+        _doc(0, stored),
+        _doc(1, stored, model="some/other-model"),
+        _doc(2, stored[:8]),  # wrong dimension
+    ])
+    vector_store.preload_from_mongo("AAPL")
+
+    assert sorted(store) == ["doc 1", "doc 2"]  # only the mismatched docs hit the model
+    index = vector_store.local_index()
+    rows = dict(zip(index.contents, index.matrix))
+    assert np.allclose(rows["doc 0"], stored)
+    assert rows["doc 1"][0] == 1.0 and rows["doc 2"][0] == 1.0
+
+
+def test_docs_already_indexed_are_skipped(store, news):
+    news.insert_one(_doc(0, np.ones(EMBEDDING_DIM)))
+    vector_store.preload_from_mongo("AAPL")
+    vector_store._watermarks.clear()  # force a full re-read
+    vector_store.preload_from_mongo("AAPL")
+    assert len(vector_store.local_index()) == 1
+
+
+def test_local_sidecar_written_once_then_reused(store):
+    path = _save_local_doc("TSLA", "TSLA local analysis", 1_700_000_000)
+    vector_store.preload_from_local("TSLA")
+    sidecar = vector_store._sidecar_path(path)
+    assert os.path.exists(sidecar) and store == ["TSLA local analysis"]
+
+    assert vector_store._load_or_embed(path, "TSLA local analysis")[0] == 1.0
+    assert store == ["TSLA local analysis"]  # served from the .npy, not re-embedded
+
+
+def test_incremental_preload_loads_every_new_doc(store, news):
+    news.insert_many([_doc(i, np.ones(EMBEDDING_DIM)) for i in range(5)])
+    vector_store.preload_from_mongo("AAPL", limit=20)
+    news.insert_many([_doc(i, np.ones(EMBEDDING_DIM)) for i in range(5, 40)])  # more than `limit` new docs
+    vector_store.preload_from_mongo("AAPL", limit=20)
+    vector_store.preload_from_mongo("AAPL", limit=20)
+    assert sorted(vector_store.local_index().contents) == sorted(f"doc {i}" for i in range(40))
+
+
+def test_late_write_behind_docs_are_not_skipped(store, news):
+    news.insert_many([_doc(i, np.ones(EMBEDDING_DIM)) for i in (0, 10)])
+    vector_store.preload_from_mongo("AAPL")
+    late = _doc(10, np.ones(EMBEDDING_DIM))  # timestamped at the watermark, flushed after the read
+    late["analysis"] = "late"
+    late["timestamp"] -= timedelta(seconds=1)
+    news.insert_one(late)
+    vector_store.preload_from_mongo("AAPL")
+    assert "late" in vector_store.local_index().contents
+
+
+def test_quantized_backends_are_not_mirrored_into_pathway(store, monkeypatch, tmp_path):
+    from backend.vector_index import make_index
+
+    def fail(*args, **kwargs):
+        raise AssertionError("quantized indexes must not go through Pathway")
+
+    monkeypatch.setattr(vector_store, "PATHWAY_MIRROR", False)
+    monkeypatch.setattr(vector_store.vector_runtime, "push", fail)
+    monkeypatch.setattr(vector_store.vector_runtime, "query_many", fail)
+    monkeypatch.setattr(vector_store, "_local_index", make_index("int8", dim=EMBEDDING_DIM, path=str(tmp_path / "shards")))
+
+    _save_local_doc("AAPL", "AAPL local analysis", 1_700_000_000)
+    vector_store.preload_from_local("AAPL")
+    assert vector_store.search("AAPL", k=1)[0][1] == "AAPL local analysis"
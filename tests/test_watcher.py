@@ -0,0 +1,149 @@
+import asyncio
+import csv
+
+import pytest
+
+from backend import data_ingest, watcher
+from backend.anomaly import AnomalyDetector
+from backend.bar_cache import BarCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_queue_priority_dedup_and_cooldown():
+    clock = Clock()
+    queue = watcher.JobQueue(cooldown=60, clock=clock)
+    assert queue.push("AAPL", 2.0)
+    assert queue.push("TSLA", 5.0)
+    assert not queue.push("AAPL", 1.0)   # already queued, lower priority
+    assert queue.push("AAPL", 9.0)       # bumped
+    assert len(queue) == 2
+
+    assert queue.pop_nowait()[0] == "AAPL"
+    assert not queue.push("AAPL", 20.0)  # running
+    queue.done("AAPL")
+    assert not queue.push("AAPL", 20.0)  # cooling down
+    clock.now = 61
+    assert queue.push("AAPL", 1.0)
+
+    assert [queue.pop_nowait()[0], queue.pop_nowait()[0]] == ["TSLA", "AAPL"]
+    assert queue.pop_nowait() is None
+    assert queue.stats()["cooled_down"] == 1
+
+
+def test_failed_job_only_backs_off_briefly():
+    clock = Clock()
+    queue = watcher.JobQueue(cooldown=900, retry_backoff=30, clock=clock)
+    queue.push("AAPL", 1.0)
+    queue.pop_nowait()
+    queue.done("AAPL", ok=False)
+    assert not queue.push("AAPL", 1.0)
+    clock.now = 31
+    assert queue.push("AAPL", 1.0)
+    assert queue.stats()["failed"] == 1
+
+
+def test_result_store_expires():
+    clock = Clock()
+    store = watcher.ResultStore(ttl=10, clock=clock)
+    store.put("AAPL", {"stock": "AAPL"})
+    assert store.get("AAPL")["result"] == {"stock": "AAPL"}
+    assert store.get(" aapl")["result"] == {"stock": "AAPL"}
+    clock.now = 11
+    assert store.get("AAPL") is None
+
+
+def _write_csv(directory, ticker, closes):
+    with open(directory / f"{ticker}.csv", "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["ts", "open", "high", "low", "close", "volume"])
+        writer.writerows((60 * i, c, c, c, c, 100) for i, c in enumerate(closes))
+
+
+@pytest.fixture
+def feed(tmp_path, monkeypatch):
+    source = tmp_path / "feed"
+    source.mkdir()
+    monkeypatch.setattr(data_ingest, "fetcher", data_ingest.FileFetcher(str(source)))
+    monkeypatch.setattr(data_ingest, "_bar_cache", BarCache(str(tmp_path / "bars")))
+    return source
+
+
+def test_only_tickers_that_trip_the_detector_get_analyzed(feed):
+    _write_csv(feed, "AAPL", [100.0] * 10)
+    _write_csv(feed, "TSLA", [200.0] * 10)
+    calls = []
+
+    async def analyze(ticker):
+        calls.append(ticker)
+        return {"stock": ticker, "final_report": "report", "threat_score": 0.4}
+
+    async def run():
+        watch = watcher.Watcher(["AAPL", "TSLA"], analyze, interval=3600, concurrency=1,
+                                detector=AnomalyDetector(warmup=5), store=watcher.ResultStore())
+        assert await watch.poll_once() == []
+        _write_csv(feed, "TSLA", [200.0] * 10 + [260.0])  # +30% move on the new bar only
+        anomalies = await watch.poll_once()
+        assert [a["ticker"] for a in anomalies] == ["TSLA"]
+        watch.start()
+        for _ in range(100):
+            if watch.results.get("TSLA"):
+                break
+            await asyncio.sleep(0.01)
+        await watch.stop()
+        return watch
+
+    watch = asyncio.run(run())
+    assert calls == ["TSLA"]
+    assert watch.results.get("TSLA")["trigger"]["reasons"] == ["move"]
+    assert watch.bars_seen == 21
+
+
+def test_error_reports_are_not_stored(feed):
+    _write_csv(feed, "TSLA", [200.0] * 10)
+    calls = []
+
+    async def analyze(ticker):
+        calls.append(ticker)
+        return {"stock": ticker, "final_report": "Error: Could not analyze query.", "threat_score": None}
+
+    async def run():
+        watch = watcher.Watcher(["TSLA"], analyze, interval=3600, concurrency=1, cooldown=900, retry_backoff=0,
+                                detector=AnomalyDetector(warmup=5), store=watcher.ResultStore())
+        await watch.poll_once()
+        _write_csv(feed, "TSLA", [200.0] * 10 + [260.0])
+        await watch.poll_once()
+        watch.start()
+        for _ in range(100):
+            if watch.queue.stats()["done"]:
+                break
+            await asyncio.sleep(0.01)
+        await watch.stop()
+        return watch
+
+    watch = asyncio.run(run())
+    assert calls == ["TSLA"]
+    assert watch.results.get("TSLA") is None and watch.errors == 1
+    assert watch.queue.push("TSLA", 1.0)  # retried after the short backoff, not the 900s cooldown
+
+
+def test_first_poll_primes_without_queueing(feed):
+    _write_csv(feed, "AAPL", [100.0] * 10 + [130.0] + [130.0] * 5)  # a move earlier in the day
+
+    async def analyze(ticker):
+        raise AssertionError("history must not trigger analyses")
+
+    async def run():
+        watch = watcher.Watcher(["AAPL"], analyze, detector=AnomalyDetector(warmup=5), store=watcher.ResultStore())
+        anomalies = await watch.poll_once()
+        return watch, anomalies
+
+    watch, anomalies = asyncio.run(run())
+    assert anomalies == [] and len(watch.queue) == 0 and watch.primed
+    assert watch.detector.snapshot("AAPL")["ticks"] == 16
@@ -0,0 +1,76 @@
+import mongomock
+from pymongo.errors import AutoReconnect
+
+from backend.write_behind import WriteBehindQueue
+
+
+def test_writes_are_batched_and_flushed():
+    collection = mongomock.MongoClient().db.news
+    writer = WriteBehindQueue(lambda: collection, max_batch=10, interval_ms=20)
+    for i in range(25):
+        writer.put({"stock": "AAPL", "analysis": f"doc {i}"})
+    writer.close()
+
+    assert collection.count_documents({}) == 25
+    stats = writer.stats()
+    assert stats["written"] == 25 and stats["pending"] == 0
+    assert stats["batches"] < 25
+
+
+def test_duplicate_ids_do_not_block_the_rest_of_a_batch():
+    collection = mongomock.MongoClient().db.news
+    collection.insert_one({"_id": "dup", "analysis": "existing"})
+    writer = WriteBehindQueue(lambda: collection, max_batch=10, interval_ms=50)
+    writer.put({"_id": "dup", "analysis": "again"})
+    writer.put({"_id": "new", "analysis": "fresh"})
+    writer.close()
+
+    assert collection.count_documents({}) == 2
+    assert writer.stats()["errors"] == 1
+
+
+def test_full_queue_falls_back_to_direct_insert():
+    collection = mongomock.MongoClient().db.news
+    writer = WriteBehindQueue(lambda: collection, max_pending=1, put_timeout=0.01, interval_ms=500)
+    writer._ensure_worker = lambda: None  # no consumer: the queue stays full
+    writer.put({"analysis": "queued"})
+    writer.put({"analysis": "direct"})
+
+    assert writer.stats()["direct_writes"] == 1
+    assert collection.count_documents({"analysis": "direct"}) == 1
+
+
+class FlakyCollection:
+    """Drops the connection for the first `failures` writes, after inserting part of the batch."""
+
+    def __init__(self, failures: int):
+        self.collection = mongomock.MongoClient().db.news
+        self.failures = failures
+
+    def insert_many(self, docs, ordered=False):
+        if self.failures:
+            self.failures -= 1
+            self.collection.insert_one(docs[0])  # partial write before the connection dropped
+            raise AutoReconnect("connection reset")
+        return self.collection.insert_many(docs, ordered=ordered)
+
+
+def test_failed_batches_are_retried_not_dropped():
+    flaky = FlakyCollection(failures=2)
+    writer = WriteBehindQueue(lambda: flaky, max_batch=10, interval_ms=20, retry_backoff=0.01)
+    for i in range(5):
+        writer.put({"_id": i, "analysis": f"doc {i}"})
+    writer.close()
+
+    assert flaky.collection.count_documents({}) == 5
+    stats = writer.stats()
+    assert stats["written"] == 5 and stats["errors"] == 0 and stats["retried"] == 2
+
+
+def test_batch_dropped_after_retries_run_out():
+    flaky = FlakyCollection(failures=10)
+    writer = WriteBehindQueue(lambda: flaky, max_batch=10, interval_ms=20, retries=2, retry_backoff=0.01)
+    writer.put({"_id": 1, "analysis": "doc"})
+    writer.put({"_id": 2, "analysis": "doc"})
+    writer.close()
+    assert writer.stats()["errors"] == 2